@@ -15,6 +15,7 @@
 # Note: This script can use GAM7 or Advanced GAM:
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
+#       The rows of CrosSNIDMap.csv are indexed by serial number in CrosSNIDMap.csv.serialNumber.upper.lookup, which is reused until CrosSNIDMap.csv changes.
 # Customize: DATA_SN_HEADER
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
@@ -29,6 +30,9 @@
 import csv
 import sys
 
+from gamlib import instrument
+from gamlib.lookupstore import openLookupStore
+
 # Do not change these values
 CROS_SN_HEADER = 'serialNumber'
 CROS_DEVICEID_HEADER = 'deviceId'
@@ -39,12 +43,8 @@ DATA_SN_HEADER = 'serialNumber'
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-crosSNIDMap = {}
 crosSNIDMapFileName = sys.argv[1]
-inputFile = open(crosSNIDMapFileName, 'r', encoding='utf-8')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  crosSNIDMap[row[CROS_SN_HEADER].upper()] = row[CROS_DEVICEID_HEADER]
-inputFile.close()
+crosDevices = openLookupStore(crosSNIDMapFileName, CROS_SN_HEADER, QUOTE_CHAR, keyCase='upper')
 
 inputFileName = sys.argv[2]
 inputFile = open(inputFileName, 'r', encoding='utf-8')
@@ -63,14 +63,16 @@ outputCSV = csv.DictWriter(outputFile, outputFieldNames, lineterminator=LINE_TER
 outputCSV.writeheader()
 
 sysRC = 0
-for row in inputCSV:
-  deviceId = crosSNIDMap.get(row[DATA_SN_HEADER].upper(), '')
-  if deviceId:
-    row[CROS_DEVICEID_HEADER] = deviceId
-  else:
-    sys.stderr.write(f'Error: Serial number {row[DATA_SN_HEADER]} is not in Serial Number/DeviceID file {crosSNIDMapFileName}\n')
-    sysRC = 1
-  outputCSV.writerow(row)
+with instrument.phase('scan'):
+  for row in inputCSV:
+    device = crosDevices.get(row[DATA_SN_HEADER].upper())
+    deviceId = device[CROS_DEVICEID_HEADER] if device is not None else ''
+    if deviceId:
+      row[CROS_DEVICEID_HEADER] = deviceId
+    else:
+      sys.stderr.write(f'Error: Serial number {row[DATA_SN_HEADER]} is not in Serial Number/DeviceID file {crosSNIDMapFileName}\n')
+      sysRC = 1
+    outputCSV.writerow(row)
 
 inputFile.close()
 outputFile.close()
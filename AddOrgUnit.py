@@ -4,6 +4,7 @@
 # Note: This script can use GAM7 or Advanced GAM:
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
+#       The rows of Users.csv are indexed by email address in Users.csv.primaryEmail.lookup, which is reused until Users.csv changes.
 # Customize: DATA_EMAIL_HEADER, DATA_ORGUNIT_HEADER, USER_EMAIL_HEADER, USER_ORGUNIT_HEADER, UNKNOWN_ORGUNIT
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
@@ -20,6 +21,9 @@
 import csv
 import sys
 
+from gamlib import instrument
+from gamlib.lookupstore import openLookupStore
+
 # You have to indicate the header in Data.csv that contains the user email addresses
 # and the desired Org Unit header in DataWithOrgUnit.csv
 # Common values are:
@@ -40,11 +44,7 @@ UNKNOWN_ORGUNIT = 'Unknown'
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-userOrgUnits = {}
-inputFile = open(sys.argv[2], 'r', encoding='utf-8')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  userOrgUnits[row[USER_EMAIL_HEADER]] = row[USER_ORGUNIT_HEADER]
-inputFile.close()
+users = openLookupStore(sys.argv[2], USER_EMAIL_HEADER, QUOTE_CHAR)
 
 if sys.argv[1] != '-':
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
@@ -68,9 +68,11 @@ else:
 outputCSV = csv.DictWriter(outputFile, outputFieldNames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-for row in inputCSV:
-  row[DATA_ORGUNIT_HEADER] = userOrgUnits.get(row[DATA_EMAIL_HEADER], UNKNOWN_ORGUNIT)
-  outputCSV.writerow(row)
+with instrument.phase('scan'):
+  for row in inputCSV:
+    user = users.get(row[DATA_EMAIL_HEADER])
+    row[DATA_ORGUNIT_HEADER] = user[USER_ORGUNIT_HEADER] if user is not None else UNKNOWN_ORGUNIT
+    outputCSV.writerow(row)
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -12,7 +12,9 @@
 # Note: This script can use GAM7 or Advanced GAM:
 #	https://github.com/GAM-team/GAM
 #	https://github.com/taers232c/GAMADV-XTD3
-# Customize: DATA_KEY_FIELD, USER_KEY_FIELD, RETAIN_USER_KEY_FIELD, USER_APPEND_FIELDS, WRITE_UNMATCHED_DATA_ROWS
+#       The rows of User.csv are indexed by USER_KEY_FIELD in User.csv.primaryEmail.lookup, which is reused until User.csv changes.
+#       For files too large to hold in memory, set JOIN_MODE = 'sort'; the files are sorted in runs of SORT_RUN_ROWS rows on disk instead.
+# Customize: DATA_KEY_FIELD, USER_KEY_FIELD, RETAIN_USER_KEY_FIELD, USER_APPEND_FIELDS, WRITE_UNMATCHED_DATA_ROWS, JOIN_MODE
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -27,6 +29,10 @@
 import csv
 import sys
 
+from gamlib import instrument
+from gamlib.extsort import lastRows, sortRows
+from gamlib.lookupstore import openLookupStore
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
@@ -40,6 +46,16 @@ RETAIN_USER_KEY_FIELD = False
 USER_APPEND_FIELDS = []
 # Should unmatched data key rows be written to output
 WRITE_UNMATCHED_DATA_ROWS = True
+# How the files are joined
+# 'lookup' - Index the user file by key and look up the key of each data row
+# 'sort' - Sort both files by key, merge them and sort the result back into data file order; for files too large to hold in memory
+JOIN_MODE = 'lookup'
+# Sort join: number of rows sorted in memory at a time; larger files are sorted in runs that are written to
+# temporary files and merged, so memory use is bounded by this number rather than by the size of the files.
+SORT_RUN_ROWS = 500000
+
+ROW_NUMBER_FIELD = '__rowNumber'
+MATCHED_FIELD = '__matched'
 
 dataFileName = sys.argv[1]
 dataFile = open(dataFileName, 'r', encoding='utf-8')
@@ -49,17 +65,17 @@ if DATA_KEY_FIELD not in dataFieldNames:
   sys.stderr.write(f'Data key field {DATA_KEY_FIELD} is not in {dataFileName} headers: {",".join(dataFieldNames)}\n')
   sys.exit(1)
 
-userData = {}
 userFileName = sys.argv[2]
-userFile = open(userFileName, 'r', encoding='utf-8')
-userCSV = csv.DictReader(userFile, quotechar=QUOTE_CHAR)
-userFieldNames = userCSV.fieldnames[:]
+if JOIN_MODE == 'sort':
+  userFile = open(userFileName, 'r', encoding='utf-8')
+  userCSV = csv.DictReader(userFile, quotechar=QUOTE_CHAR)
+  userFieldNames = userCSV.fieldnames[:]
+else:
+  userData = openLookupStore(userFileName, USER_KEY_FIELD, QUOTE_CHAR)
+  userFieldNames = userData.fieldnames[:]
 if USER_KEY_FIELD not in userFieldNames:
   sys.stderr.write(f'User key field {USER_KEY_FIELD} is not in {userFileName} headers: {",".join(userFieldNames)}\n')
   sys.exit(1)
-for row in userCSV:
-  userData[row[USER_KEY_FIELD]] = row
-userFile.close()
 
 errors = 0
 if not USER_APPEND_FIELDS:
@@ -93,18 +109,63 @@ outputFile = open(outputFileName, 'w', encoding='utf-8', newline='')
 outputCSV = csv.DictWriter(outputFile, outputFieldNames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
+def dataKey(row):
+  return row[DATA_KEY_FIELD]
+
+def userKey(row):
+  return row[USER_KEY_FIELD]
+
+def rowNumber(row):
+  return int(row[ROW_NUMBER_FIELD])
+
+def numberRows(rows):
+  for n, row in enumerate(rows):
+    row[ROW_NUMBER_FIELD] = n
+    yield row
+
+def joinUserData(dataRows, userRows):
+  """Append the user fields to the data rows, both sorted by key, and mark the rows that were matched"""
+  userGroup = next(userRows, None)
+  for row in dataRows:
+    k = row[DATA_KEY_FIELD]
+    while userGroup and userGroup[0] < k:
+      userGroup = next(userRows, None)
+    if userGroup and userGroup[0] == k:
+      for fieldName in userFieldNameMap:
+        row[userFieldNameMap[fieldName]] = userGroup[1][fieldName]
+      row[MATCHED_FIELD] = 'Y'
+    else:
+      row[MATCHED_FIELD] = ''
+    yield row
+
+def joinedRows():
+  """Yield (row, matched) for each data row in data file order"""
+  if JOIN_MODE == 'sort':
+    userRows = lastRows(sortRows(userCSV, userKey, userCSV.fieldnames, SORT_RUN_ROWS), userKey)
+    dataRows = sortRows(numberRows(dataCSV), dataKey, dataCSV.fieldnames+[ROW_NUMBER_FIELD], SORT_RUN_ROWS)
+    for row in sortRows(joinUserData(dataRows, userRows), rowNumber,
+                        outputFieldNames+[ROW_NUMBER_FIELD, MATCHED_FIELD], SORT_RUN_ROWS):
+      del row[ROW_NUMBER_FIELD]
+      yield row, row.pop(MATCHED_FIELD) == 'Y'
+    userFile.close()
+    return
+  for row in dataCSV:
+    userRow = userData.get(row[DATA_KEY_FIELD])
+    if userRow is not None:
+      for fieldName in userFieldNameMap:
+        row[userFieldNameMap[fieldName]] = userRow[fieldName]
+    yield row, userRow is not None
+
 errors = 0
-for row in dataCSV:
-  k = row[DATA_KEY_FIELD]
-  if k in userData:
-    for fieldName in userFieldNameMap:
-      row[userFieldNameMap[fieldName]] = userData[k][fieldName]
-    outputCSV.writerow(row)
-  else:
-    errors = 1
-    sys.stderr.write(f'Data key field {row[DATA_KEY_FIELD]} in {dataFileName} does not occur in {userFileName}\n')
-    if WRITE_UNMATCHED_DATA_ROWS:
+with instrument.phase('scan'):
+  for row, matched in joinedRows():
+    if matched:
       outputCSV.writerow(row)
+    else:
+      errors = 1
+      sys.stderr.write(f'Data key field {row[DATA_KEY_FIELD]} in {dataFileName} does not occur in {userFileName}\n')
+      if WRITE_UNMATCHED_DATA_ROWS:
+        outputCSV.writerow(row)
 
 dataFile.close()
 outputFile.close()
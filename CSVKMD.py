@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 """
 Purpose: Process a CSV file to combine data fields for unique key fields
-Customize: Change QUOTE_CHAR, DATA_DELIMITER, LINE_TERMINATOR as required/desired
-Define: KEYFIELD, DATAFIELD, SAVEFIELDS, MATCHFIELDS, SKIPFIELDS
+Note: Data field values are combined in the order they first appear, without duplicates;
+      save field values are taken from the last row of each key.
+      The MATCHFIELDS and SKIPFIELDS expressions are evaluated once per distinct value of each field.
+      When more than MEMORY_VALUES_LIMIT values have been collected, the rows are combined by sorting them on disk
+      in runs of SORT_RUN_ROWS rows, so memory use does not grow with the file.
+Customize: Change QUOTE_CHAR, DATA_DELIMITER, LINE_TERMINATOR, MEMORY_VALUES_LIMIT, SORT_RUN_ROWS as required/desired
+Define: KEYFIELD, SUBKEYFIELD, DATAFIELD, SAVEFIELDS, MATCHFIELDS, SKIPFIELDS
 Python: Use python or python3 below as appropriate to your system; verify that you have version 3
  $ python -V   or   python3 -V
  Python 3.x.y
@@ -32,9 +37,9 @@ SKIPFIELDS = {}
 $ python3 CSVKMD.py CourseStudent.csv CourseStudentCombined.csv
 $ more CourseStudentCombined.csv
 id,name,student
-47491913641,math,testuser9@domain.com testuser7@domain.com testuser8@domain.com
-56941282690,english,testuser5@domain.com testuser6@domain.com testuser4@domain.com
-57121690282,science,testuser2@domain.com testuser1@domain.com testuser3@domain.com
+47491913641,math,testuser7@domain.com testuser8@domain.com testuser9@domain.com
+56941282690,english,testuser4@domain.com testuser5@domain.com testuser6@domain.com
+57121690282,science,testuser1@domain.com testuser2@domain.com testuser3@domain.com
 $ gam csv CourseStudentCombined.csv gam courses "~id" add students users "~student"
 
 Process only english course
@@ -47,7 +52,7 @@ SKIPFIELDS = {}
 $ python3 CSVKMD.py CourseStudent.csv CourseStudentCombined.csv
 $ more CourseStudentCombined.csv
 id,name,student
-56941282690,english,testuser5@domain.com testuser6@domain.com testuser4@domain.com
+56941282690,english,testuser4@domain.com testuser5@domain.com testuser6@domain.com
 $ gam csv CourseStudentCombined.csv gam courses "~id" add students users "~student"
 
 Process all courses except english
@@ -60,24 +65,50 @@ SKIPFIELDS = {'name': re.compile(r'english')}
 $ python3 CSVKMD.py CourseStudent.csv CourseStudentCombined.csv
 $ more CourseStudentCombined.csv
 id,name,student
-47491913641,math,testuser8@domain.com testuser7@domain.com testuser9@domain.com
+47491913641,math,testuser7@domain.com testuser8@domain.com testuser9@domain.com
 57121690282,science,testuser1@domain.com testuser2@domain.com testuser3@domain.com
 $ gam csv CourseStudentCombined.csv gam courses "~id" add students users "~student"
+
+Process all courses, one row per course and role
+You have a CSV file CourseParticipants.csv with columns courseId,courseName,userRole,profile.emailAddress
+KEYFIELD = 'courseId'
+SUBKEYFIELD = 'userRole'
+DATAFIELD = 'profile.emailAddress'
+SAVEFIELDS = ['courseName']
+MATCHFIELDS = {}
+SKIPFIELDS = {}
+
+$ python3 CSVKMD.py CourseParticipants.csv CourseParticipantsCombined.csv
+$ more CourseParticipantsCombined.csv
+courseId,courseName,userRole,profile.emailAddress
+47491913641,math,STUDENT,testuser7@domain.com testuser8@domain.com testuser9@domain.com
+47491913641,math,TEACHER,teacher1@domain.com
 """
 
 import csv
+import functools
+import itertools
+import operator
 import re
 import sys
 
+from gamlib import instrument
+from gamlib.extsort import sortRows
+
 QUOTE_CHAR = '"' # Adjust as needed to properly read CSV files
 DATA_DELIMITER = ' '# Delimiter between data field items
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
 ignore = re.compile(r'') # Keep pylint happy
 
-# Key field name
+# Key field name or list of key field names
 # e.g., KEYFIELD = 'id'
+#       KEYFIELD = ['courseId', 'section']
 KEYFIELD = ''
+# Sub-key field name or list of sub-key field names; data is combined for each key and sub-key,
+# rows are sorted by key and then by sub-key. Rows with an empty sub-key are processed
+# e.g., SUBKEYFIELD = 'userRole'
+SUBKEYFIELD = ''
 # Data field name
 # e.g., DATAFIELD = 'student'
 DATAFIELD = ''
@@ -91,31 +122,124 @@ MATCHFIELDS = {}
 # SKIPFIELDS = {'name': re.compile(r'english')}
 SKIPFIELDS = {}
 
+# Number of distinct data values held in memory; after that the rows are combined by sorting them on disk, 0 for no limit
+MEMORY_VALUES_LIMIT = 5000000
+# Number of rows sorted in memory at a time when sorting on disk
+SORT_RUN_ROWS = 500000
+# Number of distinct values per MATCHFIELDS/SKIPFIELDS field whose result is remembered
+PREDICATE_CACHE_SIZE = 65536
 
 def fieldError(category, fieldName):
   sys.stderr.write(f'Error: {category}field "{fieldName}" not in file {sys.argv[1]} field names: {",".join(inputFieldNames)}\n')
 
-def checkMatchSkipFields(row, matchFields, skipFields):
-  for matchField, matchPattern in iter(matchFields.items()):
-    if (matchField not in row) or not matchPattern.search(row[matchField]):
-      return False
-  for skipField, matchPattern in iter(skipFields.items()):
-    if (skipField in row) and matchPattern.search(row[skipField]):
+def fieldList(fields):
+  if not fields:
+    return []
+  if isinstance(fields, str):
+    return [fields]
+  return list(fields)
+
+def fieldGetter(indexes):
+  """Function that returns the values of the fields at indexes of a row as a tuple"""
+  if not indexes:
+    return lambda row: ()
+  if len(indexes) == 1:
+    index = indexes[0]
+    return lambda row: (row[index],)
+  return operator.itemgetter(*indexes)
+
+def fieldPredicate(pattern, matches):
+  """Function that returns whether pattern finds a match in a value, or doesn't when matches is False, remembered per value"""
+  if isinstance(pattern, str):
+    pattern = re.compile(pattern)
+  @functools.lru_cache(maxsize=PREDICATE_CACHE_SIZE)
+  def check(value):
+    return (pattern.search(value) is not None) == matches
+  return check
+
+def checkMatchSkipFields(row, predicates):
+  for index, check in predicates:
+    if not check(row[index]):
       return False
   return True
 
-data = {}
+def selectRows(rows):
+  """Yield (key and sub-key values, data value, save values) for the rows to be processed"""
+  fieldCount = len(inputFieldNames)
+  for row in rows:
+    if len(row) < fieldCount:
+      row.extend(['']*(fieldCount-len(row)))
+    if all(requiredOf(row)) and checkMatchSkipFields(row, predicates):
+      yield groupOf(row), row[dataIndex], saveOf(row)
+
+def outputRow(groupKey, values, saves):
+  fields = groupKey+(DATA_DELIMITER.join(values),)+saves
+  return [fields[position] for position in outputPositions]
+
+def combineInMemory(selectedRows):
+  """{key and sub-key values: [{data value: None}, save values]} until MEMORY_VALUES_LIMIT values are held;
+     returns the groups and whether the limit was reached"""
+  groups = {}
+  valueCount = 0
+  for groupKey, value, saves in selectedRows:
+    group = groups.get(groupKey)
+    if group is None:
+      group = groups[groupKey] = [{}, saves]
+    else:
+      group[1] = saves
+    if value not in group[0]:
+      group[0][value] = None
+      valueCount += 1
+      if MEMORY_VALUES_LIMIT and valueCount >= MEMORY_VALUES_LIMIT:
+        return groups, True
+  return groups, False
+
+def combineOnDisk(groups, selectedRows):
+  """Yield output rows for the collected groups and the remaining rows, combined by sorting them by key and sub-key on disk"""
+  groupFields = [f'k{i}' for i in range(len(groupFieldNames))]
+  saveFields = [f's{i}' for i in range(len(SAVEFIELDS))]
+  spillFields = groupFields+['data']+saveFields
+
+  def spillRows():
+    # The values of a group are written in the order they were collected and before the rows that follow,
+    # the stable sort keeps that order and the save values of the last row
+    for groupKey, (values, saves) in groups.items():
+      for value in values:
+        yield dict(zip(spillFields, groupKey+(value,)+saves))
+    groups.clear()
+    for groupKey, value, saves in selectedRows:
+      yield dict(zip(spillFields, groupKey+(value,)+saves))
+
+  groupKeyOf = operator.itemgetter(*groupFields)
+  savesOf = operator.itemgetter(*saveFields) if saveFields else lambda row: ()
+  for groupKey, rows in itertools.groupby(sortRows(spillRows(), groupKeyOf, spillFields, SORT_RUN_ROWS), groupKeyOf):
+    values = {}
+    for row in rows:
+      values[row['data']] = None
+    saves = savesOf(row)
+    yield outputRow(groupKey if isinstance(groupKey, tuple) else (groupKey,), values,
+                    saves if isinstance(saves, tuple) else (saves,))
 
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-inputFieldNames = inputCSV.fieldnames
+inputCSV = csv.reader(inputFile, quotechar=QUOTE_CHAR)
+inputFieldNames = next(inputCSV, [])
+keyFieldNames = fieldList(KEYFIELD)
+groupFieldNames = keyFieldNames+fieldList(SUBKEYFIELD)
 fieldErrors = 0
-if KEYFIELD not in inputFieldNames:
+if not keyFieldNames:
   fieldError('key', KEYFIELD)
   fieldErrors += 1
+for field in keyFieldNames:
+  if field not in inputFieldNames:
+    fieldError('key', field)
+    fieldErrors += 1
+for field in fieldList(SUBKEYFIELD):
+  if field not in inputFieldNames:
+    fieldError('subkey', field)
+    fieldErrors += 1
 if DATAFIELD not in inputFieldNames:
   fieldError('data', DATAFIELD)
   fieldErrors += 1
@@ -133,33 +257,37 @@ for field in SKIPFIELDS:
     fieldErrors += 1
 if fieldErrors:
   sys.exit(1)
-outputFieldNames = []
-for field in inputFieldNames:
-  if field == KEYFIELD or field == DATAFIELD or field in SAVEFIELDS:
-    outputFieldNames.append(field)
-for irow in inputCSV:
-  keyfield = irow[KEYFIELD]
-  datafield = irow[DATAFIELD]
-  if keyfield and datafield and checkMatchSkipFields(irow, MATCHFIELDS, SKIPFIELDS):
-    data.setdefault(keyfield, {DATAFIELD: set()})
-    data[keyfield][DATAFIELD].add(datafield)
-    for field in SAVEFIELDS:
-      data[keyfield][field] = irow[field]
-if inputFile != sys.stdin:
-  inputFile.close()
+dataIndex = inputFieldNames.index(DATAFIELD)
+requiredOf = fieldGetter([inputFieldNames.index(field) for field in keyFieldNames]+[dataIndex])
+groupOf = fieldGetter([inputFieldNames.index(field) for field in groupFieldNames])
+saveOf = fieldGetter([inputFieldNames.index(field) for field in SAVEFIELDS])
+predicates = [(inputFieldNames.index(field), fieldPredicate(pattern, True)) for field, pattern in MATCHFIELDS.items()]
+predicates.extend((inputFieldNames.index(field), fieldPredicate(pattern, False)) for field, pattern in SKIPFIELDS.items())
+# Position of each output field in key and sub-key values, data value and save values; a save field takes precedence
+sourcePositions = {}
+for position, field in enumerate(groupFieldNames+[DATAFIELD]+SAVEFIELDS):
+  sourcePositions[field] = position
+outputFieldNames = [field for field in inputFieldNames if field in sourcePositions]
+outputPositions = [sourcePositions[field] for field in outputFieldNames]
+
+with instrument.phase('scan'):
+  selectedRows = selectRows(inputCSV)
+  data, spill = combineInMemory(selectedRows)
+  if spill:
+    outputRows = combineOnDisk(data, selectedRows)
+  else:
+    outputRows = (outputRow(groupKey, values, saves) for groupKey, (values, saves) in sorted(data.items()))
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', newline='')
 else:
   outputFile = sys.stdout
-outputCSV = csv.DictWriter(outputFile, outputFieldNames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
-
-for kp, kv in sorted(data.items()):
-  orow = {KEYFIELD: kp, DATAFIELD: DATA_DELIMITER.join(kv[DATAFIELD])}
-  for field in SAVEFIELDS:
-    orow[field] = kv[field]
-  outputCSV.writerow(orow)
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+with instrument.phase('write'):
+  outputCSV.writerow(outputFieldNames)
+  outputCSV.writerows(outputRows)
 
+if inputFile != sys.stdin:
+  inputFile.close()
 if outputFile != sys.stdout:
   outputFile.close()
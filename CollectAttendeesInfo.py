@@ -44,6 +44,8 @@ LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
 ATTENDEES_N_EMAIL = re.compile(r"attendees.(\d+).email")
 
+domainSet = frozenset(DOMAIN_LIST)
+
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -68,7 +70,7 @@ for row in inputCSV:
         continue
       _, domain = v.split('@')
       if ((v not in attendees) and
-          (not DOMAIN_LIST or domain in DOMAIN_LIST) and
+          (not DOMAIN_LIST or domain in domainSet) and
           (not ATTENDEE_LIST or v in ATTENDEE_LIST) and
           (not ATTENDEE_PATTERN or ATTENDEE_PATTERN.match(v))):
         attendees.add(v)
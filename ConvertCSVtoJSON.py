@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
 # Purpose: For a CSV file with JSON columns, produce a file with no header row (optional) and only JSON data.
+# Note: Rows are converted and written one at a time, so memory use does not grow with the file
+#       and the output can be a pipe or stdout.
 # Customize: Set INPUT_QUOTE_CHAR, OUTPUT_QUOTE_CHAR, LINE_TERMINATOR, MERGE_NON_JSON_DATA, NON_JSON_DATA_SKIP_FIELDS, MAKE_LIST, HEADER_ROW
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
@@ -9,12 +11,14 @@
 # 1: Produce a CSV file Input.csv
 # 2: Produce a JSON file Output.json
 #  $ python3 ./ConvertCSVtoJSON.py Input.csv Output.json
+#  or write to stdout, e.g., to pipe the output to another command
+#  $ python3 ./ConvertCSVtoJSON.py Input.csv - | ...
 """
 
-import csv
-import json
 import sys
 
+from gamlib import instrument, jsoncodec, mmapcsv
+
 INPUT_QUOTE_CHAR = "'" # Adjust as needed
 OUTPUT_QUOTE_CHAR = "'" # Adjust as desired; can be empty ""
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
@@ -37,6 +41,18 @@ HEADER_ROW = True # True - Header row JSON; False - no header row. Only applies
 #   '{"key": "value", "key": "value"}'
 #   '{"key": "value", "key": "value"}'
 
+encode = jsoncodec.encoder(ensure_ascii=False, sort_keys=True)
+
+def jsonRows(rows):
+  """Yield each row's JSON columns merged into one dict, with its plain columns when MERGE_NON_JSON_DATA is True"""
+  for row in rows:
+    jsonRow = {}
+    for k in plainFields:
+      jsonRow[k] = row[k]
+    for k in jsonFields:
+      jsonRow.update(jsoncodec.loads(row[k]))
+    yield jsonRow
+
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -45,7 +61,7 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
-inputCSV = csv.DictReader(inputFile, quotechar=INPUT_QUOTE_CHAR)
+inputCSV = mmapcsv.DictReader(inputFile, quotechar=INPUT_QUOTE_CHAR)
 plainFields = []
 jsonFields = []
 for fieldName in inputCSV.fieldnames:
@@ -53,26 +69,22 @@ for fieldName in inputCSV.fieldnames:
     jsonFields.append(fieldName)
   elif MERGE_NON_JSON_DATA and fieldName not in NON_JSON_DATA_SKIP_FIELDS:
     plainFields.append(fieldName)
-jsonRows = []
-for row in inputCSV:
-  jsonRow = {}
-  for k in plainFields:
-    jsonRow[k] = row[k]
-  for k in jsonFields:
-    jsonRow.update(json.loads(row[k]))
-  jsonRows.append(jsonRow)
 if MAKE_LIST:
   outputFile.write('['+LINE_TERMINATOR)
-  lineTerminator = ','+LINE_TERMINATOR
-  for jsonRow in jsonRows:
-    outputFile.write('  '+json.dumps(jsonRow, ensure_ascii=False, sort_keys=True)+lineTerminator)
-  outputFile.seek(outputFile.tell()-(1+len(LINE_TERMINATOR)), 0)
-  outputFile.write(LINE_TERMINATOR+']'+LINE_TERMINATOR)
+  separator = ''
+  with instrument.phase('scan'):
+    for jsonRow in jsonRows(inputCSV):
+      outputFile.write(separator+'  '+encode(jsonRow))
+      separator = ','+LINE_TERMINATOR
+  if separator:
+    outputFile.write(LINE_TERMINATOR)
+  outputFile.write(']'+LINE_TERMINATOR)
 else:
   if HEADER_ROW:
     outputFile.write('JSON'+LINE_TERMINATOR)
-  for jsonRow in jsonRows:
-    outputFile.write(OUTPUT_QUOTE_CHAR+json.dumps(jsonRow, ensure_ascii=False, sort_keys=True)+OUTPUT_QUOTE_CHAR+LINE_TERMINATOR)
+  with instrument.phase('scan'):
+    for jsonRow in jsonRows(inputCSV):
+      outputFile.write(OUTPUT_QUOTE_CHAR+encode(jsonRow)+OUTPUT_QUOTE_CHAR+LINE_TERMINATOR)
 if inputFile != sys.stdin:
   inputFile.close()
 if outputFile != sys.stdout:
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Convert a GAM print filelist CSV to a compact cache file stored next to it, filelistperms.csv.gamcache;
+#          the Drive ACL scripts read the cache instead of the CSV while the CSV is unchanged, so repeated runs skip the CSV parse
+# Note: The cache is ignored once the CSV is modified; run this script again to refresh it.
+#       The cache is not written when it would not be smaller than the CSV, e.g., when most of the cells of the CSV are file IDs and names.
+#       Scripts run with --jobs N read the CSV in parallel rather than the cache.
+#       Set QUOTE_CHAR to the value used by the scripts that read the CSV.
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+# 1: Get ACLs for all files, if you don't want all users, replace all users with your user selection in the command below
+#  $ gam config auto_batch_min 1 redirect csv ./filelistperms.csv multiprocess all users print filelist fields id,name,permissions,owners.emailaddress,mimetype
+# 2: Convert the CSV file to its cache file
+#  $ python3 ConvertFileListToCache.py filelistperms.csv
+# 3: Run the Drive ACL scripts against filelistperms.csv as usual
+#  $ python3 GetSharedFilePermissions.py filelistperms.csv deleteperms.csv
+"""
+
+import sys
+
+from gamlib.filelistcache import cacheFileName, writeCache
+
+QUOTE_CHAR = '"' # Adjust as needed
+
+try:
+  rows = writeCache(sys.argv[1], QUOTE_CHAR)
+except ValueError as e:
+  sys.stderr.write(f'Error: {e}\n')
+  sys.exit(1)
+sys.stderr.write(f'{cacheFileName(sys.argv[1])}: {rows} rows\n')
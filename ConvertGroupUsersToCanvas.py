@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
 # Purpose: Convert a CSV file showing group members in JSON format to a JSON file importable by Canvas
+# Note: Members are converted and written one at a time, so memory use does not grow with the file
+#       and the output can be a pipe or stdout (-); the output is the same as json.dumps(..., indent=2, sort_keys=True).
 # Note: This script can use GAM7 or Advanced GAM:
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
@@ -15,14 +17,31 @@
 """
 
 import csv
-import json
 import sys
 
-with open(sys.argv[1], 'r', encoding='utf-8') as inputFile:
-  inputCSV = csv.DictReader(inputFile, quotechar=' ')
-  canvasData = {"result": []}
+from gamlib import instrument, jsoncodec
+
+INDENT = 2
+
+encode = jsoncodec.encoder(indent=INDENT, sort_keys=True)
+
+def writeCanvasData(outputFile, inputCSV):
+  """Write {"result": [{"student": member}, ...]} indented INDENT spaces, one member at a time"""
+  itemIndent = '\n'+' '*(2*INDENT)
+  outputFile.write('{\n'+' '*INDENT+'"result": [')
+  separator = ''
   for row in inputCSV:
-    canvasData["result"].append({"student": json.loads(row['JSON'])})
+    outputFile.write(separator+itemIndent+encode({"student": jsoncodec.loads(row['JSON'])}).replace('\n', itemIndent))
+    separator = ','
+  if separator:
+    outputFile.write('\n'+' '*INDENT)
+  outputFile.write(']\n}')
 
-with open(sys.argv[2], 'w', encoding='utf-8', newline='') as outputFile:
-  outputFile.write(json.dumps(canvasData, indent=2, sort_keys=True))
+if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
+  outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
+else:
+  outputFile = sys.stdout
+with open(sys.argv[1], 'r', encoding='utf-8') as inputFile, instrument.phase('scan'):
+  writeCanvasData(outputFile, csv.DictReader(inputFile, quotechar=' '))
+if outputFile != sys.stdout:
+  outputFile.close()
@@ -4,6 +4,7 @@
 # Note: This script can use GAM7 or Advanced GAM:
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
+#       The group membership read from GroupUsers.csv is saved in GroupUsers.csv.groupgraph and reused while GroupUsers.csv is unchanged.
 # Customize: Set DELIMITER to the single character that will separate parent groups
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
@@ -18,42 +19,34 @@
 import csv
 import sys
 
+from gamlib import instrument
+from gamlib.groupgraph import readGroupGraph
+
 DELIMITER = ' '
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-def getGroupParents(groupEmail):
-  groupParents[groupEmail] = {'parents': []}
-  for parentGroup in GroupGroups[groupEmail]:
-    groupParents[groupEmail]['parents'].append(parentGroup)
-    if parentGroup not in groupParents:
-      getGroupParents(parentGroup)
-
-def printGroupParents(groupEmail, urow):
-  if groupParents[groupEmail]['parents']:
-    for parentEmail in groupParents[groupEmail]['parents']:
-      urow['parents'].append(parentEmail)
-      printGroupParents(parentEmail, urow)
-      del urow['parents'][-1]
-  else:
-    csvRow = {'primaryEmail': urow['primaryEmail'], 'Group': urow['Group'],
-              'ParentsCount': len(urow['parents']), 'Parents': DELIMITER.join(urow['parents'])}
-    if includeRole:
-      csvRow['Role'] = urow['Role']
-    outputCSV.writerow(csvRow)
+def printGroupParents(user, group, role):
+  for path, isLeaf in graph.walk(group, parents=True):
+    if isLeaf:
+      csvRow = {'primaryEmail': user, 'Group': group,
+                'ParentsCount': len(path)-1, 'Parents': DELIMITER.join(path[1:])}
+      if includeRole:
+        csvRow['Role'] = role
+      outputCSV.writerow(csvRow)
 
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
+graph = readGroupGraph(inputFile, QUOTE_CHAR, lowerCase=True)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
   outputFile = sys.stdout
 outputFieldNames = ['primaryEmail', 'Group', 'ParentsCount', 'Parents']
-if 'role' in inputCSV.fieldnames:
+if graph.hasRoles:
   outputFieldNames.insert(2, 'Role')
   includeRole = True
 else:
@@ -61,30 +54,19 @@ else:
 outputCSV = csv.DictWriter(outputFile, outputFieldNames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-groupParents = {}
-GroupGroups = {}
+# A user's Role is the role in the user's last row in the CSV
 UserGroups = {}
-for row in inputCSV:
-  if row['type'] == 'USER':
-    GroupGroups.setdefault(row['group'], [])
-    email = row['email'].lower()
-    UserGroups.setdefault(email, {'role': None, 'groups': []})
-    UserGroups[email]['groups'].append(row['group'].lower())
-    if includeRole:
-      UserGroups[email]['role'] = row['role']
-  elif row['type'] == 'GROUP':
-    GroupGroups.setdefault(row['group'], [])
-    email = row['email'].lower()
-    GroupGroups.setdefault(email, [])
-    GroupGroups[email].append(row['group'].lower())
+with instrument.phase('scan'):
+  for group, email, mtype, role in graph.memberships():
+    if mtype == 'USER':
+      UserGroups.setdefault(email, {'role': None, 'groups': []})
+      UserGroups[email]['groups'].append(group)
+      UserGroups[email]['role'] = role
 
-for group in groupParents:
-  groupParents[group].sort()
-for user, info in sorted(iter(UserGroups.items())):
-  for group in sorted(info['groups']):
-    if group not in groupParents:
-      getGroupParents(group)
-    printGroupParents(group, {'primaryEmail': user, 'Group': group, 'Role': info['role'], 'parents': []})
+with instrument.phase('write'):
+  for user, info in sorted(iter(UserGroups.items())):
+    for group in sorted(info['groups']):
+      printGroupParents(user, group, info['role'])
 
 if inputFile != sys.stdin:
   inputFile.close()
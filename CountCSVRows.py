@@ -10,18 +10,18 @@
 #
 """
 
-import csv
 import sys
 
+from gamlib import instrument
+from gamlib.projection import countRows
+
 QUOTE_CHAR = '"' # Adjust as needed
 
 if sys.argv[1] != '-':
-  inputFile = open(sys.argv[1], 'r', encoding='utf-8')
+  inputFile = open(sys.argv[1], 'rb')
 else:
-  inputFile = sys.stdin
-rows = 0
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  rows += 1
-print(rows)
-if inputFile != sys.stdin:
+  inputFile = sys.stdin.buffer
+with instrument.phase('scan'):
+  print(countRows(inputFile, QUOTE_CHAR))
+if inputFile != sys.stdin.buffer:
   inputFile.close()
@@ -5,6 +5,8 @@
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
 # Customize: Set DELETE_ATTENDEES_SET, DELETE_ATTENDEES_PATTERN, ALL_ATTENDEES_ONE_ROW
+# Note: Each distinct attendee email address is checked against DELETE_ATTENDEES_SET and DELETE_ATTENDEES_PATTERN once,
+#       see gamlib/batchmatch.py
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -37,6 +39,9 @@ import csv
 import re
 import sys
 
+from gamlib import instrument
+from gamlib.batchmatch import BlockMatcher
+
 # Specific email addresses to delete
 # None: DELETE_ATTENDEES_SET = set([])
 # List: DELETE_ATTENDEES_SET = set(['foo@bar.com, 'goo@bar.com'])
@@ -56,6 +61,9 @@ LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
 ATTENDEES_N_EMAIL = re.compile(r"attendees.(\d+).email")
 
+def checkAttendee(v):
+  return (v in DELETE_ATTENDEES_SET) or (DELETE_ATTENDEES_PATTERN and DELETE_ATTENDEES_PATTERN.match(v))
+
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -68,25 +76,30 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  deleteAttendees = []
-  for k, v in iter(row.items()):
-    mg = ATTENDEES_N_EMAIL.match(k)
-    if mg and ((v in DELETE_ATTENDEES_SET) or (DELETE_ATTENDEES_PATTERN and DELETE_ATTENDEES_PATTERN.match(v))):
-      deleteAttendees.append(v)
-  if deleteAttendees:
+inputCSV = csv.reader(inputFile, quotechar=QUOTE_CHAR)
+header = next(inputCSV, [])
+columns = {fieldname: index for index, fieldname in enumerate(header)}
+attendeeColumns = [index for fieldname, index in columns.items() if ATTENDEES_N_EMAIL.match(fieldname)]
+primaryEmailColumn = columns['primaryEmail']
+calendarIdColumn = columns['calendarId']
+idColumn = columns['id']
+summaryColumn = columns.get('summary')
+matcher = BlockMatcher(attendeeColumns, checkAttendee)
+with instrument.phase('scan'):
+  for row, deleteAttendees in matcher.match(inputCSV, len(header)):
+    summary = row[summaryColumn] if summaryColumn is not None else ''
     if ALL_ATTENDEES_ONE_ROW:
-      outputCSV.writerow({'primaryEmail': row['primaryEmail'],
-                          'calendarId': row['calendarId'],
-                          'id': row['id'],
-                          'summary': row.get('summary', ''),
+      outputCSV.writerow({'primaryEmail': row[primaryEmailColumn],
+                          'calendarId': row[calendarIdColumn],
+                          'id': row[idColumn],
+                          'summary': summary,
                           'emails': ' '.join(deleteAttendees)})
     else:
       for attendee in deleteAttendees:
-        outputCSV.writerow({'primaryEmail': row['primaryEmail'],
-                            'calendarId': row['calendarId'],
-                            'id': row['id'],
-                            'summary': row.get('summary', ''),
+        outputCSV.writerow({'primaryEmail': row[primaryEmailColumn],
+                            'calendarId': row[calendarIdColumn],
+                            'id': row[idColumn],
+                            'summary': summary,
                             'emails': attendee})
 if inputFile != sys.stdin:
   inputFile.close()
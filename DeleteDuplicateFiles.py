@@ -18,6 +18,7 @@
 #                               select drivefilename "Folder Name" showmimetype not gfolder
 # 2: From that list of files, output a CSV file with the same headers as the input CSV file
 #    that lists the drive file Ids that have the same owner, title, mimeType and paths with a createdDate older than the most recent createdDate
+#    For very large inputs, set SORT_RUN_ROWS to bound the memory used or set ENGINE = 'hash'
 #  $ python3 DeleteDuplicateFiles.py ./UserFiles.csv ./DuplicateFiles.csv
 # 3: Inspect DuplicateFiles.csv, verify that it makes sense and then proceed
 # 4: Delete the duplicate files
@@ -25,13 +26,29 @@
 """
 
 import csv
+import hashlib
 import sys
 
+from gamlib import instrument, mmapcsv
+from gamlib.extsort import descending, sortRows
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 CREATED_DATE = 'createdTime'
 ALT_CREATED_DATE = 'createdDate'
 
+# Duplicate detection engine
+# 'sort' - Sort the files; the output is grouped by owner, title, mimeType and paths
+# 'hash' - Read the input file twice, keeping only the newest createdDate of each distinct file in memory;
+#          the output is in input order. Input from stdin or from a file that can't be read twice, e.g., a named pipe,
+#          is processed by the sort engine.
+ENGINE = 'sort'
+
+# Sort engine: number of rows sorted in memory at a time; larger inputs are sorted in runs that are written to
+# temporary files and merged, so memory use is bounded by this number rather than by the size of the input.
+# Set to 0 to sort the whole input in memory.
+SORT_RUN_ROWS = 500000
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
@@ -39,7 +56,20 @@ def rowPaths(crow):
   paths = set()
   for i in range(0, int(crow['paths'])):
     paths.add(crow[f'path.{i}'])
-  return paths
+  return tuple(sorted(paths))
+
+def rowCreatedDate(crow):
+  return crow.get(CREATED_DATE, crow.get(ALT_CREATED_DATE))
+
+def fileKey(crow):
+  return (crow['owners.0.emailAddress'], crow.get(FILE_NAME, crow.get(ALT_FILE_NAME)), crow['mimeType'], rowPaths(crow))
+
+def rowKey(crow):
+  """Files with the same owner, title, mimeType and paths are adjacent, most recently created first"""
+  return fileKey(crow)+(descending(rowCreatedDate(crow)),)
+
+def fileDigest(crow):
+  return hashlib.blake2b(repr(fileKey(crow)).encode('utf-8'), digest_size=16).digest()
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -50,30 +80,40 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-prevOwner = None
-prevTitle = None
-prevMimeType = None
-prevCreatedDate = None
-prevPaths = None
-
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
+inputCSV = mmapcsv.DictReader(inputFile, quotechar=QUOTE_CHAR)
 outputCSV = csv.DictWriter(outputFile, inputCSV.fieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-rows = sorted(inputCSV, key=lambda k: k.get(CREATED_DATE, k.get(ALT_CREATED_DATE)), reverse=True)
-for row in sorted(rows, key=lambda k: (k['owners.0.emailAddress'], k.get(FILE_NAME, k.get(ALT_FILE_NAME)), k['mimeType'], k['paths'])):
-  if ((row['owners.0.emailAddress'] == prevOwner)
-      and (row.get(FILE_NAME, row.get(ALT_FILE_NAME)) == prevTitle)
-      and (row['mimeType'] == prevMimeType)
-      and (row.get(CREATED_DATE, row.get(ALT_CREATED_DATE)) < prevCreatedDate)
-      and (rowPaths(row) == prevPaths)):
-    outputCSV.writerow(row)
-  else:
-    prevOwner = row['owners.0.emailAddress']
-    prevTitle = row.get(FILE_NAME, row.get(ALT_FILE_NAME))
-    prevMimeType = row['mimeType']
-    prevCreatedDate = row.get(CREATED_DATE, row.get(ALT_CREATED_DATE))
-    prevPaths = rowPaths(row)
+engine = ENGINE
+if engine == 'hash' and (inputFile == sys.stdin or not inputFile.seekable()):
+  if inputFile != sys.stdin:
+    sys.stderr.write(f'Note: {sys.argv[1]} can not be read twice, processing it with the sort engine\n')
+  engine = 'sort'
+if engine == 'hash':
+  newestCreatedDates = {}
+  with instrument.phase('scan'):
+    for row in inputCSV:
+      digest = fileDigest(row)
+      createdDate = rowCreatedDate(row)
+      if createdDate > newestCreatedDates.get(digest, ''):
+        newestCreatedDates[digest] = createdDate
+  inputFile.seek(0)
+  with instrument.phase('write'):
+    for row in mmapcsv.DictReader(inputFile, quotechar=QUOTE_CHAR):
+      if rowCreatedDate(row) < newestCreatedDates.get(fileDigest(row), ''):
+        outputCSV.writerow(row)
+else:
+  prevFile = None
+  prevCreatedDate = None
+  with instrument.phase('scan'):
+    for row in sortRows(inputCSV, rowKey, inputCSV.fieldnames, SORT_RUN_ROWS):
+      key = fileKey(row)
+      createdDate = rowCreatedDate(row)
+      if key == prevFile and createdDate < prevCreatedDate:
+        outputCSV.writerow(row)
+      else:
+        prevFile = key
+        prevCreatedDate = createdDate
 if inputFile != sys.stdin:
   inputFile.close()
 if outputFile != sys.stdout:
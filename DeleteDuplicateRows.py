@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 """
 # Purpose: For a CSV file, delete the duplcate rows based an a field. You can optionally delete unwanted fields.
-# Customize: Set ID_FIELD, DELETE_FIELDS, LINE_TERMINATOR
+# Note: With OUTPUT_ORDER = 'sorted', rows are sorted in runs of SORT_RUN_ROWS rows on disk, so memory use does not grow with the file.
+#       With OUTPUT_ORDER = 'input', rows are streamed and only the IDs seen so far are held in memory;
+#       after SEEN_IDS_LIMIT IDs, the remaining rows are deduplicated by sorting them on disk.
+# Customize: Set ID_FIELD, DELETE_FIELDS, OUTPUT_ORDER, LINE_TERMINATOR
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -14,12 +17,58 @@
 import csv
 import sys
 
+from gamlib import instrument
+from gamlib.extsort import firstRows, sortRows
+
 ID_FIELD = 'id' # Field name to use for duplicate checking
 DELETE_FIELDS = [] # Fields to delete; Single field ['Field',]; multiple fields ['Field1', 'Field2', ...]
+# Order of the output rows
+# 'sorted' - Sorted by ID_FIELD
+# 'input' - In input order; the first row of each ID is kept
+OUTPUT_ORDER = 'sorted'
+# Number of rows sorted in memory at a time; larger files are sorted in runs that are written to temporary files and merged
+SORT_RUN_ROWS = 500000
+# 'input' order: number of IDs held in memory; the rows after that are deduplicated on disk, 0 for no limit
+SEEN_IDS_LIMIT = 5000000
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
+ROW_NUMBER_FIELD = '__rowNumber'
+
+def rowId(row):
+  return row[ID_FIELD]
+
+def rowNumber(row):
+  return int(row[ROW_NUMBER_FIELD])
+
+def numberRows(rows):
+  for rowNumber, row in enumerate(rows):
+    row[ROW_NUMBER_FIELD] = rowNumber
+    yield row
+
+def firstRowsInInputOrder(rows, fieldnames):
+  """Yield the first row of each ID in input order; only the IDs are held in memory until there are SEEN_IDS_LIMIT of them"""
+  seenIds = set()
+  rows = iter(rows)
+  for row in rows:
+    currentId = row[ID_FIELD]
+    if currentId not in seenIds:
+      seenIds.add(currentId)
+      yield row
+      if SEEN_IDS_LIMIT and len(seenIds) >= SEEN_IDS_LIMIT:
+        break
+  else:
+    return
+  # Too many IDs to hold: number the remaining unseen rows, keep the first row of each ID by sorting by ID and row number
+  # and restore input order by sorting by row number
+  numberedRows = numberRows(row for row in rows if row[ID_FIELD] not in seenIds)
+  numberedFieldnames = fieldnames+[ROW_NUMBER_FIELD]
+  idRows = firstRows(sortRows(numberedRows, lambda row: (row[ID_FIELD], rowNumber(row)), numberedFieldnames, SORT_RUN_ROWS), rowId)
+  for row in sortRows((row for _, row in idRows), rowNumber, numberedFieldnames, SORT_RUN_ROWS):
+    row.pop(ROW_NUMBER_FIELD)
+    yield row
+
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -39,14 +88,15 @@ for field in DELETE_FIELDS:
 outputCSV = csv.DictWriter(outputFile, outputFieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-previousId = None
-for row in sorted(inputCSV, key=lambda row: (row[ID_FIELD]), reverse=False):
-  currentId = row[ID_FIELD]
-  if currentId != previousId:
+if OUTPUT_ORDER == 'input':
+  rows = firstRowsInInputOrder(inputCSV, inputCSV.fieldnames)
+else:
+  rows = (row for _, row in firstRows(sortRows(inputCSV, rowId, inputCSV.fieldnames, SORT_RUN_ROWS), rowId))
+with instrument.phase('scan'):
+  for row in rows:
     for field in deleteFieldnames:
       row.pop(field, None)
     outputCSV.writerow(row)
-    previousId = currentId
 
 if inputFile != sys.stdin:
   inputFile.close()
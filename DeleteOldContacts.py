@@ -4,6 +4,7 @@
 # Note: This script can use GAM7 or Advanced GAM:
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
+# Note: Each distinct email address is checked against OldContacts once, see gamlib/batchmatch.py
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or  python3 -V
 #  Python 3.x.y
@@ -25,6 +26,9 @@ import csv
 import re
 import sys
 
+from gamlib import instrument
+from gamlib.batchmatch import BlockMatcher
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
@@ -49,13 +53,20 @@ else:
 outputCSV = csv.DictWriter(outputFile, ['User','ContactID','Name','Email'], lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = EMAILS_N_ADDRESS.match(k)
-    if mg and v.lower() in OldContacts:
-      outputCSV.writerow({'User': row['User'],
-                          'ContactID': row['ContactID'],
-                          'Name': row['Name'],
+inputCSV = csv.reader(inputFile, quotechar=QUOTE_CHAR)
+header = next(inputCSV, [])
+columns = {fieldname: index for index, fieldname in enumerate(header)}
+emailColumns = [index for fieldname, index in columns.items() if EMAILS_N_ADDRESS.match(fieldname)]
+userColumn = columns['User']
+contactIdColumn = columns['ContactID']
+nameColumn = columns['Name']
+matcher = BlockMatcher(emailColumns, lambda address: address.lower() in OldContacts)
+with instrument.phase('scan'):
+  for row, addresses in matcher.match(inputCSV, len(header)):
+    for v in addresses:
+      outputCSV.writerow({'User': row[userColumn],
+                          'ContactID': row[contactIdColumn],
+                          'Name': row[nameColumn],
                           'Email': v})
 
 if inputFile != sys.stdin:
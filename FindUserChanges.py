@@ -16,6 +16,10 @@
 # If your SMS outputs a unique ID for each user, the script can detect email address changes,
 # otherwise an email address change will be processed as an add and a delete/suspend which is probably
 # not what you want.
+# A snapshot of CurrUsers.csv, the hashes of each user's fields and the location of each user in the file, is saved in Users.snapshot;
+# the next run reads it in place of PrevUsers.csv and reads from PrevUsers.csv only the users that were deleted or changed.
+# The snapshot is used while PrevUsers.csv has the size and modification time of the CurrUsers.csv it was made from,
+# so rename CurrUsers.csv rather than copy it; otherwise PrevUsers.csv is read in full, as on the first run.
 #
 # 1: Rename CurrUsers.csv to PrevUsers.csv
 # 2: Export current data from SMS to CurrUsers.csv
@@ -37,6 +41,9 @@
 
 import csv
 
+from gamlib import instrument, mmapcsv
+from gamlib.snapshot import UserSnapshot, loadOrBuild
+
 # These are the field names in the SMS CSV files; change as required
 # If you don't have a unique ID field, set UID_FIELD to the same value as EMAIL_FIELD
 UID_FIELD = 'id'
@@ -57,65 +64,92 @@ CURRUSERS_FILENAME = "CurrUsers.csv"
 ADDUSERS_FILENAME = "AddUsers.csv"
 DELETETUSERS_FILENAME = "DeleteUsers.csv"
 UPDATEUSERS_FILENAME = "UpdateUsers.csv"
+SNAPSHOT_FILENAME = "Users.snapshot"
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-prevStudentsSet = set()
-prevStudents = {}
+def sortedRows(rows):
+  return sorted(rows, key=lambda row: row[UID_FIELD])
+
 prevFile = open(PREVUSERS_FILENAME, 'r', encoding='utf-8')
-prevCSV = csv.DictReader(prevFile, quotechar=QUOTE_CHAR)
+prevCSV = mmapcsv.MappedDictReader(prevFile, quotechar=QUOTE_CHAR)
 delFieldnames = prevCSV.fieldnames[:]
-for row in prevCSV:
-  uid = row[UID_FIELD]
-  prevStudentsSet.add(uid)
-  prevStudents[uid] = row
-prevFile.close()
-
-currStudentsSet = set()
-currStudents = {}
 currFile = open(CURRUSERS_FILENAME, 'r', encoding='utf-8')
-currCSV = csv.DictReader(currFile, quotechar=QUOTE_CHAR)
+currCSV = mmapcsv.MappedDictReader(currFile, quotechar=QUOTE_CHAR)
 addFieldnames = currCSV.fieldnames[:]
-for row in currCSV:
-  uid = row[UID_FIELD]
-  currStudentsSet.add(uid)
-  currStudents[uid] = row
-currFile.close()
 
-addSet = currStudentsSet-prevStudentsSet
+snapshotSettings = {'quoteChar': QUOTE_CHAR, 'uidField': UID_FIELD, 'fields': [EMAIL_FIELD]+MATCH_FIELDS}
+prevSnapshot = loadOrBuild(SNAPSHOT_FILENAME, prevCSV, PREVUSERS_FILENAME, UID_FIELD, snapshotSettings['fields'], snapshotSettings)
+currSnapshot = UserSnapshot.fromCSV(currCSV, UID_FIELD, snapshotSettings['fields'])
+
+# Merge the snapshots by ID hash; the rows are only read when the hashes of a user differ
+addRows = []
+delRows = []
+updRows = []
+prevRuns = prevSnapshot.runs()
+currRuns = currSnapshot.runs()
+prevRun = next(prevRuns, None)
+currRun = next(currRuns, None)
+with instrument.phase('scan'):
+  while prevRun or currRun:
+    if currRun is None or (prevRun and prevRun[0] < currRun[0]):
+      delRows.extend(prevSnapshot.row(prevCSV, i) for i in range(prevRun[1], prevRun[2]))
+      prevRun = next(prevRuns, None)
+      continue
+    if prevRun is None or currRun[0] < prevRun[0]:
+      addRows.extend(currSnapshot.row(currCSV, i) for i in range(currRun[1], currRun[2]))
+      currRun = next(currRuns, None)
+      continue
+    _, p, pEnd = prevRun
+    _, c, cEnd = currRun
+    if pEnd-p != 1 or cEnd-c != 1 or prevSnapshot.digests[p] != currSnapshot.digests[c]:
+      prevStudents = {row[UID_FIELD]: row for row in (prevSnapshot.row(prevCSV, i) for i in range(p, pEnd))}
+      currStudents = {row[UID_FIELD]: row for row in (currSnapshot.row(currCSV, i) for i in range(c, cEnd))}
+      for uid, row in currStudents.items():
+        if uid in prevStudents:
+          updRows.append((prevStudents[uid], row))
+        else:
+          addRows.append(row)
+      delRows.extend(row for uid, row in prevStudents.items() if uid not in currStudents)
+    prevRun = next(prevRuns, None)
+    currRun = next(currRuns, None)
+
 addFile = open(ADDUSERS_FILENAME, 'w', encoding='utf-8', newline='')
 addCSV = csv.DictWriter(addFile, addFieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 addCSV.writeheader()
-for uid in sorted(addSet):
-  addCSV.writerow(currStudents[uid])
+with instrument.phase('write'):
+  for row in sortedRows(addRows):
+    addCSV.writerow(row)
 addFile.close()
 
-delSet = prevStudentsSet-currStudentsSet
 delFile = open(DELETETUSERS_FILENAME, 'w', encoding='utf-8', newline='')
 delCSV = csv.DictWriter(delFile, delFieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 delCSV.writeheader()
-for uid in sorted(delSet):
-  delCSV.writerow(prevStudents[uid])
+with instrument.phase('write'):
+  for row in sortedRows(delRows):
+    delCSV.writerow(row)
 delFile.close()
 
-updSet = prevStudentsSet & currStudentsSet
 updFieldnames = addFieldnames[:]
 updFieldnames.append(NEW_EMAIL_FIELD)
 updFile = open(UPDATEUSERS_FILENAME, 'w', encoding='utf-8', newline='')
 updCSV = csv.DictWriter(updFile, updFieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 updCSV.writeheader()
-for uid in sorted(updSet):
-  prevStudent = prevStudents[uid]
-  currStudent = currStudents[uid]
-  if prevStudent[EMAIL_FIELD] != currStudent[EMAIL_FIELD]:
-    currStudent[NEW_EMAIL_FIELD] = currStudent[EMAIL_FIELD]
-    currStudent[EMAIL_FIELD] = prevStudent[EMAIL_FIELD]
-    updCSV.writerow(currStudent)
-    continue
-  for field in MATCH_FIELDS:
-    if prevStudent[field] != currStudent[field]:
-      currStudent[NEW_EMAIL_FIELD] = ''
+with instrument.phase('write'):
+  for prevStudent, currStudent in sorted(updRows, key=lambda rows: rows[1][UID_FIELD]):
+    if prevStudent[EMAIL_FIELD] != currStudent[EMAIL_FIELD]:
+      currStudent[NEW_EMAIL_FIELD] = currStudent[EMAIL_FIELD]
+      currStudent[EMAIL_FIELD] = prevStudent[EMAIL_FIELD]
       updCSV.writerow(currStudent)
-      break
+      continue
+    for field in MATCH_FIELDS:
+      if prevStudent[field] != currStudent[field]:
+        currStudent[NEW_EMAIL_FIELD] = ''
+        updCSV.writerow(currStudent)
+        break
 updFile.close()
+
+currSnapshot.save(SNAPSHOT_FILENAME, CURRUSERS_FILENAME, snapshotSettings)
+prevFile.close()
+currFile.close()
@@ -19,48 +19,44 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
   outputFile = sys.stdout
-outputCSV = csv.DictWriter(outputFile,
-                           ['Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
-                            'permissionId', 'role', 'type', 'allowFileDiscovery', 'domain'],
-                           lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(['Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
+                    'permissionId', 'role', 'type', 'allowFileDiscovery', 'domain'])
 
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v in {'anyone', 'domain'}:
-      permissions_N = mg.group(1)
-      allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery', str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-      if allowFileDiscovery == 'True':
-        outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'type': row[f'permissions.{permissions_N}.type'],
-                            'domain': row.get(f'permissions.{permissions_N}.domain', ''),
-                            'allowFileDiscovery': allowFileDiscovery})
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getOwner = layout.getter('owners.0.emailAddress')
+getFileId = layout.getter('id')
+getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = layout.getter('mimeType')
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v in {'anyone', 'domain'}:
+        allowFileDiscovery = slot.getAllowFileDiscovery(row)
+        if allowFileDiscovery == 'True':
+          outputCSV.writerow([getOwner(row), getFileId(row), getFileName(row), getMimeType(row),
+                              f'id:{row[slot.id]}', row[slot.role], v, allowFileDiscovery, slot.get(row, 'domain')])
 
 if inputFile != sys.stdin:
   inputFile.close()
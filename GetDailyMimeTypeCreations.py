@@ -16,50 +16,80 @@
 #  $ python3 GetDailyMimeTypeCreations.py filelist.csv mimetypecreations.csv
 """
 
+import collections
 import csv
 import sys
 
+from gamlib import instrument
+from gamlib.projection import ProjectedReader
+
 # Set REVERSE = True for createdTime newest to oldest
 # Set REVERSE = False for createdTime oldest to newest
 REVERSE = True
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
+CODE_BITS = 24
+CODE_MASK = (1 << CODE_BITS)-1
+COUNT_BITS = 40
+COUNT_MASK = (1 << COUNT_BITS)-1
+
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
 
-userDailyMimeTypeCounts = {}
-mimeTypesSet = set()
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  owner = row['Owner']
-  createdDate, createdTime = row['createdTime'].split('T')
-  mimeType = row['mimeType']
-  mimeTypesSet.add(mimeType)
-  userDailyMimeTypeCounts.setdefault(owner, {})
-  userDailyMimeTypeCounts[owner].setdefault(createdDate, {})
-  userDailyMimeTypeCounts[owner][createdDate].setdefault(mimeType, 0)
-  userDailyMimeTypeCounts[owner][createdDate][mimeType] += 1
+# Counts are kept in one Counter keyed by the owner, createdTime date and mimeType codes packed into an integer
+ownerCodes = {}
+createdDateCodes = {}
+mimeTypeCodes = {}
+cellCounts = collections.Counter()
+with instrument.phase('scan'):
+  for owner, createdTime, mimeType in ProjectedReader(inputFile, QUOTE_CHAR).rows('Owner', 'createdTime', 'mimeType'):
+    createdDate, createdTime = createdTime.split('T')
+    ownerCode = ownerCodes.setdefault(owner, len(ownerCodes))
+    createdDateCode = createdDateCodes.setdefault(createdDate, len(createdDateCodes))
+    mimeTypeCode = mimeTypeCodes.setdefault(mimeType, len(mimeTypeCodes))
+    cellCounts[(ownerCode << CODE_BITS | createdDateCode) << CODE_BITS | mimeTypeCode] += 1
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
   outputFile = sys.stdout
-outputFieldNames = ['Owner', 'createdTime']
-outputFieldNames.extend(sorted(mimeTypesSet))
-outputCSV = csv.DictWriter(outputFile, outputFieldNames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
+owners = sorted(ownerCodes)
+createdDates = sorted(createdDateCodes, reverse=REVERSE)
+mimeTypes = sorted(mimeTypeCodes)
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(['Owner', 'createdTime']+mimeTypes)
+
+# Renumber the codes in output order so that one sort of the cells gives the rows and columns in order
+ownerRanks = [0]*len(owners)
+for rank, owner in enumerate(owners):
+  ownerRanks[ownerCodes[owner]] = rank
+createdDateRanks = [0]*len(createdDates)
+for rank, createdDate in enumerate(createdDates):
+  createdDateRanks[createdDateCodes[createdDate]] = rank
+mimeTypeRanks = [0]*len(mimeTypes)
+for rank, mimeType in enumerate(mimeTypes):
+  mimeTypeRanks[mimeTypeCodes[mimeType]] = rank
+ownerCodes = createdDateCodes = mimeTypeCodes = None
+cells = sorted(((ownerRanks[key >> 2*CODE_BITS]*len(createdDates)+createdDateRanks[(key >> CODE_BITS) & CODE_MASK])*len(mimeTypes)+
+                mimeTypeRanks[key & CODE_MASK] << COUNT_BITS | count for key, count in cellCounts.items()))
+cellCounts.clear()
 
-for owner, createdTimes in sorted(userDailyMimeTypeCounts.items()):
-  for createdTime, mimeTypes in sorted(createdTimes.items(), reverse=REVERSE):
-    row = {'Owner': owner, 'createdTime': createdTime}
-    for mimeType, count in sorted(mimeTypes.items()):
-      row[mimeType] = count
-    for mimeType in mimeTypesSet:
-      if mimeType not in row:
-        row[mimeType] = 0
-    outputCSV.writerow(row)
+counts = None
+currentRow = None
+with instrument.phase('write'):
+  for cell in cells:
+    row, mimeTypeRank = divmod(cell >> COUNT_BITS, len(mimeTypes))
+    if row != currentRow:
+      if counts is not None:
+        outputCSV.writerow([owners[currentRow // len(createdDates)], createdDates[currentRow % len(createdDates)]]+counts)
+      counts = [0]*len(mimeTypes)
+      currentRow = row
+    counts[mimeTypeRank] = cell & COUNT_MASK
+  if counts is not None:
+    outputCSV.writerow([owners[currentRow // len(createdDates)], createdDates[currentRow % len(createdDates)]]+counts)
 
 if inputFile != sys.stdin:
   inputFile.close()
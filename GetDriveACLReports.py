@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+# Purpose: For a Google Drive User(s), produce several Drive ACL reports from a single pass over one filelistperms.csv
+#          Each report writes the same CSV file as the script it replaces:
+#          NonDomainDriveACLs - GetNonDomainDriveACLs.py
+#          SharedWithAnyoneDriveACLs - GetSharedWithAnyoneDriveACLs.py
+#          LinkSharedDriveACLs - GetLinkSharedDriveACLs.py
+#          AllowFileDiscoveryDriveACLs - GetAllowFileDiscoveryDriveACLs.py
+#          SharedWithDomainDriveACLs - GetSharedWithDomainDriveACLs.py
+#          UserShareCounts - GetUserShareCounts.py
+# Note: This script can use GAM7 or Advanced GAM:
+#       https://github.com/GAM-team/GAM
+#	https://github.com/taers232c/GAMADV-XTD3
+# Customize: Set REPORTS; remove the reports you don't want, set the settings of the others
+#          as you would in the individual scripts, e.g., DOMAIN_LIST becomes domainList
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+# 1: Get ACLs for all files, if you don't want all users, replace all users with your user selection in the command below
+#  $ gam config auto_batch_min 1 redirect csv ./filelistperms.csv multiprocess all users print filelist fields id,name,permissions,owners.emailaddress,mimetype,resourcekey,weblink
+# 2: Produce all of the reports in REPORTS, they are written to the current directory or to OutputDirectory if specified
+#  $ python3 GetDriveACLReports.py filelistperms.csv [OutputDirectory]
+"""
+
+import sys
+
+from gamlib.aclreports import (AllowFileDiscoveryDriveACLs, LinkSharedDriveACLs, NonDomainDriveACLs,
+                               SharedWithAnyoneDriveACLs, SharedWithDomainDriveACLs, UserShareCounts, runReports)
+
+# Define your domain(s) in the list below,
+# e.g., DOMAIN_LIST = ['domain.com'] DOMAIN_LIST = ['domain1.com', 'domain2.com']
+DOMAIN_LIST = ['compass-health.ai']
+
+REPORTS = [
+  NonDomainDriveACLs('NonDomainDriveACLs.csv', domainList=DOMAIN_LIST, domainExpressions=[],
+                     exclusiveDomains=True, includeAnyone=True),
+  SharedWithAnyoneDriveACLs('SharedWithAnyoneDriveACLs.csv', desiredAllowFileDiscovery='Any'),
+  LinkSharedDriveACLs('LinkSharedDriveACLs.csv'),
+  AllowFileDiscoveryDriveACLs('AllowFileDiscoveryDriveACLs.csv'),
+  SharedWithDomainDriveACLs('SharedWithDomainDriveACLs.csv', domainList=[], desiredAllowFileDiscovery='Any'),
+  UserShareCounts('UserShareCounts.csv', domainList=DOMAIN_LIST, linkField='allowFileDiscovery', linkValue='False'),
+  ]
+
+QUOTE_CHAR = '"' # Adjust as needed
+LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
+
+if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
+  inputFile = open(sys.argv[1], 'r', encoding='utf-8')
+else:
+  inputFile = sys.stdin
+outputDir = sys.argv[2] if len(sys.argv) > 2 else '.'
+
+runReports(inputFile, REPORTS, outputDir, QUOTE_CHAR, LINE_TERMINATOR)
+
+if inputFile != sys.stdin:
+  inputFile.close()
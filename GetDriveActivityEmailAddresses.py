@@ -4,6 +4,7 @@
 # Note: This script can use GAM7 or Advanced GAM:
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
+#       The rows of DriveSettings.csv are indexed by permissionId in DriveSettings.csv.permissionId.lookup, which is reused until DriveSettings.csv changes.
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -19,17 +20,16 @@
 import csv
 import sys
 
+from gamlib import instrument
+from gamlib.lookupstore import openLookupStore
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
 USER_PERMISSIONID = 'user.permissionId'
 USER_EMAILADDRESS = 'user.emailAddress'
 
-permissionIdEmailMap = {}
-inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  permissionIdEmailMap[row['permissionId']] = row['email']
-inputFile.close()
+users = openLookupStore(sys.argv[1], 'permissionId', QUOTE_CHAR)
 
 inputFile = open(sys.argv[2], 'r', encoding='utf-8')
 inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
@@ -40,12 +40,11 @@ outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
 outputCSV = csv.DictWriter(outputFile, fieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-for row in inputCSV:
-  permissionId = row[USER_PERMISSIONID]
-  if permissionId not in permissionIdEmailMap:
-    permissionIdEmailMap[permissionId] = 'Unknown'
-  row[USER_EMAILADDRESS] = permissionIdEmailMap[permissionId]
-  outputCSV.writerow(row)
+with instrument.phase('scan'):
+  for row in inputCSV:
+    user = users.get(row[USER_PERMISSIONID])
+    row[USER_EMAILADDRESS] = user['email'] if user is not None else 'Unknown'
+    outputCSV.writerow(row)
 
 inputFile.close()
 outputFile.close()
@@ -24,9 +24,11 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 # Substitute your domain(s) in the list below, e.g., DOMAIN_LIST = ['domain.com',] DOMAIN_LIST = ['domain1.com', 'domain2.com',]
 DOMAIN_LIST = ['domain.com']
 # Indicate whether the list is exclusive or inclusive
@@ -46,7 +48,7 @@ LINK_VALUE = 'False'
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+domainSet = frozenset(DOMAIN_LIST)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -65,59 +67,61 @@ domainShareCounts = {}
 domainWithLinkShareCounts = {}
 groupShareCounts = {}
 userShareCounts = {}
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if row[f'permissions.{permissions_N}.role'] == 'owner':
-        continue
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-        continue
-      if v == 'anyone':
-        if not INCLUDE_ANYONE:
-          continue
-        if row[f'permissions.{permissions_N}.{LINK_FIELD}'] == LINK_VALUE:
-          anyoneWithLinkShareCount += 1
-        else:
-          anyoneShareCount += 1
-      elif v == 'domain':
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-        if ((EXCLUSIVE_DOMAINS and domain in DOMAIN_LIST) or
-            (not EXCLUSIVE_DOMAINS and domain not in DOMAIN_LIST)):
-          continue
-        if row[f'permissions.{permissions_N}.{LINK_FIELD}'] == LINK_VALUE:
-          domainWithLinkShareCounts.setdefault(domain, 0)
-          domainWithLinkShareCounts[domain] += 1
-        else:
-          domainShareCounts.setdefault(domain, 0)
-          domainShareCounts[domain] += 1
-      else: # group, user
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v:
+        if row[slot.role] == 'owner':
           continue
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = row.get(f'permissions.{permissions_N}.domain', '').lower()
-        if not domain:
-          domain = emailAddress[emailAddress.find('@')+1:]
-        if ((EXCLUSIVE_DOMAINS and domain in DOMAIN_LIST) or
-            (not EXCLUSIVE_DOMAINS and domain not in DOMAIN_LIST)):
+        if slot.isDeleted(row):
           continue
-        if v == 'group':
-          groupShareCounts.setdefault(emailAddress, 0)
-          groupShareCounts[emailAddress] += 1
-        else:
-          userShareCounts.setdefault(emailAddress, 0)
-          userShareCounts[emailAddress] += 1
-outputCSV.writerow({'Type': 'anyone', 'Count': anyoneShareCount})
-outputCSV.writerow({'Type': 'anyoneWithLink', 'Count': anyoneWithLinkShareCount})
-for externalShare, count in sorted(iter(domainShareCounts.items())):
-  outputCSV.writerow({'Type': 'domain', 'ExternalShare': externalShare, 'Count': count})
-for externalShare, count in sorted(iter(domainWithLinkShareCounts.items())):
-  outputCSV.writerow({'Type': 'domainWithLink', 'ExternalShare': externalShare, 'Count': count})
-for externalShare, count in sorted(iter(groupShareCounts.items())):
-  outputCSV.writerow({'Type': 'group', 'ExternalShare': externalShare, 'Count': count})
-for externalShare, count in sorted(iter(userShareCounts.items())):
-  outputCSV.writerow({'Type': 'user', 'ExternalShare': externalShare, 'Count': count})
+        if v == 'anyone':
+          if not INCLUDE_ANYONE:
+            continue
+          if row[slot.fields[LINK_FIELD]] == LINK_VALUE:
+            anyoneWithLinkShareCount += 1
+          else:
+            anyoneShareCount += 1
+        elif v == 'domain':
+          domain = row[slot.domain].lower()
+          if ((EXCLUSIVE_DOMAINS and domain in domainSet) or
+              (not EXCLUSIVE_DOMAINS and domain not in domainSet)):
+            continue
+          if row[slot.fields[LINK_FIELD]] == LINK_VALUE:
+            domainWithLinkShareCounts.setdefault(domain, 0)
+            domainWithLinkShareCounts[domain] += 1
+          else:
+            domainShareCounts.setdefault(domain, 0)
+            domainShareCounts[domain] += 1
+        else: # group, user
+          if slot.isDeleted(row):
+            continue
+          emailAddress = row[slot.emailAddress].lower()
+          domain = slot.get(row, 'domain').lower()
+          if not domain:
+            domain = emailAddress[emailAddress.find('@')+1:]
+          if ((EXCLUSIVE_DOMAINS and domain in domainSet) or
+              (not EXCLUSIVE_DOMAINS and domain not in domainSet)):
+            continue
+          if v == 'group':
+            groupShareCounts.setdefault(emailAddress, 0)
+            groupShareCounts[emailAddress] += 1
+          else:
+            userShareCounts.setdefault(emailAddress, 0)
+            userShareCounts[emailAddress] += 1
+with instrument.phase('write'):
+  outputCSV.writerow({'Type': 'anyone', 'Count': anyoneShareCount})
+  outputCSV.writerow({'Type': 'anyoneWithLink', 'Count': anyoneWithLinkShareCount})
+  for externalShare, count in sorted(iter(domainShareCounts.items())):
+    outputCSV.writerow({'Type': 'domain', 'ExternalShare': externalShare, 'Count': count})
+  for externalShare, count in sorted(iter(domainWithLinkShareCounts.items())):
+    outputCSV.writerow({'Type': 'domainWithLink', 'ExternalShare': externalShare, 'Count': count})
+  for externalShare, count in sorted(iter(groupShareCounts.items())):
+    outputCSV.writerow({'Type': 'group', 'ExternalShare': externalShare, 'Count': count})
+  for externalShare, count in sorted(iter(userShareCounts.items())):
+    outputCSV.writerow({'Type': 'user', 'ExternalShare': externalShare, 'Count': count})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -21,24 +21,24 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-inputFieldNames = inputCSV.fieldnames
-pathFieldNames = [field for field in inputFieldNames if field.startswith('path')]
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+pathFieldNames = [field for field in layout.fieldnames if field.startswith('path')]
+pathColumns = [layout.index(field) for field in pathFieldNames]
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -46,45 +46,34 @@ else:
   outputFile = sys.stdout
 outputFieldNames = ['User', 'Owner', 'driveFileId', 'driveFileTitle', 'mimeType', 'permissionId',
                     'role', 'type', 'emailAddress', 'domain', 'allowFileDiscovery']+pathFieldNames
-outputCSV = csv.DictWriter(outputFile, outputFieldNames,
-                           lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(outputFieldNames)
 
-for row in inputCSV:
-  prow = {}
-  for field in pathFieldNames:
-    prow[field] = row[field]
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v in ['user', 'group']:
-        allowFileDiscovery = ''
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-      elif v == 'domain':
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                                     str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-        emailAddress = ''
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-      else: #anyone
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                                     str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-        emailAddress = ''
-        domain = ''
-      orow = {'User': row['Owner'],
-              'Owner': row['owners.0.emailAddress'],
-              'driveFileId': row['id'],
-              'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-              'mimeType': row.get('mimeType', ''),
-              'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-              'role': row[f'permissions.{permissions_N}.role'],
-              'type': v,
-              'emailAddress': emailAddress,
-              'domain': domain,
-              'allowFileDiscovery': allowFileDiscovery}
-      orow.update(prow)
-      outputCSV.writerow(orow)
+getUser = layout.getter('Owner')
+getOwner = layout.getter('owners.0.emailAddress')
+getFileId = layout.getter('id')
+getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = layout.getter('mimeType')
+with instrument.phase('scan'):
+  for row in rows:
+    prow = [row[i] for i in pathColumns]
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v:
+        if v in ['user', 'group']:
+          allowFileDiscovery = ''
+          emailAddress = row[slot.emailAddress].lower()
+          domain = emailAddress[emailAddress.find('@')+1:]
+        elif v == 'domain':
+          allowFileDiscovery = slot.getAllowFileDiscovery(row)
+          emailAddress = ''
+          domain = row[slot.domain].lower()
+        else: #anyone
+          allowFileDiscovery = slot.getAllowFileDiscovery(row)
+          emailAddress = ''
+          domain = ''
+        outputCSV.writerow([getUser(row), getOwner(row), getFileId(row), getFileName(row), getMimeType(row),
+                            f'id:{row[slot.id]}', row[slot.role], v, emailAddress, domain, allowFileDiscovery]+prow)
 
 if inputFile != sys.stdin:
   inputFile.close()
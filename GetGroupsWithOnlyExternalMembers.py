@@ -29,6 +29,8 @@ DOMAIN_LIST = ['domain.com',]
 # True - show one group/all external domains per line
 AGGREGATE_DOMAINS = True
 
+domainSet = frozenset(DOMAIN_LIST)
+
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -54,7 +56,7 @@ for row in inputCSV:
       domain = emailAddress[atLoc+1:]
     else:
       domain = 'unknown'
-    if domain not in DOMAIN_LIST:
+    if domain not in domainSet:
       Groups.setdefault(group, {})
       Groups[group].setdefault(domain, 0)
       Groups[group][domain] += 1
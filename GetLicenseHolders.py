@@ -4,6 +4,7 @@
 # Note: This script can use GAM7 or Advanced GAM:
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
+#       The rows of Licenses.csv are indexed by userId in Licenses.csv.userId.lookup, which is reused until Licenses.csv changes.
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -24,18 +25,14 @@
 import csv
 import sys
 
+from gamlib import instrument
+from gamlib.lookupstore import openLookupStore
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-licenses = {}
-inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-licenseFieldNames = inputCSV.fieldnames
-for row in inputCSV:
-  user = row['userId']
-  licenses.setdefault(user, [])
-  licenses[user].append(row)
-inputFile.close()
+licenses = openLookupStore(sys.argv[1], 'userId', QUOTE_CHAR)
+licenseFieldNames = licenses.fieldnames
 
 if sys.argv[2] != '-':
   inputFile = open(sys.argv[2], 'r', encoding='utf-8')
@@ -50,9 +47,10 @@ else:
 outputCSV = csv.DictWriter(outputFile, licenseFieldNames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-for row in inputCSV:
-  for userLicense in licenses.get(row['primaryEmail'], []):
-    outputCSV.writerow(userLicense)
+with instrument.phase('scan'):
+  for row in inputCSV:
+    for userLicense in licenses.getAll(row['primaryEmail']):
+      outputCSV.writerow(userLicense)
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -45,9 +45,11 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
@@ -57,8 +59,6 @@ NON_INHERITED_ACLS_ONLY = True
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
   outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
 else:
@@ -82,28 +82,38 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v in {'anyone', 'domain'}:
-      permissions_N = mg.group(1)
-      if NON_INHERITED_ACLS_ONLY and str(row.get(f'permissions.{permissions_N}.permissionDetails.0.inherited', False)) == 'True':
-        continue
-      allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery', str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-      if allowFileDiscovery == 'False':
-        outputCSV.writerow({'Owner': row['Owner'],
-                            'teamDriveId': row['driveId'],
-                            'teamDriveName': teamDriveNames.get(row['driveId'], row['driveId']),
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'allowFileDiscovery': allowFileDiscovery,
-                            'linkShareMetadata.securityUpdateEligible': row.get('linkShareMetadata.securityUpdateEligible', ''),
-                            'linkShareMetadata.securityUpdateEnabled': row.get('linkShareMetadata.securityUpdateEnabled', ''),
-                            'resourceKey': row.get('resourceKey', ''),
-                            'webViewLink': row.get('webViewLink', '')})
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getUser = layout.getter('Owner')
+getDriveId = layout.getter('driveId')
+getFileId = layout.getter('id')
+getMimeType = layout.getter('mimeType')
+getLinkShareMetadataSecurityUpdateEligible = layout.getter('linkShareMetadata.securityUpdateEligible')
+getLinkShareMetadataSecurityUpdateEnabled = layout.getter('linkShareMetadata.securityUpdateEnabled')
+getResourceKey = layout.getter('resourceKey')
+getWebViewLink = layout.getter('webViewLink')
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v in {'anyone', 'domain'}:
+        if NON_INHERITED_ACLS_ONLY and slot.get(row, 'permissionDetails.0.inherited') == 'True':
+          continue
+        allowFileDiscovery = slot.getAllowFileDiscovery(row)
+        if allowFileDiscovery == 'False':
+          outputCSV.writerow({'Owner': getUser(row),
+                              'teamDriveId': getDriveId(row),
+                              'teamDriveName': teamDriveNames.get(getDriveId(row), getDriveId(row)),
+                              'driveFileId': getFileId(row),
+                              'driveFileTitle': getFileName(row),
+                              'mimeType': getMimeType(row),
+                              'permissionId': f'id:{row[slot.id]}',
+                              'role': row[slot.role],
+                              'allowFileDiscovery': allowFileDiscovery,
+                              'linkShareMetadata.securityUpdateEligible': getLinkShareMetadataSecurityUpdateEligible(row),
+                              'linkShareMetadata.securityUpdateEnabled': getLinkShareMetadataSecurityUpdateEnabled(row),
+                              'resourceKey': getResourceKey(row),
+                              'webViewLink': getWebViewLink(row)})
 
 if inputFile != sys.stdin:
   inputFile.close()
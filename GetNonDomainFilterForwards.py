@@ -30,6 +30,8 @@ LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
 FORWARD_DOMAIN = re.compile(r"^forward .*@(.*)$")
 
+domainSet = frozenset(DOMAIN_LIST)
+
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -47,7 +49,7 @@ for row in inputCSV:
   v = row.get('forward', '')
   if v:
     mg = FORWARD_DOMAIN.match(v)
-    if mg and mg.group(1) not in DOMAIN_LIST:
+    if mg and mg.group(1) not in domainSet:
       outputCSV.writerow(row)
 
 if inputFile != sys.stdin:
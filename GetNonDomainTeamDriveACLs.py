@@ -33,6 +33,10 @@ import csv
 import re
 import sys
 
+from gamlib import instrument
+from gamlib.domains import DomainFilter
+from gamlib.filelistcache import readFileList
+
 # Define your domain(s) in the list below,
 # e.g., DOMAIN_LIST = ['domain.com'] DOMAIN_LIST = ['domain1.com', 'domain2.com']
 DOMAIN_LIST = []
@@ -51,24 +55,7 @@ INCLUDE_ANYONE = True
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
-def checkDomain(d):
-  if EXCLUSIVE_DOMAINS:
-    if DOMAIN_LIST and d in DOMAIN_LIST:
-      return False
-    for regex in DOMAIN_EXPRESSIONS:
-      if regex.search(d):
-        return False
-  else:
-    if DOMAIN_LIST and d not in DOMAIN_LIST:
-      return False
-    if DOMAIN_EXPRESSIONS:
-      for regex in DOMAIN_EXPRESSIONS:
-        if regex.search(d):
-          return True
-      return False
-  return not EXCLUSIVE_DOMAINS
+checkDomain = DomainFilter(DOMAIN_LIST, DOMAIN_EXPRESSIONS, EXCLUSIVE_DOMAINS).check
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -83,32 +70,34 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v == 'domain':
-        emailAddress = ''
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-      elif v in ['user', 'group']:
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-      else: #anyone
-        if not INCLUDE_ANYONE:
-          continue
-        emailAddress = ''
-        domain = ''
-      if ((v == 'anyone') or # Can only be true is INCLUDE_ANYONE = True
-          checkDomain(domain)):
-        outputCSV.writerow({'teamDriveId': row['id'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'type': v,
-                            'emailAddress': emailAddress,
-                            'domain': domain})
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getDriveId = layout.getter('id')
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v:
+        if v == 'domain':
+          emailAddress = ''
+          domain = row[slot.domain].lower()
+        elif v in ['user', 'group']:
+          if slot.isDeleted(row):
+            continue
+          emailAddress = row[slot.emailAddress].lower()
+          domain = emailAddress[emailAddress.find('@')+1:]
+        else: #anyone
+          if not INCLUDE_ANYONE:
+            continue
+          emailAddress = ''
+          domain = ''
+        if ((v == 'anyone') or # Can only be true is INCLUDE_ANYONE = True
+            checkDomain(domain)):
+          outputCSV.writerow({'teamDriveId': getDriveId(row),
+                              'permissionId': f'id:{row[slot.id]}',
+                              'role': row[slot.role],
+                              'type': v,
+                              'emailAddress': emailAddress,
+                              'domain': domain})
 
 if inputFile != sys.stdin:
   inputFile.close()
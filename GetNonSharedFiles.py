@@ -16,17 +16,17 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -37,25 +37,25 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-outputCSV = csv.DictWriter(outputFile, inputCSV.fieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(layout.fieldnames)
 
-for row in inputCSV:
-  shared = False
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg:
+getUser = layout.getter('Owner')
+with instrument.phase('scan'):
+  for row in rows:
+    shared = False
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
       if v == 'user':
-        permissions_N = mg.group(1)
-        role = row[f'permissions.{permissions_N}.role']
-        emailAddress = row.get(f'permissions.{permissions_N}.emailAddress', '').lower()
-        if (role and role != 'owner') or (emailAddress and emailAddress != row['Owner'].lower()):
+        role = row[slot.role]
+        emailAddress = slot.get(row, 'emailAddress').lower()
+        if (role and role != 'owner') or (emailAddress and emailAddress != getUser(row).lower()):
           shared = True
       elif v:
         shared = True
-  if not shared:
-    outputCSV.writerow(row)
+    if not shared:
+      outputCSV.writerow(row)
 
 if inputFile != sys.stdin:
   inputFile.close()
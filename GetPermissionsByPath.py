@@ -20,24 +20,22 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
-def getWithLink(r, n):
-  withLink = r.get(f'permissions.{n}.withLink')
-  if withLink is not None:
-    return withLink == 'True'
-  withLink = r.get(f'permissions.{n}.allowFileDiscovery')
-  if withLink is not None:
-    return withLink == 'False'
+def getWithLink(r, slot):
+  if slot.withLink is not None:
+    return r[slot.withLink] == 'True'
+  if slot.allowFileDiscovery is not None:
+    return r[slot.allowFileDiscovery] == 'False'
   return False
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
@@ -53,35 +51,43 @@ else:
   inputFile = sys.stdin
 
 pathPerms = []
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  numPaths = int(row.get('paths', '0'))
-  if numPaths > 0:
-    pathList = []
-    for p in range(0, numPaths):
-      pathList.append(row[f'path.{p}'])
-  else:
-    pathList = [row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown'))]
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v == 'domain':
-        value = row[f'permissions.{permissions_N}.domain']
-        if getWithLink(row, permissions_N):
-          v += 'WithLink'
-      elif v in ['user', 'group']:
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        value = row[f'permissions.{permissions_N}.emailAddress']
-      else:
-        value = ''
-        if getWithLink(row, permissions_N):
-          v += 'WithLink'
-      role = row[f'permissions.{permissions_N}.role']
-      if v != 'user' or role != 'owner' or value != row['Owner']:
-        for path in pathList:
-          pathPerms.append({'path': path, 'type': v, 'value': value, 'role': role})
-outputCSV.writerows(sorted(pathPerms, key=lambda row: row['path']))
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getUser = layout.getter('Owner')
+getPaths = layout.getter('paths', default='0')
+getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+pathColumns = []
+while layout.index(f'path.{len(pathColumns)}') is not None:
+  pathColumns.append(layout.index(f'path.{len(pathColumns)}'))
+with instrument.phase('scan'):
+  for row in rows:
+    numPaths = int(getPaths(row))
+    if numPaths > 0:
+      pathList = []
+      for p in range(0, numPaths):
+        pathList.append(row[pathColumns[p]])
+    else:
+      pathList = [getFileName(row)]
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v:
+        if v == 'domain':
+          value = row[slot.domain]
+          if getWithLink(row, slot):
+            v += 'WithLink'
+        elif v in ['user', 'group']:
+          if slot.isDeleted(row):
+            continue
+          value = row[slot.emailAddress]
+        else:
+          value = ''
+          if getWithLink(row, slot):
+            v += 'WithLink'
+        role = row[slot.role]
+        if v != 'user' or role != 'owner' or value != getUser(row):
+          for path in pathList:
+            pathPerms.append({'path': path, 'type': v, 'value': value, 'role': role})
+with instrument.phase('write'):
+  outputCSV.writerows(sorted(pathPerms, key=lambda row: row['path']))
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -52,9 +52,11 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
@@ -73,7 +75,7 @@ NON_INHERITED_ACLS_ONLY = True
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+domainSet = frozenset(DOMAIN_LIST)
 
 if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
   outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
@@ -95,41 +97,47 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if NON_INHERITED_ACLS_ONLY and str(row.get(f'permissions.{permissions_N}.permissionDetails.0.inherited', False)) == 'True':
-        continue
-      if v == 'domain':
-        emailAddress = ''
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-      elif v in ['user', 'group']:
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-      else: #anyone
-        if not INCLUDE_ANYONE:
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getUser = layout.getter('Owner')
+getDriveId = layout.getter('driveId')
+getFileId = layout.getter('id')
+getMimeType = layout.getter('mimeType')
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v:
+        if NON_INHERITED_ACLS_ONLY and slot.get(row, 'permissionDetails.0.inherited') == 'True':
           continue
-        emailAddress = ''
-        domain = ''
-      if ((row[f'permissions.{permissions_N}.role'] != 'organizer') and
-          ((v == 'anyone') or # Can only be true is INCLUDE_ANYONE = True
-           (EXCLUSIVE_DOMAINS and domain not in DOMAIN_LIST) or
-           (not EXCLUSIVE_DOMAINS and domain in DOMAIN_LIST))):
-        outputCSV.writerow({'Owner': row['Owner'],
-                            'teamDriveId': row['driveId'],
-                            'teamDriveName': teamDriveNames.get(row['driveId'], row['driveId']),
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'type': v,
-                            'emailAddress': emailAddress,
-                            'domain': domain})
+        if v == 'domain':
+          emailAddress = ''
+          domain = row[slot.domain].lower()
+        elif v in ['user', 'group']:
+          if slot.isDeleted(row):
+            continue
+          emailAddress = row[slot.emailAddress].lower()
+          domain = emailAddress[emailAddress.find('@')+1:]
+        else: #anyone
+          if not INCLUDE_ANYONE:
+            continue
+          emailAddress = ''
+          domain = ''
+        if ((row[slot.role] != 'organizer') and
+            ((v == 'anyone') or # Can only be true is INCLUDE_ANYONE = True
+             (EXCLUSIVE_DOMAINS and domain not in domainSet) or
+             (not EXCLUSIVE_DOMAINS and domain in domainSet))):
+          outputCSV.writerow({'Owner': getUser(row),
+                              'teamDriveId': getDriveId(row),
+                              'teamDriveName': teamDriveNames.get(getDriveId(row), getDriveId(row)),
+                              'driveFileId': getFileId(row),
+                              'driveFileTitle': getFileName(row),
+                              'mimeType': getMimeType(row),
+                              'permissionId': f'id:{row[slot.id]}',
+                              'role': row[slot.role],
+                              'type': v,
+                              'emailAddress': emailAddress,
+                              'domain': domain})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -19,17 +19,17 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -44,19 +44,24 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-        outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'type': v})
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getOwner = layout.getter('owners.0.emailAddress')
+getFileId = layout.getter('id')
+getMimeType = layout.getter('mimeType')
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v:
+        if slot.isDeleted(row):
+          outputCSV.writerow({'Owner': getOwner(row),
+                              'driveFileId': getFileId(row),
+                              'driveFileTitle': getFileName(row),
+                              'mimeType': getMimeType(row),
+                              'permissionId': f'id:{row[slot.id]}',
+                              'role': row[slot.role],
+                              'type': v})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -13,70 +13,88 @@
 #  $ gam redirect csv ./filelistperms.csv user user@domain.com print filelist fields id,title,permissions,owners.emailaddress pm not role owner em pmfilter
 # 2: From that list of ACLs, output a CSV file that lists the shared file permissions
 #  $ python3 GetSharedFilePermissions.py filelistperms.csv deleteperms.csv
+#    For a large filelistperms.csv, process it in N processes; the output is the same
+#  $ python3 GetSharedFilePermissions.py filelistperms.csv deleteperms.csv --jobs N
 # 3: Inspect deleteperms.csv, verify that it makes sense and then proceed
 # 4: If desired, delete the ACLs
 #  $ gam csv ./deleteperms.csv gam user "~Owner" delete drivefileacl "~driveFileId" "~permissionId"
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+from gamlib.parallel import getJobs, runParallel
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+def processCSV(inputFile, outputFile, writeHeader=True):
+  outputCSV = csv.DictWriter(outputFile, ['Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
+                                          'permissionId', 'role', 'type', 'emailAddress', 'domain', 'allowFileDiscovery'],
+                             lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+  if writeHeader:
+    outputCSV.writeheader()
+
+  layout, rows = readFileList(inputFile, QUOTE_CHAR)
+  getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+  getOwner = layout.getter('owners.0.emailAddress')
+  getFileId = layout.getter('id')
+  getMimeType = layout.getter('mimeType')
+  with instrument.phase('scan'):
+    for row in rows:
+      for slot in layout.populatedSlots(row):
+        v = row[slot.type]
+        if v:
+          if row[slot.role] == 'owner':
+            continue
+          if v in ['user', 'group']:
+            allowFileDiscovery = ''
+            emailAddress = row[slot.emailAddress].lower()
+            domain = emailAddress[emailAddress.find('@')+1:]
+          elif v == 'domain':
+            allowFileDiscovery = slot.getAllowFileDiscovery(row)
+            emailAddress = ''
+            domain = row[slot.domain].lower()
+          else: #anyone
+            allowFileDiscovery = slot.getAllowFileDiscovery(row)
+            emailAddress = ''
+            domain = ''
+          outputCSV.writerow({'Owner': getOwner(row),
+                              'driveFileId': getFileId(row),
+                              'driveFileTitle': getFileName(row),
+                              'mimeType': getMimeType(row),
+                              'permissionId': f'id:{row[slot.id]}',
+                              'role': row[slot.role],
+                              'type': v,
+                              'emailAddress': emailAddress,
+                              'domain': domain,
+                              'allowFileDiscovery': allowFileDiscovery})
+
+if __name__ == '__main__':
+  jobs = getJobs(sys.argv)
 
-if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
-  outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
-else:
-  outputFile = sys.stdout
-outputCSV = csv.DictWriter(outputFile, ['Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
-                                        'permissionId', 'role', 'type', 'emailAddress', 'domain', 'allowFileDiscovery'],
-                           lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
+  if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
+    outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
+  else:
+    outputFile = sys.stdout
 
-if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
-  inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-else:
-  inputFile = sys.stdin
+  if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
+    inputFile = open(sys.argv[1], 'r', encoding='utf-8')
+  else:
+    inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if row[f'permissions.{permissions_N}.role'] == 'owner':
-        continue
-      if v in ['user', 'group']:
-        allowFileDiscovery = ''
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-      elif v == 'domain':
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                                     str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-        emailAddress = ''
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-      else: #anyone
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                                     str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-        emailAddress = ''
-        domain = ''
-      outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                          'driveFileId': row['id'],
-                          'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                          'mimeType': row['mimeType'],
-                          'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                          'role': row[f'permissions.{permissions_N}.role'],
-                          'type': v,
-                          'emailAddress': emailAddress,
-                          'domain': domain,
-                          'allowFileDiscovery': allowFileDiscovery})
+  if jobs > 1 and inputFile != sys.stdin:
+    with instrument.phase('scan'):
+      runParallel(processCSV, sys.argv[1], outputFile, jobs, QUOTE_CHAR)
+  else:
+    processCSV(inputFile, outputFile)
 
-if inputFile != sys.stdin:
-  inputFile.close()
-if outputFile != sys.stdout:
-  outputFile.close()
+  if inputFile != sys.stdin:
+    inputFile.close()
+  if outputFile != sys.stdout:
+    outputFile.close()
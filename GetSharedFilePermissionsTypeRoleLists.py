@@ -18,9 +18,11 @@
 
 import copy
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 SHOW_USERS = True # True: show user ACLs; False: do not show user ACLs
 SHOW_GROUPS = True # True: show group ACLs; False: do not show group ACLs
 SHOW_DOMAINS = True # True: show domain ACLs; False: do not show domain ACLs
@@ -36,8 +38,6 @@ ALT_FILE_NAME = 'title'
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 USER_GROUP_ROLES = ['commenter', 'reader', 'writer', 'fileOrganizer', 'organizer']
 DOMAIN_ANYONE_ROLES = ['commenter', 'reader', 'writer']
 
@@ -146,63 +146,66 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  permCounts = copy.deepcopy(ZERO_COUNTS)
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      role = row[f'permissions.{permissions_N}.role']
-      if role == 'owner':
-        continue
-      if v in ['user', 'group']:
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getOwner = layout.getter('owners.0.emailAddress')
+getFileId = layout.getter('id')
+getMimeType = layout.getter('mimeType')
+with instrument.phase('scan'):
+  for row in rows:
+    permCounts = copy.deepcopy(ZERO_COUNTS)
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v:
+        role = row[slot.role]
+        if role == 'owner':
+          continue
+        if v in ['user', 'group']:
+          permCounts[v][role]['count'] += 1
+          permCounts[v][role]['addresses'].append(row[slot.emailAddress].lower())
+          continue
+        if v == 'domain':
+          if not slot.getAllowFileDiscovery(row):
+            v = 'domainWithlink'
+          permCounts[v][role]['count'] += 1
+          permCounts[v][role]['addresses'].append(row[slot.domain])
+          continue
+        # if v == 'anyone'
+        if not slot.getAllowFileDiscovery(row):
+          v = 'anyoneWithlink'
         permCounts[v][role]['count'] += 1
-        permCounts[v][role]['addresses'].append(row[f'permissions.{permissions_N}.emailAddress'].lower())
-        continue
-      if v == 'domain':
-        if not row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                       str(row.get(f'permissions.{permissions_N}.withLink') == 'False')):
-          v = 'domainWithlink'
-        permCounts[v][role]['count'] += 1
-        permCounts[v][role]['addresses'].append(row[f'permissions.{permissions_N}.domain'])
-        continue
-      # if v == 'anyone'
-      if not row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                     str(row.get(f'permissions.{permissions_N}.withLink') == 'False')):
-        v = 'anyoneWithlink'
-      permCounts[v][role]['count'] += 1
-  orow = {'Owner': row['owners.0.emailAddress'],
-          'driveFileId': row['id'],
-          'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-          'mimeType': row['mimeType']}
-  if SHOW_USERS:
-    atype = 'user'
-    for role in USER_GROUP_ROLES:
-      atypeRole = f'{atype}{role.capitalize()}'
-      if SHOW_COUNTS:
-        orow[f'{atypeRole}Count'] = permCounts[atype][role]['count']
-      orow[atypeRole] = LIST_DELIMITER.join(permCounts[atype][role]['addresses'])
-  if SHOW_GROUPS:
-    atype = 'group'
-    for role in USER_GROUP_ROLES:
-      atypeRole = f'{atype}{role.capitalize()}'
-      if SHOW_COUNTS:
-        orow[f'{atypeRole}Count'] = permCounts[atype][role]['count']
-      orow[atypeRole] = LIST_DELIMITER.join(permCounts[atype][role]['addresses'])
-  if SHOW_DOMAINS:
-    for atype in ['domain', 'domainWithlink']:
-      for role in DOMAIN_ANYONE_ROLES:
+    orow = {'Owner': getOwner(row),
+            'driveFileId': getFileId(row),
+            'driveFileTitle': getFileName(row),
+            'mimeType': getMimeType(row)}
+    if SHOW_USERS:
+      atype = 'user'
+      for role in USER_GROUP_ROLES:
         atypeRole = f'{atype}{role.capitalize()}'
         if SHOW_COUNTS:
           orow[f'{atypeRole}Count'] = permCounts[atype][role]['count']
         orow[atypeRole] = LIST_DELIMITER.join(permCounts[atype][role]['addresses'])
-  if SHOW_ANYONES:
-    for atype in ['anyone', 'anyoneWithlink']:
-      for role in DOMAIN_ANYONE_ROLES:
+    if SHOW_GROUPS:
+      atype = 'group'
+      for role in USER_GROUP_ROLES:
         atypeRole = f'{atype}{role.capitalize()}'
         if SHOW_COUNTS:
           orow[f'{atypeRole}Count'] = permCounts[atype][role]['count']
-  outputCSV.writerow(orow)
+        orow[atypeRole] = LIST_DELIMITER.join(permCounts[atype][role]['addresses'])
+    if SHOW_DOMAINS:
+      for atype in ['domain', 'domainWithlink']:
+        for role in DOMAIN_ANYONE_ROLES:
+          atypeRole = f'{atype}{role.capitalize()}'
+          if SHOW_COUNTS:
+            orow[f'{atypeRole}Count'] = permCounts[atype][role]['count']
+          orow[atypeRole] = LIST_DELIMITER.join(permCounts[atype][role]['addresses'])
+    if SHOW_ANYONES:
+      for atype in ['anyone', 'anyoneWithlink']:
+        for role in DOMAIN_ANYONE_ROLES:
+          atypeRole = f'{atype}{role.capitalize()}'
+          if SHOW_COUNTS:
+            orow[f'{atypeRole}Count'] = permCounts[atype][role]['count']
+    outputCSV.writerow(orow)
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -34,9 +34,11 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
@@ -52,7 +54,7 @@ INCLUDE_ANYONE = True
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+domainSet = frozenset(DOMAIN_LIST)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -68,52 +70,57 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  acls = []
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v == 'domain':
-        emailAddress = ''
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery', str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-      elif v == 'user':
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        if row[f'permissions.{permissions_N}.role'] == 'owner':
-          continue
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-        allowFileDiscovery = ''
-      elif v == 'group':
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-        allowFileDiscovery = ''
-      else: #anyone
-        if not INCLUDE_ANYONE:
-          continue
-        domain = emailAddress = ''
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery', str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-      if ((v != 'anyone') and
-          ((EXCLUSIVE_DOMAINS and domain in DOMAIN_LIST) or
-           (not EXCLUSIVE_DOMAINS and domain not in DOMAIN_LIST))):
-        acls = []
-        break
-      acls.append({'Owner': row['owners.0.emailAddress'],
-                   'driveFileId': row['id'],
-                   'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                   'mimeType': row['mimeType'],
-                   'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                   'role': row[f'permissions.{permissions_N}.role'],
-                   'type': v,
-                   'emailAddress': emailAddress,
-                   'domain': domain,
-                   'allowFileDiscovery': allowFileDiscovery})
-  for acl in acls:
-    outputCSV.writerow(acl)
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getOwner = layout.getter('owners.0.emailAddress')
+getFileId = layout.getter('id')
+getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = layout.getter('mimeType')
+with instrument.phase('scan'):
+  for row in rows:
+    acls = []
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v:
+        if v == 'domain':
+          emailAddress = ''
+          domain = row[slot.domain].lower()
+          allowFileDiscovery = slot.getAllowFileDiscovery(row)
+        elif v == 'user':
+          if slot.isDeleted(row):
+            continue
+          if row[slot.role] == 'owner':
+            continue
+          emailAddress = row[slot.emailAddress].lower()
+          domain = emailAddress[emailAddress.find('@')+1:]
+          allowFileDiscovery = ''
+        elif v == 'group':
+          if slot.isDeleted(row):
+            continue
+          emailAddress = row[slot.emailAddress].lower()
+          domain = emailAddress[emailAddress.find('@')+1:]
+          allowFileDiscovery = ''
+        else: #anyone
+          if not INCLUDE_ANYONE:
+            continue
+          domain = emailAddress = ''
+          allowFileDiscovery = slot.getAllowFileDiscovery(row)
+        if ((v != 'anyone') and
+            ((EXCLUSIVE_DOMAINS and domain in domainSet) or
+             (not EXCLUSIVE_DOMAINS and domain not in domainSet))):
+          acls = []
+          break
+        acls.append({'Owner': getOwner(row),
+                     'driveFileId': getFileId(row),
+                     'driveFileTitle': getFileName(row),
+                     'mimeType': getMimeType(row),
+                     'permissionId': f'id:{row[slot.id]}',
+                     'role': row[slot.role],
+                     'type': v,
+                     'emailAddress': emailAddress,
+                     'domain': domain,
+                     'allowFileDiscovery': allowFileDiscovery})
+    for acl in acls:
+      outputCSV.writerow(acl)
 
 if inputFile != sys.stdin:
   inputFile.close()
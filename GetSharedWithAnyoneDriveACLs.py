@@ -26,9 +26,11 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
@@ -40,37 +42,32 @@ DESIRED_ALLOWFILEDISCOVERY = 'Any'
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
   outputFile = sys.stdout
-outputCSV = csv.DictWriter(outputFile, ['Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
-                                        'permissionId', 'role', 'allowFileDiscovery'],
-                           lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(['Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
+                    'permissionId', 'role', 'allowFileDiscovery'])
 
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v == 'anyone':
-      permissions_N = mg.group(1)
-      allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                                   str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-      if DESIRED_ALLOWFILEDISCOVERY in ('Any', allowFileDiscovery):
-        outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'allowFileDiscovery': allowFileDiscovery})
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getOwner = layout.getter('owners.0.emailAddress')
+getFileId = layout.getter('id')
+getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = layout.getter('mimeType')
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      if row[slot.type] == 'anyone':
+        allowFileDiscovery = slot.getAllowFileDiscovery(row)
+        if DESIRED_ALLOWFILEDISCOVERY in ('Any', allowFileDiscovery):
+          outputCSV.writerow([getOwner(row), getFileId(row), getFileName(row), getMimeType(row),
+                              f'id:{row[slot.id]}', row[slot.role], allowFileDiscovery])
 
 if inputFile != sys.stdin:
   inputFile.close()
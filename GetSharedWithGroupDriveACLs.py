@@ -21,9 +21,11 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
@@ -40,7 +42,7 @@ DOMAIN_LIST = ['domain.com',]
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+domainSet = frozenset(DOMAIN_LIST)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -56,23 +58,28 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v == 'group':
-      permissions_N = mg.group(1)
-      emailAddress = row.get(f'permissions.{permissions_N}.emailAddress', '').lower()
-      domain = row[f'permissions.{permissions_N}.domain'].lower()
-      if ((not GROUP_LIST and not DOMAIN_LIST) or
-          (GROUP_LIST and emailAddress in GROUP_LIST) or
-          (DOMAIN_LIST and domain in DOMAIN_LIST)):
-        outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'emailAddress': emailAddress})
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getOwner = layout.getter('owners.0.emailAddress')
+getFileId = layout.getter('id')
+getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = layout.getter('mimeType')
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v == 'group':
+        emailAddress = slot.get(row, 'emailAddress').lower()
+        domain = row[slot.domain].lower()
+        if ((not GROUP_LIST and not DOMAIN_LIST) or
+            (GROUP_LIST and emailAddress in GROUP_LIST) or
+            (DOMAIN_LIST and domain in domainSet)):
+          outputCSV.writerow({'Owner': getOwner(row),
+                              'driveFileId': getFileId(row),
+                              'driveFileTitle': getFileName(row),
+                              'mimeType': getMimeType(row),
+                              'permissionId': f'id:{row[slot.id]}',
+                              'role': row[slot.role],
+                              'emailAddress': emailAddress})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -46,9 +46,11 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
@@ -68,7 +70,7 @@ NON_INHERITED_ACLS_ONLY = True
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+domainSet = frozenset(DOMAIN_LIST)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -84,25 +86,30 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v == 'group':
-      permissions_N = mg.group(1)
-      if NON_INHERITED_ACLS_ONLY and str(row.get(f'permissions.{permissions_N}.permissionDetails.0.inherited', False)) == 'True':
-        continue
-      emailAddress = row.get(f'permissions.{permissions_N}.emailAddress', '').lower()
-      domain = row[f'permissions.{permissions_N}.domain'].lower()
-      if ((not GROUP_LIST and not DOMAIN_LIST) or
-          (GROUP_LIST and emailAddress in GROUP_LIST) or
-          (DOMAIN_LIST and domain in DOMAIN_LIST)):
-        outputCSV.writerow({'Owner': row['Owner'],
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'emailAddress': emailAddress})
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getUser = layout.getter('Owner')
+getFileId = layout.getter('id')
+getMimeType = layout.getter('mimeType')
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v == 'group':
+        if NON_INHERITED_ACLS_ONLY and slot.get(row, 'permissionDetails.0.inherited') == 'True':
+          continue
+        emailAddress = slot.get(row, 'emailAddress').lower()
+        domain = row[slot.domain].lower()
+        if ((not GROUP_LIST and not DOMAIN_LIST) or
+            (GROUP_LIST and emailAddress in GROUP_LIST) or
+            (DOMAIN_LIST and domain in domainSet)):
+          outputCSV.writerow({'Owner': getUser(row),
+                              'driveFileId': getFileId(row),
+                              'driveFileTitle': getFileName(row),
+                              'mimeType': getMimeType(row),
+                              'permissionId': f'id:{row[slot.id]}',
+                              'role': row[slot.role],
+                              'emailAddress': emailAddress})
 
 if inputFile != sys.stdin:
   inputFile.close()
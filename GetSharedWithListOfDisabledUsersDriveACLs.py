@@ -31,9 +31,11 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
@@ -43,8 +45,6 @@ USER_HEADERS = ['email'] # USER_HEADERS = ['email1', 'email2', 'email3', 'email4
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 userSet = set()
 inputFile = open(sys.argv[3], 'r', encoding='utf-8')
 for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
@@ -55,33 +55,31 @@ for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
 inputFile.close()
 
 inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
 
 outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
-outputCSV = csv.DictWriter(outputFile, inputCSV.fieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(layout.fieldnames)
 
-for row in inputCSV:
-  shared = False
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg:
-      if v in {'anyone', 'domain', 'group'}:
+with instrument.phase('scan'):
+  for row in rows:
+    shared = False
+    for slot in layout.populatedSlots(row):
+      if row[slot.type] in {'anyone', 'domain', 'group'}:
         break
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
+      if slot.isDeleted(row):
         continue
-      if row[f'permissions.{permissions_N}.role'] == 'owner':
+      if row[slot.role] == 'owner':
         continue
-      emailAddress = row.get(f'permissions.{permissions_N}.emailAddress', '').lower()
+      emailAddress = slot.get(row, 'emailAddress').lower()
       if not emailAddress:
         continue
       if emailAddress not in userSet:
         break
       shared = True
-  else:
-    if shared:
-      outputCSV.writerow(row)
+    else:
+      if shared:
+        outputCSV.writerow(row)
 
 inputFile.close()
 outputFile.close()
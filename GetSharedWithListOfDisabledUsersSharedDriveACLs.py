@@ -26,17 +26,17 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 # The headers in the CSV file that contain the user email addresses
 USER_HEADERS = ['primaryEmail']
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 userSet = set()
 inputFile = open(sys.argv[2], 'r', encoding='utf-8')
 for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
@@ -47,32 +47,32 @@ for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
 inputFile.close()
 
 inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
 outputFile = open('cleanup.csv', 'w', encoding='utf-8', newline='')
 outputCSV = csv.DictWriter(outputFile, ['owner', 'id', 'emailAddress'], lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-for row in inputCSV:
-  shared = False
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg:
-      if v in {'anyone', 'domain', 'group'}:
+getUser = layout.getter('Owner')
+getDriveId = layout.getter('id')
+with instrument.phase('scan'):
+  for row in rows:
+    shared = False
+    for slot in layout.populatedSlots(row):
+      if row[slot.type] in {'anyone', 'domain', 'group'}:
         break
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
+      if slot.isDeleted(row):
         continue
-      if row[f'permissions.{permissions_N}.role'] == 'owner':
+      if row[slot.role] == 'owner':
         continue
-      emailAddress = row.get(f'permissions.{permissions_N}.emailAddress', '').lower()
+      emailAddress = slot.get(row, 'emailAddress').lower()
       if not emailAddress:
         continue
       if emailAddress not in userSet:
         break
       shared = True
-      outputCSV.writerow({'owner': row['Owner'],
-                        'id': row['id'],
-                        'emailAddress': emailAddress})
+      outputCSV.writerow({'owner': getUser(row),
+                          'id': getDriveId(row),
+                          'emailAddress': emailAddress})
 
 inputFile.close()
 outputFile.close()
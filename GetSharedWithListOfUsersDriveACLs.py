@@ -34,9 +34,11 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
@@ -46,8 +48,6 @@ USER_HEADERS = ['email'] # USER_HEADERS = ['email1', 'email2', 'email3', 'email4
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 userSet = set()
 inputFile = open(sys.argv[3], 'r', encoding='utf-8')
 for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
@@ -71,22 +71,27 @@ if sys.argv[1] != '-':
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v == 'user':
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted', '') == 'True':
-        continue
-      emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-      if row[f'permissions.{permissions_N}.role'] != 'owner' and emailAddress in userSet:
-        outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'emailAddress': emailAddress})
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getOwner = layout.getter('owners.0.emailAddress')
+getFileId = layout.getter('id')
+getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = layout.getter('mimeType')
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v == 'user':
+        if slot.isDeleted(row):
+          continue
+        emailAddress = row[slot.emailAddress].lower()
+        if row[slot.role] != 'owner' and emailAddress in userSet:
+          outputCSV.writerow({'Owner': getOwner(row),
+                              'driveFileId': getFileId(row),
+                              'driveFileTitle': getFileName(row),
+                              'mimeType': getMimeType(row),
+                              'permissionId': f'id:{row[slot.id]}',
+                              'role': row[slot.role],
+                              'emailAddress': emailAddress})
 
 if inputFile != sys.stdin:
   inputFile.close()
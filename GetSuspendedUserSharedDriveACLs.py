@@ -22,6 +22,9 @@ import csv
 import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 # The header in the CSV file that contains the user email addresses
 USER_HEADER = 'primaryEmail'
 
@@ -29,8 +32,6 @@ QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
 ALIASES_N = re.compile(r"aliases.(\d+)")
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 userSet = set()
 inputFile = open(sys.argv[3], 'r', encoding='utf-8')
 for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
@@ -50,21 +51,24 @@ outputCSV.writeheader()
 
 inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v == 'user':
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted', '') == 'True':
-        continue
-      emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-      if emailAddress in userSet:
-        outputCSV.writerow({'id': row['id'],
-                            'name': row['name'],
-                            'createdTime': row['createdTime'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'emailAddress': emailAddress})
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getDriveId = layout.getter('id')
+getName = layout.getter('name')
+getCreatedTime = layout.getter('createdTime')
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      if row[slot.type] == 'user':
+        if slot.isDeleted(row):
+          continue
+        emailAddress = row[slot.emailAddress].lower()
+        if emailAddress in userSet:
+          outputCSV.writerow({'id': getDriveId(row),
+                              'name': getName(row),
+                              'createdTime': getCreatedTime(row),
+                              'permissionId': f'id:{row[slot.id]}',
+                              'role': row[slot.role],
+                              'emailAddress': emailAddress})
 
 inputFile.close()
 outputFile.close()
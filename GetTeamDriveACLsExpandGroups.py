@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """
 # Purpose: Get ACLs for Team Drives, expand type group ACls into the constituent type user ACLs. permission.id is deleted for the users as it is not known
+#          Groups are expanded through nested groups; each user gets one row per Shared Drive with the highest role it has
+#          from a user ACL or any group ACL, the user ACL row is kept when its role is as high as that from the groups.
 # Note: This script can use GAM7 or Advanced GAM:
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
+#       The group membership read from GroupMembers.csv is saved in GroupMembers.csv.groupgraph and reused while GroupMembers.csv is unchanged.
 # Customize: Set RETAIN_GROUP_ACL_ROW as desired
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
@@ -15,16 +18,26 @@
 #  $ gam redirect csv ./GroupMembers.csv print groups roles members,managers,owners delimiter " "
 # 3: Generate a CSV file with the same headers as TeamDriveACls.csv with type group ACLs replaced with type user ACLs for each member
 #    There is an additional header, permission.group, that shows the group email address from which the user ACLs are derived.
+#    The rows of a Shared Drive must be together, as gam prints them; the user rows of a Shared Drive follow its other rows.
 #  $ python3 GetTeamDriveACLsExpandGroups.py TeamDriveACLs.csv GroupMembers.csv TeamDriveACLsExpandedGroups.csv
 """
 
 import csv
 import sys
 
+from gamlib import instrument
+from gamlib.groupgraph import readGroupGraph
+
 MEMBER_DELIMITER = ' '
 
 RETAIN_GROUP_ACL_ROW = False # False: delete type group ACL rows, True: retain type grpup ACL rows
 
+DRIVE_ID_FIELD = 'id'
+
+# Shared Drive roles from lowest to highest; a user that has several ACLs for a Shared Drive, directly or through groups,
+# gets one row with the highest role
+ROLE_RANKS = {'reader': 0, 'commenter': 1, 'writer': 2, 'fileOrganizer': 3, 'organizer': 4}
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
@@ -33,14 +46,8 @@ inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
 fieldnames = inputCSV.fieldnames[:]
 fieldnames.append('permission.group')
 
-GroupMembers = {}
 groupFile = open(sys.argv[2], 'r', encoding='utf-8')
-for row in csv.DictReader(groupFile, quotechar=QUOTE_CHAR):
-  group = row['email']
-  GroupMembers[group] = []
-  for field in ['Members', 'Managers', 'Owners']:
-    if row[field]:
-      GroupMembers[group].extend(row[field].split(MEMBER_DELIMITER))
+graph = readGroupGraph(groupFile, QUOTE_CHAR, groupsFormat=True, delimiter=MEMBER_DELIMITER)
 groupFile.close()
 
 if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
@@ -51,21 +58,43 @@ outputCSV = csv.DictWriter(outputFile, fieldnames,
                            lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-for row in inputCSV:
-  if row['permission.type'] != 'group':
-    outputCSV.writerow(row)
-    continue
-  if RETAIN_GROUP_ACL_ROW:
-    outputCSV.writerow(row)
-  row['permission.type'] = 'user'
-  row['permission.id'] = ''
-  group = row['permission.emailAddress']
-  row['permission.group'] = group
-  for member in GroupMembers.get(group, []):
-    row['permission.emailAddress'] = member
-    _, domain = member.split('@')
-    row['permission.domain'] = domain
+# driveUsers: lower case user email -> ((role rank, 1 for a user ACL/0 for a group ACL), row) for the current Shared Drive
+def isBetterRank(email, rank):
+  current = driveUsers.get(email)
+  return current is None or rank > current[0]
+
+def flushDriveUsers():
+  for _, row in driveUsers.values():
     outputCSV.writerow(row)
+  driveUsers.clear()
+
+driveId = None
+driveUsers = {}
+with instrument.phase('scan'):
+  for row in inputCSV:
+    if row[DRIVE_ID_FIELD] != driveId:
+      flushDriveUsers()
+      driveId = row[DRIVE_ID_FIELD]
+    ptype = row['permission.type']
+    if ptype == 'user':
+      email = row['permission.emailAddress'].lower()
+      rank = (ROLE_RANKS.get(row['permission.role'], -1), 1)
+      if isBetterRank(email, rank):
+        driveUsers[email] = (rank, row)
+      continue
+    if ptype != 'group':
+      outputCSV.writerow(row)
+      continue
+    if RETAIN_GROUP_ACL_ROW:
+      outputCSV.writerow(row)
+    group = row['permission.emailAddress']
+    rank = (ROLE_RANKS.get(row['permission.role'], -1), 0)
+    for member in graph.users(group):
+      email = member.lower()
+      if isBetterRank(email, rank):
+        driveUsers[email] = (rank, dict(row, **{'permission.type': 'user', 'permission.id': '', 'permission.emailAddress': member,
+                                                'permission.domain': member[member.find('@')+1:], 'permission.group': group}))
+  flushDriveUsers()
 
 inputFile.close()
 if outputFile != sys.stdout:
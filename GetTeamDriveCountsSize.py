@@ -4,6 +4,7 @@
 # Note: This script can use GAM7 or Advanced GAM:
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
+#       Counts and sizes are totaled with NumPy when it is installed, see USE_NUMPY
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -34,6 +35,12 @@
 import csv
 import sys
 
+from gamlib import instrument
+from gamlib.aggregate import countAndSum
+from gamlib.projection import ProjectedReader
+
+USE_NUMPY = True # True - Count and total with NumPy when it is installed, False - Always use plain Python
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
@@ -55,22 +62,17 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-teamDriveInfo = {}
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  driveId = row.get('driveId')
-  if not driveId:
-    continue
-  if driveId not in teamDriveNames:
-    teamDriveNames[driveId] = driveId
-  if driveId not in teamDriveInfo:
-    teamDriveInfo[driveId] = {'name': teamDriveNames[driveId], 'count': 0, 'size': 0}
-  teamDriveInfo[driveId]['count'] += 1
-  size = row.get('size', row.get('fileSize', '0'))
-  if size:
-    teamDriveInfo[driveId]['size'] += int(size)
+inputCSV = ProjectedReader(inputFile, QUOTE_CHAR)
+fieldnames = inputCSV.fieldnames or []
+if 'driveId' in fieldnames:
+  sizeField = 'size' if 'size' in fieldnames else 'fileSize' if 'fileSize' in fieldnames else None
+  rows = inputCSV.rows('driveId', sizeField) if sizeField else ((driveId, '0') for (driveId,) in inputCSV.rows('driveId'))
+else:
+  rows = []
 
-for k, v in iter(teamDriveInfo.items()):
-  outputCSV.writerow({'id': k, 'name': v['name'], 'count': v['count'], 'size': v['size']})
+with instrument.phase('scan'):
+  for driveId, (count, size) in countAndSum(rows, useNumPy=USE_NUMPY).items():
+    outputCSV.writerow({'id': driveId, 'name': teamDriveNames.get(driveId, driveId), 'count': count, 'size': size})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -20,14 +20,14 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 teamDriveNames = {}
 inputFile = open(sys.argv[2], 'r', encoding='utf-8')
 for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
@@ -47,17 +47,19 @@ else:
 outputCSV = csv.DictWriter(outputFile, ['id', 'name', 'permissionId', 'role', 'type'], lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v == 'user':
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-        outputCSV.writerow({'id': row['id'],
-                            'name': teamDriveNames.get(row['id'], row['id']),
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'type': v})
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getDriveId = layout.getter('id')
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v == 'user':
+        if slot.isDeleted(row):
+          outputCSV.writerow({'id': getDriveId(row),
+                              'name': teamDriveNames.get(getDriveId(row), getDriveId(row)),
+                              'permissionId': f'id:{row[slot.id]}',
+                              'role': row[slot.role],
+                              'type': v})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -37,16 +37,18 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 # If you want to limit organizers to a specific list of domains, use the list below, e.g., DOMAIN_LIST = ['domain.com',] DOMAIN_LIST = ['domain1.com', 'domain2.com',]
 DOMAIN_LIST = []
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_ROLE = re.compile(r"permissions.(\d+).role")
+domainSet = frozenset(DOMAIN_LIST)
 
 if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
   outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
@@ -66,24 +68,25 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  organizer = ''
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_ROLE.match(k)
-    if mg and v in ['organizer', 'fileOrganizer']:
-      permissions_N = mg.group(1)
-      if row[f'permissions.{permissions_N}.type'] != 'user':
-        continue
-      emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-      if DOMAIN_LIST:
-        domain = emailAddress[emailAddress.find('@')+1:]
-        if domain not in DOMAIN_LIST:
+layout, rows = readFileList(inputFile, QUOTE_CHAR, keyField='role')
+getDriveId = layout.getter('id')
+with instrument.phase('scan'):
+  for row in rows:
+    organizer = ''
+    for slot in layout.populatedSlots(row):
+      if row[slot.role] in ['organizer', 'fileOrganizer']:
+        if row[slot.type] != 'user':
           continue
-      organizer = emailAddress
-      break
-  outputCSV.writerow({'id': row['id'],
-                      'name': teamDriveNames.get(row['id'], row['id']),
-                      'organizer': organizer})
+        emailAddress = row[slot.emailAddress].lower()
+        if DOMAIN_LIST:
+          domain = emailAddress[emailAddress.find('@')+1:]
+          if domain not in domainSet:
+            continue
+        organizer = emailAddress
+        break
+    outputCSV.writerow({'id': getDriveId(row),
+                        'name': teamDriveNames.get(getDriveId(row), getDriveId(row)),
+                        'organizer': organizer})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -48,17 +48,17 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 # TeamDriveGuestMembers.csv
 outputFile = open(sys.argv[4], 'w', encoding='utf-8', newline='')
 outputCSV = csv.DictWriter(outputFile, ['teamDriveId', 'teamDriveName', 'driveFileId', 'driveFileName',
@@ -75,55 +75,61 @@ inputFile.close()
 
 # TeamDriveACLs.csv
 inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  driveId = row['id']
-  if driveId not in teamDrives:
-    teamDrives[driveId] = {'name': driveId, 'user': set(), 'group': set(), 'domain': set()}
-  teamDrive = teamDrives[driveId]
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v == 'domain':
-        teamDrive[v].add(row[f'permissions.{permissions_N}.domain'].lower())
-      elif v in ['user', 'group']:
-        teamDrive[v].add(row[f'permissions.{permissions_N}.emailAddress'].lower())
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getDriveId = layout.getter('id')
+with instrument.phase('scan'):
+  for row in rows:
+    driveId = getDriveId(row)
+    if driveId not in teamDrives:
+      teamDrives[driveId] = {'name': driveId, 'user': set(), 'group': set(), 'domain': set()}
+    teamDrive = teamDrives[driveId]
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v:
+        if v == 'domain':
+          teamDrive[v].add(row[slot.domain].lower())
+        elif v in ['user', 'group']:
+          teamDrive[v].add(row[slot.emailAddress].lower())
 inputFile.close()
 
 # TeamDriveFileACLs.csv
 inputFile = open(sys.argv[3], 'r', encoding='utf-8')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  driveId = row['driveId']
-  if driveId not in teamDrives:
-    teamDrives[driveId] = {'name': driveId, 'user': set(), 'group': set(), 'domain': set()}
-  teamDrive = teamDrives[driveId]
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v == 'domain':
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-        if domain in teamDrive[v]:
-          continue
-        emailAddress = ''
-      elif v in ['user', 'group']:
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        if emailAddress in teamDrive[v]:
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getDriveId = layout.getter('driveId')
+getFileId = layout.getter('id')
+getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+with instrument.phase('scan'):
+  for row in rows:
+    driveId = getDriveId(row)
+    if driveId not in teamDrives:
+      teamDrives[driveId] = {'name': driveId, 'user': set(), 'group': set(), 'domain': set()}
+    teamDrive = teamDrives[driveId]
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v:
+        if v == 'domain':
+          domain = row[slot.domain].lower()
+          if domain in teamDrive[v]:
+            continue
+          emailAddress = ''
+        elif v in ['user', 'group']:
+          if slot.isDeleted(row):
+            continue
+          emailAddress = row[slot.emailAddress].lower()
+          if emailAddress in teamDrive[v]:
+            continue
+          domain = emailAddress[emailAddress.find('@')+1:]
+        else: #anyone
           continue
-        domain = emailAddress[emailAddress.find('@')+1:]
-      else: #anyone
-        continue
-      outputCSV.writerow({'teamDriveId': driveId,
-                          'teamDriveName': teamDrive['name'],
-                          'driveFileId': row['id'],
-                          'driveFileName': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                          'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                          'role': row[f'permissions.{permissions_N}.role'],
-                          'type': v,
-                          'emailAddress': emailAddress,
-                          'domain': domain})
+        outputCSV.writerow({'teamDriveId': driveId,
+                            'teamDriveName': teamDrive['name'],
+                            'driveFileId': getFileId(row),
+                            'driveFileName': getFileName(row),
+                            'permissionId': f'id:{row[slot.id]}',
+                            'role': row[slot.role],
+                            'type': v,
+                            'emailAddress': emailAddress,
+                            'domain': domain})
 
 inputFile.close()
 outputFile.close()
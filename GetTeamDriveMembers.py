@@ -23,9 +23,11 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 DELIMITER = ' ' # character that separates list members
 
 # If you want to limit organizers/members to a specific list of domains, use the list below, e.g., DOMAIN_LIST = ['domain.com',] DOMAIN_LIST = ['domain1.com', 'domain2.com',]
@@ -39,7 +41,7 @@ INCLUDE_TYPES = {
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_ROLE = re.compile(r"permissions.(\d+).role")
+domainSet = frozenset(DOMAIN_LIST)
 
 if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
   outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
@@ -59,26 +61,28 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  organizers = []
-  members = []
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_ROLE.match(k)
-    if mg and v:
-      roleList = organizers if v == 'organizer' else members
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-        continue
-      if not INCLUDE_TYPES[row[f'permissions.{permissions_N}.type']]:
-        continue
-      member = row[f'permissions.{permissions_N}.emailAddress']
-      if DOMAIN_LIST and member[member.find('@')+1:] not in DOMAIN_LIST:
-        continue
-      roleList.append(member)
-  outputCSV.writerow({'id': row['id'],
-                      'name': teamDriveNames.get(row['id'], row['id']),
-                      'organizers': DELIMITER.join(organizers),
-                      'members': DELIMITER.join(members)})
+layout, rows = readFileList(inputFile, QUOTE_CHAR, keyField='role')
+getDriveId = layout.getter('id')
+with instrument.phase('scan'):
+  for row in rows:
+    organizers = []
+    members = []
+    for slot in layout.populatedSlots(row):
+      v = row[slot.role]
+      if v:
+        roleList = organizers if v == 'organizer' else members
+        if slot.isDeleted(row):
+          continue
+        if not INCLUDE_TYPES[row[slot.type]]:
+          continue
+        member = row[slot.emailAddress]
+        if DOMAIN_LIST and member[member.find('@')+1:] not in domainSet:
+          continue
+        roleList.append(member)
+    outputCSV.writerow({'id': getDriveId(row),
+                        'name': teamDriveNames.get(getDriveId(row), getDriveId(row)),
+                        'organizers': DELIMITER.join(organizers),
+                        'members': DELIMITER.join(members)})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -23,9 +23,11 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 DELIMITER = ' ' # character that separates list members
 
 # If you want to limit organizers to a specific list of domains, use the list below, e.g., DOMAIN_LIST = ['domain.com',] DOMAIN_LIST = ['domain1.com', 'domain2.com',]
@@ -44,7 +46,7 @@ INCLUDE_FILE_ORGANIZERS = False # False - do not include file organizers, True -
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_ROLE = re.compile(r"permissions.(\d+).role")
+domainSet = frozenset(DOMAIN_LIST)
 
 if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
   outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
@@ -67,26 +69,27 @@ else:
 roles = {'organizer'}
 if INCLUDE_FILE_ORGANIZERS:
   roles.add('fileOrganizer')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  organizers = []
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_ROLE.match(k)
-    if mg and v in roles:
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-        continue
-      if not INCLUDE_TYPES[row[f'permissions.{permissions_N}.type']]:
-        continue
-      member = row[f'permissions.{permissions_N}.emailAddress']
-      if DOMAIN_LIST and member[member.find('@')+1:] not in DOMAIN_LIST:
-        continue
-      organizers.append(member)
-      if ONE_ORGANIZER:
-        break
-  if organizers or SHOW_NO_ORGANIZER_DRIVES:
-    outputCSV.writerow({'id': row['id'],
-                        'name': teamDriveNames.get(row['id'], row['id']),
-                        'organizers': DELIMITER.join(organizers)})
+layout, rows = readFileList(inputFile, QUOTE_CHAR, keyField='role')
+getDriveId = layout.getter('id')
+with instrument.phase('scan'):
+  for row in rows:
+    organizers = []
+    for slot in layout.populatedSlots(row):
+      if row[slot.role] in roles:
+        if slot.isDeleted(row):
+          continue
+        if not INCLUDE_TYPES[row[slot.type]]:
+          continue
+        member = row[slot.emailAddress]
+        if DOMAIN_LIST and member[member.find('@')+1:] not in domainSet:
+          continue
+        organizers.append(member)
+        if ONE_ORGANIZER:
+          break
+    if organizers or SHOW_NO_ORGANIZER_DRIVES:
+      outputCSV.writerow({'id': getDriveId(row),
+                          'name': teamDriveNames.get(getDriveId(row), getDriveId(row)),
+                          'organizers': DELIMITER.join(organizers)})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -17,9 +17,11 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 GROUP_ROLES = ['commenter', 'reader', 'writer'] # Choose from: commenter|reader|writer
 USER_ROLES = ['owner', 'commenter', 'reader', 'writer'] # Choose from: owner|commenter|reader|writer
 
@@ -37,8 +39,6 @@ ALT_FILE_NAME = 'title'
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 Users = {}
 Groups = {}
 
@@ -55,34 +55,36 @@ userOutputCSV = csv.DictWriter(userOutputFile, userFieldNames,
 userOutputCSV.writeheader()
 
 inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
+with instrument.phase('scan'):
+  layout, rows = readFileList(inputFile, QUOTE_CHAR)
+for row in rows:
+  for slot in layout.populatedSlots(row):
+    v = row[slot.type]
+    if v:
+      if slot.isDeleted(row):
         continue
-      role = row[f'permissions.{permissions_N}.role']
+      role = row[slot.role]
       if v == 'user':
         if role in USER_ROLES:
-          emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
+          emailAddress = row[slot.emailAddress].lower()
           Users.setdefault(emailAddress, DEFAULT_USER.copy())
           Users[emailAddress][role] += 1
       elif v == 'group':
         if role in GROUP_ROLES:
-          emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
+          emailAddress = row[slot.emailAddress].lower()
           Groups.setdefault(emailAddress, DEFAULT_GROUP.copy())
           Groups[emailAddress][role] += 1
 inputFile.close()
 
-for k, v in sorted(iter(Users.items())):
-  row = {'User': k}
-  row.update(v)
-  userOutputCSV.writerow(row)
-userOutputFile.close()
+with instrument.phase('write'):
+  for k, v in sorted(iter(Users.items())):
+    row = {'User': k}
+    row.update(v)
+    userOutputCSV.writerow(row)
+  userOutputFile.close()
 
-for k, v in sorted(iter(Groups.items())):
-  row = {'Group': k}
-  row.update(v)
-  groupOutputCSV.writerow(row)
-groupOutputFile.close()
+  for k, v in sorted(iter(Groups.items())):
+    row = {'Group': k}
+    row.update(v)
+    groupOutputCSV.writerow(row)
+  groupOutputFile.close()
@@ -33,9 +33,11 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 # Substitute your internal domain(s) in the list below, e.g., DOMAIN_LIST = ['domain.com',] DOMAIN_LIST = ['domain1.com', 'domain2.com',]
 DOMAIN_LIST = ['domain.com',]
 
@@ -84,7 +86,8 @@ COUNT_CATEGORIES = {
   'user': {False: 'externalUser', True: 'internalUser'},
   'deleted': {'group': 'deletedGroup', 'user': 'deletedUser'},
   }
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+
+domainSet = frozenset(DOMAIN_LIST)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -99,39 +102,42 @@ else:
   inputFile = sys.stdin
 
 userShareCounts = {}
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  owner = row['owners.0.emailAddress']
-  userShareCounts.setdefault(owner, zeroCounts.copy())
-  counterSet = {TOTAL_COUNTER: False, SHARED_COUNTER: False, SHARED_EXTERNAL_COUNTER: False, SHARED_INTERNAL_COUNTER: False}
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if row[f'permissions.{permissions_N}.role'] == 'owner':
-        incrementCounter(TOTAL_COUNTER)
-      else:
-        incrementCounter(SHARED_COUNTER)
-        if v == 'anyone':
-          incrementCounter(SHARED_EXTERNAL_COUNTER)
-          userShareCounts[owner][COUNT_CATEGORIES[v][row[f'permissions.{permissions_N}.{LINK_FIELD}'] == LINK_VALUE]] += 1
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getOwner = layout.getter('owners.0.emailAddress')
+with instrument.phase('scan'):
+  for row in rows:
+    owner = getOwner(row)
+    userShareCounts.setdefault(owner, zeroCounts.copy())
+    counterSet = {TOTAL_COUNTER: False, SHARED_COUNTER: False, SHARED_EXTERNAL_COUNTER: False, SHARED_INTERNAL_COUNTER: False}
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v:
+        if row[slot.role] == 'owner':
+          incrementCounter(TOTAL_COUNTER)
         else:
-          domain = row.get(f'permissions.{permissions_N}.domain', '').lower()
-          if not domain and v in ['user', 'group']:
-            if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-              userShareCounts[owner][COUNT_CATEGORIES['deleted'][v]] += 1
-              continue
-            emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-            domain = emailAddress[emailAddress.find('@')+1:]
-          internal = domain in DOMAIN_LIST
-          incrementCounter([SHARED_EXTERNAL_COUNTER, SHARED_INTERNAL_COUNTER][internal])
-          if v == 'domain':
-            userShareCounts[owner][COUNT_CATEGORIES[v][internal][row[f'permissions.{permissions_N}.{LINK_FIELD}'] == LINK_VALUE]] += 1
-          else: # group, user
-            userShareCounts[owner][COUNT_CATEGORIES[v][internal]] += 1
-for owner, counts in sorted(iter(userShareCounts.items())):
-  row = {'Owner': owner}
-  row.update(counts)
-  outputCSV.writerow(row)
+          incrementCounter(SHARED_COUNTER)
+          if v == 'anyone':
+            incrementCounter(SHARED_EXTERNAL_COUNTER)
+            userShareCounts[owner][COUNT_CATEGORIES[v][row[slot.fields[LINK_FIELD]] == LINK_VALUE]] += 1
+          else:
+            domain = slot.get(row, 'domain').lower()
+            if not domain and v in ['user', 'group']:
+              if slot.isDeleted(row):
+                userShareCounts[owner][COUNT_CATEGORIES['deleted'][v]] += 1
+                continue
+              emailAddress = row[slot.emailAddress].lower()
+              domain = emailAddress[emailAddress.find('@')+1:]
+            internal = domain in domainSet
+            incrementCounter([SHARED_EXTERNAL_COUNTER, SHARED_INTERNAL_COUNTER][internal])
+            if v == 'domain':
+              userShareCounts[owner][COUNT_CATEGORIES[v][internal][row[slot.fields[LINK_FIELD]] == LINK_VALUE]] += 1
+            else: # group, user
+              userShareCounts[owner][COUNT_CATEGORIES[v][internal]] += 1
+with instrument.phase('write'):
+  for owner, counts in sorted(iter(userShareCounts.items())):
+    row = {'Owner': owner}
+    row.update(counts)
+    outputCSV.writerow(row)
 
 if inputFile != sys.stdin:
   inputFile.close()
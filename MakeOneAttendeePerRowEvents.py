@@ -4,7 +4,7 @@
 # Note: This script can use GAM7 or Advanced GAM:
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
-# Customize: Set ATTENDEE_LIST, DOMAIN_LIST, ATTENDEE_PATTERN, DROP_GENERAL_COLUMNS, DROP_ATTENDEE_COLUMNS.
+# Customize: Set ATTENDEE_LIST, DOMAIN_LIST, ATTENDEE_PATTERN, DROP_GENERAL_COLUMNS, DROP_ATTENDEE_COLUMNS, OUTPUT_FORMAT.
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -23,12 +23,17 @@
 #  $ gam redirect csv ./AllEvents.csv multiprocess csv ./AllCalendars.csv gam user "~primaryEmail" print events "~calendarId" starttime now matchfield attendeespattern "^.*@bar.com$" fields id,summary,attendees
 # 2: From that list of files, output a CSV file that lists one attendee per row
 #  $ python3 MakeOneAttendeePerRowEvents.py AllEvents.csv AllEventsOAPR.csv
+#    To write newline-delimited JSON, Parquet or Arrow instead of CSV, set OUTPUT_FORMAT or use --format; see gamlib/sinks.py
+#  $ python3 MakeOneAttendeePerRowEvents.py AllEvents.csv AllEventsOAPR.ndjson --format ndjson
 """
 
 import csv
+import functools
 import re
 import sys
 
+from gamlib import explode, instrument, sinks
+
 # Specify specific attendees(s), e.g., ATTENDEE_LIST = ['user1@domain.com'] ATTENDEE_LIST = ['user1@domain.com', 'user2@domain.com']
 # The list should be empty if you're only specifiying domains in DOMAIN_LIST, e.g. ATTENDEE_LIST = []
 ATTENDEE_LIST = []
@@ -50,62 +55,52 @@ DROP_GENERAL_COLUMNS = ['attendees']
 # The list should be empty if you want all attendee columns, e.g, DROP_ATTENDEE_COLUMNS = ['self']
 DROP_ATTENDEE_COLUMNS = []
 
+# Output format: 'csv', 'ndjson', 'parquet' or 'arrow'; parquet and arrow require pyarrow
+OUTPUT_FORMAT = 'csv'
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
+ATTENDEE_CACHE_SIZE = 65536 # Number of distinct attendee email addresses whose selection is remembered
+
 ATTENDEES_N_FIELD = re.compile(r"attendees.(\d+).(.+)")
 
-if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
-  outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
-else:
-  outputFile = sys.stdout
+domainSet = frozenset(DOMAIN_LIST)
+
+@functools.lru_cache(maxsize=ATTENDEE_CACHE_SIZE)
+def checkAttendee(email):
+  emailAddress = email.lower()
+  if not emailAddress:
+    return False
+  domain = emailAddress[emailAddress.find('@')+1:]
+  return ((not DOMAIN_LIST or domain in domainSet) and
+          (not ATTENDEE_LIST or emailAddress in ATTENDEE_LIST) and
+          (not ATTENDEE_PATTERN or ATTENDEE_PATTERN.match(emailAddress) is not None))
+
+outputFormat = sinks.getFormat(sys.argv, OUTPUT_FORMAT)
+outputFile = sinks.openOutput(sys.argv[2] if len(sys.argv) > 2 else '-', outputFormat)
 
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
 
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-attendeeFields = set()
-inputFieldnames = []
-for fieldname in inputCSV.fieldnames:
-  mg = ATTENDEES_N_FIELD.match(fieldname)
-  if mg:
-    field = mg.group(2)
-    if (not DROP_ATTENDEE_COLUMNS or field not in DROP_ATTENDEE_COLUMNS) and field not in attendeeFields:
-      attendeeFields.add(field)
-      inputFieldnames.append(f'attendee.{field}')
-  elif not DROP_GENERAL_COLUMNS or fieldname not in DROP_GENERAL_COLUMNS:
-    inputFieldnames.append(fieldname)
-
-outputCSV = csv.DictWriter(outputFile, inputFieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+inputCSV = csv.reader(inputFile, quotechar=QUOTE_CHAR)
+layout = explode.Layout(next(inputCSV, []), ATTENDEES_N_FIELD, 'attendee', DROP_GENERAL_COLUMNS, DROP_ATTENDEE_COLUMNS, 'attendees')
+slotColumns = [(slot.values, slot.column('email')) for slot in layout.slots]
+
+outputCSV = sinks.DictWriter(outputFile, layout.fieldnames, outputFormat, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-for row in inputCSV:
-  baseRow = {}
-  attendees = {}
-  for k, v in iter(row.items()):
-    mg = ATTENDEES_N_FIELD.match(k)
-    if mg:
-      attendees_N = mg.group(1)
-      attendees.setdefault(attendees_N, {})
-      attendees[attendees_N][mg.group(2)] = v
-    elif not DROP_GENERAL_COLUMNS or k not in DROP_GENERAL_COLUMNS:
-      baseRow[k] = v
-  for k, v in iter(attendees.items()):
-    newRow = baseRow.copy()
-    emailAddress = v['email'].lower()
-    if emailAddress:
-      domain = emailAddress[emailAddress.find('@')+1:]
-      if ((not DOMAIN_LIST or domain in DOMAIN_LIST) and
-          (not ATTENDEE_LIST or emailAddress in ATTENDEE_LIST) and
-          (not ATTENDEE_PATTERN or ATTENDEE_PATTERN.match(emailAddress))):
-        for kp, kv in sorted(v.items()):
-          if not DROP_ATTENDEE_COLUMNS or kp not in DROP_ATTENDEE_COLUMNS:
-            newRow[f'attendee.{kp}'] = kv
-        outputCSV.writerow(newRow)
+with instrument.phase('scan'):
+  for row in inputCSV:
+    row = layout.prepare(row)
+    for values, emailColumn in slotColumns[:layout.populated(row)]:
+      if checkAttendee(row[emailColumn]):
+        outputCSV.writevalues(values(row))
+with instrument.phase('write'):
+  outputCSV.close()
 
 if inputFile != sys.stdin:
   inputFile.close()
-if outputFile != sys.stdout:
-  outputFile.close()
+sinks.closeOutput(outputFile)
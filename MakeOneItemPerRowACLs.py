@@ -5,7 +5,7 @@
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
 # Customize: Set USER_LIST, GROUP_LIST. DOMAIN_LIST, ROLE_LIST, TYPE_LIST, DESIRED_ALLOWFILEDISCOVERY,
-#	DROP_GENERAL_COLUMNS, DROP_PERMISSION_COLUMNS.
+#	DROP_GENERAL_COLUMNS, DROP_PERMISSION_COLUMNS, OUTPUT_FORMAT.
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -15,12 +15,21 @@
 #  $ gam redirect csv ./filelistperms.csv user user@domain.com print filelist fields id,name,permissions,mimetype
 # 2: From that list of files, output a CSV file that lists one ACL per row
 #  $ python3 MakeOneItemPerRowACLs.py filelistperms.csv filelistpermsoipr.csv
+#    For a large filelistperms.csv, process it in N processes; the output is the same
+#  $ python3 MakeOneItemPerRowACLs.py filelistperms.csv filelistpermsoipr.csv --jobs N
+#    To write newline-delimited JSON, Parquet or Arrow instead of CSV, set OUTPUT_FORMAT or use --format; see gamlib/sinks.py
+#    --jobs applies to csv and ndjson
+#  $ python3 MakeOneItemPerRowACLs.py filelistperms.csv filelistpermsoipr.parquet --format parquet
 """
 
 import csv
+import functools
 import re
 import sys
 
+from gamlib import explode, instrument, sinks
+from gamlib.parallel import getJobs, runParallel
+
 # Specify specific user(s), e.g., USER_LIST = ['user1@domain.com'] USER_LIST = ['user1@domain.com', 'user2@domain.com']
 # The list should be empty if you're only specifiying domains in DOMAIN_LIST, e.g. USER_LIST = []
 USER_LIST = []
@@ -54,90 +63,93 @@ DROP_GENERAL_COLUMNS = ['permissions']
 # The list should be empty if you want all permission columns, e.g, DROP_PERMISSION_COLUMNS = []
 DROP_PERMISSION_COLUMNS = ['photoLink']
 
+# Output format: 'csv', 'ndjson', 'parquet' or 'arrow'; parquet and arrow require pyarrow
+OUTPUT_FORMAT = 'csv'
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
 PERMISSIONS_N_FIELD = re.compile(r"permissions.(\d+).(.+)")
 
-if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
-  outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
-else:
-  outputFile = sys.stdout
-
-if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
-  inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-else:
-  inputFile = sys.stdin
-
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-permissionFields = set()
-inputFieldnames = []
-for fieldname in inputCSV.fieldnames:
-  mg = PERMISSIONS_N_FIELD.match(fieldname)
-  if mg:
-    field = mg.group(2)
-    if (not DROP_PERMISSION_COLUMNS or field not in DROP_PERMISSION_COLUMNS) and field not in permissionFields:
-      permissionFields.add(field)
-      inputFieldnames.append(f'permission.{field}')
-  elif not DROP_GENERAL_COLUMNS or fieldname not in DROP_GENERAL_COLUMNS:
-    inputFieldnames.append(fieldname)
-
-outputCSV = csv.DictWriter(outputFile, inputFieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
-
-for row in inputCSV:
-  baseRow = {}
-  permissions = {}
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_FIELD.match(k)
-    if mg:
-      permissions_N = mg.group(1)
-      permissions.setdefault(permissions_N, {})
-      permissions[permissions_N][mg.group(2)] = v
-    elif not DROP_GENERAL_COLUMNS or k not in DROP_GENERAL_COLUMNS:
-      baseRow[k] = v
-  for k, v in iter(permissions.items()):
-    newRow = baseRow.copy()
-    if ROLE_LIST and v['role'] not in ROLE_LIST:
-      continue
-    vtype = v['type']
-    if not vtype:
-      continue
-    if TYPE_LIST and vtype not in TYPE_LIST:
-      continue
-    if vtype == 'user':
-      emailAddress = v['emailAddress'].lower()
-      domain = emailAddress[emailAddress.find('@')+1:]
-      if DOMAIN_LIST and domain not in DOMAIN_LIST:
-        continue
-      if USER_LIST and emailAddress not in USER_LIST:
-        continue
-    elif vtype == 'group':
-      emailAddress = v['emailAddress'].lower()
-      domain = emailAddress[emailAddress.find('@')+1:]
-      if DOMAIN_LIST and domain not in DOMAIN_LIST:
-        continue
-      if GROUP_LIST and emailAddress not in GROUP_LIST:
-        continue
-    elif vtype == 'domain':
-      domain = v['domain'].lower()
-      if DOMAIN_LIST and domain not in DOMAIN_LIST:
-        continue
-      if DESIRED_ALLOWFILEDISCOVERY != 'Any':
-        allowFileDiscovery = v.get('allowFileDiscovery', str(row.get('withLink', '') == 'False'))
-        if DESIRED_ALLOWFILEDISCOVERY != allowFileDiscovery:
+domainSet = frozenset(DOMAIN_LIST)
+
+def processCSV(inputFile, outputFile, writeHeader=True, outputFormat='csv'):
+  inputCSV = csv.reader(inputFile, quotechar=QUOTE_CHAR)
+  layout = explode.Layout(next(inputCSV, []), PERMISSIONS_N_FIELD, 'permission', DROP_GENERAL_COLUMNS, DROP_PERMISSION_COLUMNS,
+                          'permissions')
+  withLinkColumn = layout.column('withLink')
+  slotColumns = [(slot.values, slot.column('role'), slot.column('type'), slot.column('emailAddress'), slot.column('domain'),
+                  slot.columns.get('allowFileDiscovery')) for slot in layout.slots]
+
+  outputCSV = sinks.DictWriter(outputFile, layout.fieldnames, outputFormat, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+  if writeHeader:
+    outputCSV.writeheader()
+
+  with instrument.phase('scan'):
+    for row in inputCSV:
+      row = layout.prepare(row)
+      for values, roleColumn, typeColumn, emailAddressColumn, domainColumn, allowFileDiscoveryColumn in slotColumns[:layout.populated(row)]:
+        if ROLE_LIST and row[roleColumn] not in ROLE_LIST:
+          continue
+        vtype = row[typeColumn]
+        if not vtype:
           continue
-    else: # vtype == 'anyone'
-      if DESIRED_ALLOWFILEDISCOVERY != 'Any':
-        allowFileDiscovery = v.get('allowFileDiscovery', str(row.get('withLink', '') == 'False'))
-        if DESIRED_ALLOWFILEDISCOVERY != allowFileDiscovery:
+        if TYPE_LIST and vtype not in TYPE_LIST:
           continue
-    for kp, kv in sorted(v.items()):
-      if not DROP_PERMISSION_COLUMNS or kp not in DROP_PERMISSION_COLUMNS:
-        newRow[f'permission.{kp}'] = kv
-    outputCSV.writerow(newRow)
-
-if inputFile != sys.stdin:
-  inputFile.close()
-if outputFile != sys.stdout:
-  outputFile.close()
+        if vtype == 'user':
+          emailAddress = row[emailAddressColumn].lower()
+          domain = emailAddress[emailAddress.find('@')+1:]
+          if DOMAIN_LIST and domain not in domainSet:
+            continue
+          if USER_LIST and emailAddress not in USER_LIST:
+            continue
+        elif vtype == 'group':
+          emailAddress = row[emailAddressColumn].lower()
+          domain = emailAddress[emailAddress.find('@')+1:]
+          if DOMAIN_LIST and domain not in domainSet:
+            continue
+          if GROUP_LIST and emailAddress not in GROUP_LIST:
+            continue
+        elif vtype == 'domain':
+          domain = row[domainColumn].lower()
+          if DOMAIN_LIST and domain not in domainSet:
+            continue
+          if DESIRED_ALLOWFILEDISCOVERY != 'Any':
+            if allowFileDiscoveryColumn is not None:
+              allowFileDiscovery = row[allowFileDiscoveryColumn]
+            else:
+              allowFileDiscovery = str(row[withLinkColumn] == 'False')
+            if DESIRED_ALLOWFILEDISCOVERY != allowFileDiscovery:
+              continue
+        else: # vtype == 'anyone'
+          if DESIRED_ALLOWFILEDISCOVERY != 'Any':
+            if allowFileDiscoveryColumn is not None:
+              allowFileDiscovery = row[allowFileDiscoveryColumn]
+            else:
+              allowFileDiscovery = str(row[withLinkColumn] == 'False')
+            if DESIRED_ALLOWFILEDISCOVERY != allowFileDiscovery:
+              continue
+        outputCSV.writevalues(values(row))
+  with instrument.phase('write'):
+    outputCSV.close()
+
+if __name__ == '__main__':
+  jobs = getJobs(sys.argv)
+  outputFormat = sinks.getFormat(sys.argv, OUTPUT_FORMAT)
+
+  outputFile = sinks.openOutput(sys.argv[2] if len(sys.argv) > 2 else '-', outputFormat)
+
+  if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
+    inputFile = open(sys.argv[1], 'r', encoding='utf-8')
+  else:
+    inputFile = sys.stdin
+
+  if jobs > 1 and inputFile != sys.stdin and outputFormat not in sinks.BINARY_FORMATS:
+    with instrument.phase('scan'):
+      runParallel(functools.partial(processCSV, outputFormat=outputFormat), sys.argv[1], outputFile, jobs, QUOTE_CHAR)
+  else:
+    processCSV(inputFile, outputFile, outputFormat=outputFormat)
+
+  if inputFile != sys.stdin:
+    inputFile.close()
+  sinks.closeOutput(outputFile)
@@ -4,6 +4,7 @@
 # Note: This script can use GAM7 or Advanced GAM:
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
+# Customize: Set OUTPUT_FORMAT
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -13,19 +14,28 @@
 #  $ gam redirect csv ./filelist.csv user user@domain.com print filelist fields id,name,permissions,parents ...
 # 3: From that list of files, output a CSV file with the same headers but just 'parents,parents.id,parents.isRoot'
 #  $ python3 MakeOneParentPerRow.py filelist.csv filelistoppr.csv
+#    To write newline-delimited JSON, Parquet or Arrow instead of CSV, set OUTPUT_FORMAT or use --format; see gamlib/sinks.py
+#  $ python3 MakeOneParentPerRow.py filelist.csv filelistoppr.parquet --format parquet
 """
 
 import csv
 import re
 import sys
 
+from gamlib import instrument, sinks
+
 ONE_ACL_PER_ROW = False # Set True for one ACL per row
 
+# Output format: 'csv', 'ndjson', 'parquet' or 'arrow'; parquet and arrow require pyarrow
+OUTPUT_FORMAT = 'csv'
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
 PARENTS_N_FIELD = re.compile(r"parents.(\d+).(.*)")
 
+outputFormat = sinks.getFormat(sys.argv, OUTPUT_FORMAT)
+
 if sys.argv[1] != '-':
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
@@ -47,34 +57,33 @@ for k in inputCSV.fieldnames:
     fieldnames.append(k)
     nonParentNFieldNames.append(k)
 
-if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
-  outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
-else:
-  outputFile = sys.stdout
-outputCSV = csv.DictWriter(outputFile, fieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputFile = sinks.openOutput(sys.argv[2] if len(sys.argv) > 2 else '-', outputFormat)
+outputCSV = sinks.DictWriter(outputFile, fieldnames, outputFormat, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-for row in inputCSV:
-  if lastParent >= 0:
-    orow = {}
-    for k in nonParentNFieldNames:
-      orow[k] = row[k]
-    numParents = int(row['parents'])
-    if numParents > 0:
-      orow['parents'] = 1
-      for n in range(0, numParents):
+with instrument.phase('scan'):
+  for row in inputCSV:
+    if lastParent >= 0:
+      orow = {}
+      for k in nonParentNFieldNames:
+        orow[k] = row[k]
+      numParents = int(row['parents'])
+      if numParents > 0:
+        orow['parents'] = 1
+        for n in range(0, numParents):
+          for sk in parentFields:
+            orow[f'parents.{sk}'] = row.get(f'parents.{n}.{sk}', '')
+          outputCSV.writerow(orow)
+      else:
+        orow['parents'] = 0
         for sk in parentFields:
-          orow[f'parents.{sk}'] = row.get(f'parents.{n}.{sk}', '')
+          orow[f'parents.{sk}'] = ''
         outputCSV.writerow(orow)
     else:
-      orow['parents'] = 0
-      for sk in parentFields:
-        orow[f'parents.{sk}'] = ''
-      outputCSV.writerow(orow)
-  else:
-    outputCSV.writerow(row)
+      outputCSV.writerow(row)
+with instrument.phase('write'):
+  outputCSV.close()
 
 if inputFile != sys.stdin:
   inputFile.close()
-if outputFile != sys.stdout:
-  outputFile.close()
+sinks.closeOutput(outputFile)
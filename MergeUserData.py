@@ -12,8 +12,10 @@
 # Note: This script can use GAM7 or Advanced GAM:
 #   https://github.com/GAM-team/GAM
 #   https://github.com/taers232c/GAMADV-XTD3
+#       The rows of Data.csv are indexed by DATA_KEY_FIELD in Data.csv.primaryEmail.lower.lookup, which is reused until Data.csv changes.
+#       For files too large to hold in memory, set JOIN_MODE = 'sort'; the files are sorted in runs of SORT_RUN_ROWS rows on disk instead.
 # Customize: DATA_KEY_FIELD, MERGE_KEY_FIELD, RETAIN_MERGE_KEY_FIELD, MERGE_RETAIN_FIELDS,
-#	     SHOW_ERROR_ON_NO_DATA_ROW, OUTPUT_UNMERGED_DATA
+#	     SHOW_ERROR_ON_NO_DATA_ROW, OUTPUT_UNMERGED_DATA, JOIN_MODE
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -26,7 +28,13 @@
 """
 
 import csv
+import itertools
 import sys
+import tempfile
+
+from gamlib import instrument
+from gamlib.extsort import lastRows, sortRows
+from gamlib.lookupstore import openLookupStore
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
@@ -47,20 +55,33 @@ MERGE_RETAIN_FIELDS = []
 SHOW_ERROR_ON_NO_DATA_ROW = True
 # Should data rows that have not been merged be output
 OUTPUT_UNMERGED_DATA = False
+# How the files are joined
+# 'lookup' - Index the data file by key and look up the key of each merge row
+# 'sort' - Sort both files by key and merge them; for files too large to hold in memory
+JOIN_MODE = 'lookup'
+# Sort join: number of rows sorted in memory at a time; larger files are sorted in runs that are written to
+# temporary files and merged, so memory use is bounded by this number rather than by the size of the files.
+SORT_RUN_ROWS = 500000
+
+ROW_NUMBER_FIELD = '__rowNumber'
 
-userData = {}
 dataFileName = sys.argv[1]
-dataFile = open(dataFileName, 'r', encoding='utf-8')
-dataCSV = csv.DictReader(dataFile, quotechar=QUOTE_CHAR)
-dataFieldNames = dataCSV.fieldnames[:]
+if JOIN_MODE == 'sort':
+  dataFile = open(dataFileName, 'r', encoding='utf-8')
+  dataCSV = csv.DictReader(dataFile, quotechar=QUOTE_CHAR)
+  dataFieldNames = dataCSV.fieldnames[:]
+else:
+  userData = openLookupStore(dataFileName, DATA_KEY_FIELD, QUOTE_CHAR, keyCase='lower' if LOWERCASE_KEY_FIELDS else None)
+  dataFieldNames = userData.fieldnames[:]
 if DATA_KEY_FIELD not in dataFieldNames:
   sys.stderr.write(f'Data key field {DATA_KEY_FIELD} is not in {dataFileName} headers: {",".join(dataFieldNames)}\n')
   sys.exit(1)
-for row in dataCSV:
+
+def getDataRow(k):
+  row = userData.get(k)
   if LOWERCASE_KEY_FIELDS:
-    row[DATA_KEY_FIELD] = row[DATA_KEY_FIELD].lower()
-  userData[row[DATA_KEY_FIELD]] = row
-dataFile.close()
+    row[DATA_KEY_FIELD] = k
+  return row
 
 mergeFileName = sys.argv[2]
 mergeFile = open(mergeFileName, 'r', encoding='utf-8')
@@ -102,24 +123,81 @@ outputFile = open(outputFileName, 'w', encoding='utf-8', newline='')
 outputCSV = csv.DictWriter(outputFile, outputFieldNames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-outputData = {}
+def dataKey(row):
+  return row[DATA_KEY_FIELD]
+
+def mergeKey(row):
+  return row[MERGE_KEY_FIELD]
+
+def lowerKeys(rows, keyField):
+  for row in rows:
+    if LOWERCASE_KEY_FIELDS:
+      row[keyField] = row[keyField].lower()
+    yield row
+
+def numberRows(rows):
+  for rowNumber, row in enumerate(rows):
+    row[ROW_NUMBER_FIELD] = rowNumber
+    yield row
+
 errors = False
-for row in mergeCSV:
-  if LOWERCASE_KEY_FIELDS:
-    row[MERGE_KEY_FIELD] = row[MERGE_KEY_FIELD].lower()
-  k = row[MERGE_KEY_FIELD]
-  if k in userData:
-    orow = userData.pop(k)
-    for fieldName, mappedFieldName  in mergeFieldNameMap.items():
-      orow[mappedFieldName] = row[fieldName]
-    outputData[k] = orow
-  elif SHOW_ERROR_ON_NO_DATA_ROW:
+# Sort join: rows are merged in key order, the order of the output; the merge rows in error are saved with their row numbers
+# and sorted back into merge file order so that the error messages are in the same order as for the lookup join
+if JOIN_MODE == 'sort':
+  errorFile = tempfile.TemporaryFile('w+', encoding='utf-8', newline='')
+  errorCSV = csv.writer(errorFile, lineterminator='\n')
+  dataGroups = lastRows(sortRows(lowerKeys(dataCSV, DATA_KEY_FIELD), dataKey, dataCSV.fieldnames, SORT_RUN_ROWS), dataKey)
+  mergeGroups = itertools.groupby(sortRows(numberRows(lowerKeys(mergeCSV, MERGE_KEY_FIELD)), mergeKey,
+                                           mergeCSV.fieldnames+[ROW_NUMBER_FIELD], SORT_RUN_ROWS), mergeKey)
+  with instrument.phase('scan'):
+    dataGroup = next(dataGroups, None)
+    mergeGroup = next(mergeGroups, None)
+    while dataGroup or mergeGroup:
+      if mergeGroup is None or (dataGroup and dataGroup[0] < mergeGroup[0]):
+        if OUTPUT_UNMERGED_DATA:
+          outputCSV.writerow(dataGroup[1])
+        dataGroup = next(dataGroups, None)
+        continue
+      k, mergeRows = mergeGroup
+      if dataGroup and dataGroup[0] == k:
+        orow = dataGroup[1]
+        row = next(mergeRows)
+        for fieldName, mappedFieldName  in mergeFieldNameMap.items():
+          orow[mappedFieldName] = row[fieldName]
+        outputCSV.writerow(orow)
+        dataGroup = next(dataGroups, None)
+      if SHOW_ERROR_ON_NO_DATA_ROW:
+        for row in mergeRows:
+          errorCSV.writerow([row[ROW_NUMBER_FIELD], k])
+      mergeGroup = next(mergeGroups, None)
+  errorFile.seek(0)
+  for row in sortRows(csv.DictReader(errorFile, ['row', 'key']), lambda row: int(row['row']), ['row', 'key'], SORT_RUN_ROWS):
     errors = 1
-    sys.stderr.write(f'Merge key field {row[MERGE_KEY_FIELD]} in {mergeFileName} does not occur in {dataFileName}\n')
-if OUTPUT_UNMERGED_DATA:
-  outputData.update(userData)
-for _, v in sorted(iter(outputData.items())):
-  outputCSV.writerow(v)
+    sys.stderr.write(f'Merge key field {row["key"]} in {mergeFileName} does not occur in {dataFileName}\n')
+  errorFile.close()
+  dataFile.close()
+else:
+  outputData = {}
+  with instrument.phase('scan'):
+    for row in mergeCSV:
+      if LOWERCASE_KEY_FIELDS:
+        row[MERGE_KEY_FIELD] = row[MERGE_KEY_FIELD].lower()
+      k = row[MERGE_KEY_FIELD]
+      if k in userData and k not in outputData:
+        orow = getDataRow(k)
+        for fieldName, mappedFieldName  in mergeFieldNameMap.items():
+          orow[mappedFieldName] = row[fieldName]
+        outputData[k] = orow
+      elif SHOW_ERROR_ON_NO_DATA_ROW:
+        errors = 1
+        sys.stderr.write(f'Merge key field {row[MERGE_KEY_FIELD]} in {mergeFileName} does not occur in {dataFileName}\n')
+  with instrument.phase('write'):
+    if OUTPUT_UNMERGED_DATA:
+      for k in userData.keys():
+        if k not in outputData:
+          outputData[k] = getDataRow(k)
+    for _, v in sorted(iter(outputData.items())):
+      outputCSV.writerow(v)
 
 mergeFile.close()
 outputFile.close()
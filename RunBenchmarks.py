@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Benchmark scripts on synthetic GAM exports and record rows/second and peak memory for comparison across revisions
+# Note: The synthetic exports are written by gamlib/synthetic.py to DATA_DIRECTORY and reused by later runs.
+#       Each script is run in its own process with GAMSCRIPTS_STATS=1, see gamlib/instrument.py;
+#       caches that scripts keep next to their input, e.g., GroupMembers.csv.groupgraph, are deleted before each run.
+#       One JSON line per run is appended to RESULTS_FILENAME with the git revision, script, rows, time and peak RSS.
+# Customize: BENCHMARKS, SIZES, DATA_DIRECTORY, RESULTS_FILENAME
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+# 1: Run all of the benchmarks on 10k row exports
+#  $ python3 RunBenchmarks.py 10k
+# 2: Run selected scripts on 1m row exports
+#  $ python3 RunBenchmarks.py 1m GetNonDomainDriveACLs.py ShowNestedGroupTree.py
+"""
+
+import datetime
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+from gamlib.synthetic import GENERATORS
+
+# (script, data set, data set arguments, script arguments)
+# In the script arguments, {input} is replaced by the data set's CSV file, {orgunits} by the org units file of the
+# orgunits data set and {output} by an output file in a temporary directory
+BENCHMARKS = [
+  ('GetNonDomainDriveACLs.py', 'filelist', {'permissionsWidth': 10}, ['{input}', '{output}']),
+  ('GetUserShareCounts.py', 'filelist', {'permissionsWidth': 10}, ['{input}', '{output}']),
+  ('MakeOneItemPerRowACLs.py', 'filelist', {'permissionsWidth': 10}, ['{input}', '{output}']),
+  ('DeleteDuplicateFiles.py', 'filelist', {'permissionsWidth': 10}, ['{input}', '{output}']),
+  ('GetTeamDriveCountsSize.py', 'filelist', {'permissionsWidth': 10}, ['{input}', '{input}', '{output}']),
+  ('GetDailyMimeTypeCreations.py', 'filelist', {'permissionsWidth': 10}, ['{input}', '{output}']),
+  ('DeleteDuplicateRows.py', 'filelist', {'permissionsWidth': 10}, ['{input}', '{output}']),
+  ('ShowNestedGroupTree.py', 'groupmembers', {'depth': 6, 'cycles': 3}, ['{input}', 'indented', '{output}']),
+  ('GetGroupTypeCounts.py', 'groupmembers', {'depth': 6, 'cycles': 3}, ['{input}', '{output}']),
+  ('PrintOrgUnitTree.py', 'orgunits', {'orgUnits': 500, 'depth': 4}, ['{orgunits}', '{input}', '{output}']),
+  ('MakeOneAttendeePerRowEvents.py', 'events', {'attendeesWidth': 10}, ['{input}', '{output}']),
+  ]
+SIZES = {'10k': 10000, '100k': 100000, '1m': 1000000, '10m': 10000000}
+DATA_DIRECTORY = './BenchmarkData'
+RESULTS_FILENAME = './BenchmarkResults.jsonl'
+
+STATS_ENV_VAR = 'GAMSCRIPTS_STATS'
+MANIFEST_FILENAME = 'files.json'
+
+scriptDirectory = os.path.dirname(os.path.abspath(__file__))
+
+def getRevision():
+  try:
+    return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=scriptDirectory, capture_output=True,
+                          text=True, check=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return ''
+
+def getDataSet(name, arguments, rows):
+  """Files of the data set, written on first use"""
+  directory = os.path.join(os.path.abspath(DATA_DIRECTORY), '-'.join([name, str(rows)]+[f'{k}{v}' for k, v in sorted(arguments.items())]))
+  manifestFileName = os.path.join(directory, MANIFEST_FILENAME)
+  try:
+    with open(manifestFileName, 'r', encoding='utf-8') as manifestFile:
+      return json.load(manifestFile)
+  except (OSError, ValueError):
+    pass
+  os.makedirs(directory, exist_ok=True)
+  sys.stderr.write(f'Writing {name} data set, {rows} rows, to {directory}\n')
+  files = GENERATORS[name](directory, rows, **arguments)
+  with open(manifestFileName, 'w', encoding='utf-8') as manifestFile:
+    json.dump(files, manifestFile)
+  return files
+
+def deleteCaches(files):
+  for fileName in files.values():
+    for cacheFileName in glob.glob(glob.escape(fileName)+'.*'):
+      os.remove(cacheFileName)
+
+def runBenchmark(script, files, scriptArguments, outputDirectory):
+  """Return code, summary of gamlib/instrument.py or None and last line of stderr for one run of script"""
+  deleteCaches(files)
+  substitutions = dict(files, output=os.path.join(outputDirectory, 'output'))
+  command = [sys.executable, os.path.join(scriptDirectory, 'gamlib', 'instrument.py'), os.path.join(scriptDirectory, script)]
+  command.extend(argument.format(**substitutions) for argument in scriptArguments)
+  result = subprocess.run(command, cwd=outputDirectory, env=dict(os.environ, **{STATS_ENV_VAR: '1'}),
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+  summary = None
+  errors = []
+  for line in result.stderr.splitlines():
+    if line.startswith('{'):
+      try:
+        summary = json.loads(line)
+        continue
+      except ValueError:
+        pass
+    errors.append(line)
+  return result.returncode, summary, errors[-1] if errors else ''
+
+if len(sys.argv) < 2 or (sys.argv[1] not in SIZES and not sys.argv[1].isdigit()):
+  sys.stderr.write(f'Usage: python3 RunBenchmarks.py {"|".join(SIZES)}|<rows> [Script.py ...]\n')
+  sys.exit(2)
+rows = SIZES.get(sys.argv[1]) or int(sys.argv[1])
+selectedScripts = set(sys.argv[2:])
+revision = getRevision()
+
+with open(RESULTS_FILENAME, 'a', encoding='utf-8') as resultsFile:
+  for script, dataSet, dataSetArguments, scriptArguments in BENCHMARKS:
+    if selectedScripts and script not in selectedScripts:
+      continue
+    files = getDataSet(dataSet, dataSetArguments, rows)
+    with tempfile.TemporaryDirectory() as outputDirectory:
+      returnCode, summary, error = runBenchmark(script, files, scriptArguments, outputDirectory)
+    record = {'time': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+              'revision': revision, 'python': platform.python_version(),
+              'script': script, 'dataSet': dataSet, 'dataSetArguments': dataSetArguments, 'rows': rows,
+              'returnCode': returnCode}
+    if returnCode:
+      record['error'] = error
+    if summary:
+      wall = summary['wallSeconds']
+      record.update({'wallSeconds': wall, 'cpuSeconds': summary['cpuSeconds'],
+                     'rowsPerSecond': round(rows/wall) if wall > 0 else None, 'peakRSSKiB': summary['peakRSSKiB'],
+                     'rowsRead': summary['rowsRead'], 'rowsWritten': summary['rowsWritten'], 'phases': summary['phases']})
+    resultsFile.write(json.dumps(record)+'\n')
+    resultsFile.flush()
+    if summary and not returnCode:
+      sys.stdout.write(f'{script:40} {dataSet:14} {rows:>10} rows {record["wallSeconds"]:>9.2f}s '
+                       f'{record["rowsPerSecond"] or 0:>10} rows/s {record["peakRSSKiB"] or 0:>10} KiB\n')
+    else:
+      sys.stdout.write(f'{script:40} {dataSet:14} {rows:>10} rows failed, return code {returnCode}: {error}\n')
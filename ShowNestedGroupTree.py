@@ -4,6 +4,7 @@
 # Note: This script can use GAM7 or Advanced GAM:
 #       https://github.com/GAM-team/GAM                                                                                                                               
 #	https://github.com/taers232c/GAMADV-XTD3
+#       The group membership read from GroupMembers.csv is saved in GroupMembers.csv.groupgraph and reused while GroupMembers.csv is unchanged.
 # Customize: INDENTED_INDENTATION, JSON_INDENTATION, LIST_DELIMITER
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
@@ -25,6 +26,9 @@ import csv
 import json
 import sys
 
+from gamlib import instrument
+from gamlib.groupgraph import readGroupGraph
+
 QUOTE_CHAR = '"' # Adjust as needed
 
 INDENTED = 'indented'
@@ -38,33 +42,21 @@ INDENTED_INDENTATION = 2
 JSON_INDENTATION = 1
 LIST_DELIMITER = ','
 
-def printIndentedGroupTree(email, depth):
-  outputFile.write(' '*depth+email+'\n')
-  for member in sorted(Groups.get(email, [])):
-    if member[1] == 'GROUP':
-      printIndentedGroupTree(member[0], depth+INDENTED_INDENTATION)
-
-def printListGroupTree(email, nestedList):
-  nestedList.append(email)
-  memberList = [member[0] for member in sorted(Groups.get(email, [])) if member[1] == 'GROUP']
-  if memberList:
-    for member in memberList:
-      printListGroupTree(member, nestedList)
-      nestedList.pop()
-  else:
-    outputFile.write(LIST_DELIMITER.join(nestedList)+'\n')
-
-def printJSONGroupTree(email, nestedList):
-  nestedList.append(email)
-  memberList = [member[0] for member in sorted(Groups.get(email, [])) if member[1] == 'GROUP']
-  if memberList:
-    for member in memberList:
-      printJSONGroupTree(member, nestedList)
-      nestedList.pop()
-  else:
-    groupJSONList.append({nestedList[0]: nestedList[1:]})
+def printIndentedGroupTree(email):
+  for path, _ in graph.walk(email):
+    outputFile.write(' '*(INDENTED_INDENTATION*(len(path)-1))+path[-1]+'\n')
 
-Groups = {}
+def printListGroupTree(email):
+  for path, isLeaf in graph.walk(email):
+    if isLeaf:
+      outputFile.write(LIST_DELIMITER.join(path)+'\n')
+
+def printJSONGroupTree(email):
+  for path, isLeaf in graph.walk(email):
+    if isLeaf:
+      groupJSONList.append({path[0]: path[1:]})
+
+emptyGroups = []
 
 i = 3
 if (len(sys.argv) > i) and (sys.argv[i].lower()  == 'empty'):
@@ -72,7 +64,7 @@ if (len(sys.argv) > i) and (sys.argv[i].lower()  == 'empty'):
   if len(sys.argv) > i:
     inputFile = open(sys.argv[i], 'r', encoding='utf-8')
     for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-      Groups[row.get('email', row.get('Email', 'Unknown'))] =  []
+      emptyGroups.append(row.get('email', row.get('Email', 'Unknown')))
     inputFile.close()
   else:
     sys.stderr.write('Missing filename after option empty\n')
@@ -94,24 +86,23 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-
-for row in inputCSV:
-  group = row['group']
-  Groups.setdefault(group, [])
-  Groups[group].append((row['email'], row['type']))
-if mode == INDENTED:
-  for group in sorted(Groups):
-    printIndentedGroupTree(group, 0)
-elif mode == JSON:
-  groupJSONList = []
-  for group in sorted(Groups):
-    printJSONGroupTree(group, [])
-  json.dump(groupJSONList, outputFile, indent=JSON_INDENTATION, sort_keys=True)
-  outputFile.write('\n')
-else: # mode == LIST
-  for group in sorted(Groups):
-    printListGroupTree(group, [])
+graph = readGroupGraph(inputFile, QUOTE_CHAR)
+for group in emptyGroups:
+  graph.addGroup(group)
+
+with instrument.phase('write'):
+  if mode == INDENTED:
+    for group in graph.groups():
+      printIndentedGroupTree(group)
+  elif mode == JSON:
+    groupJSONList = []
+    for group in graph.groups():
+      printJSONGroupTree(group)
+    json.dump(groupJSONList, outputFile, indent=JSON_INDENTATION, sort_keys=True)
+    outputFile.write('\n')
+  else: # mode == LIST
+    for group in graph.groups():
+      printListGroupTree(group)
 
 if inputFile != sys.stdin:
   inputFile.close()
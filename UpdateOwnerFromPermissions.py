@@ -9,14 +9,14 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_ROLE = re.compile(r"permissions.(\d+).role")
-
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -26,19 +26,19 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-
-outputCSV = csv.DictWriter(outputFile, inputCSV.fieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
-
-for row in inputCSV:
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_ROLE.match(k)
-    if mg and v == 'owner':
-      permissions_N = mg.group(1)
-      row['Owner'] = row[f'permissions.{permissions_N}.emailAddress']
-      break
-  outputCSV.writerow(row)
+layout, rows = readFileList(inputFile, QUOTE_CHAR, keyField='role')
+
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(layout.fieldnames)
+
+ownerColumn = layout.index('Owner')
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      if row[slot.role] == 'owner':
+        row[ownerColumn] = row[slot.emailAddress]
+        break
+    outputCSV.writerow(row)
 
 if inputFile != sys.stdin:
   inputFile.close()
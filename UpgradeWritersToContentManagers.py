@@ -21,14 +21,14 @@
 """
 
 import csv
-import re
 import sys
 
+from gamlib import instrument
+from gamlib.filelistcache import readFileList
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -41,20 +41,22 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      role = row[f'permissions.permissions_N{}.role']
-      if role != 'writer' or v not in ['user', 'group']:
-        continue
-      if row.get(f'permissions.{permissions_N}.deleted')) == 'True':
-        continue
-      outputCSV.writerow({'teamDriveId': row['id'],
-                          'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                          'type': v,
-                          'emailAddress': row[f'permissions.{permissions_N}.emailAddress']})
+layout, rows = readFileList(inputFile, QUOTE_CHAR)
+getDriveId = layout.getter('id')
+with instrument.phase('scan'):
+  for row in rows:
+    for slot in layout.populatedSlots(row):
+      v = row[slot.type]
+      if v:
+        role = row[slot.role]
+        if role != 'writer' or v not in ['user', 'group']:
+          continue
+        if slot.isDeleted(row):
+          continue
+        outputCSV.writerow({'teamDriveId': getDriveId(row),
+                            'permissionId': f'id:{row[slot.id]}',
+                            'type': v,
+                            'emailAddress': row[slot.emailAddress]})
 
 if inputFile != sys.stdin:
   inputFile.close()
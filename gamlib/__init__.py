@@ -0,0 +1,9 @@
+"""
+# Purpose: Shared helpers for the scripts in this directory
+# Note: The scripts import these modules from the directory they are run from;
+#       keep the gamlib directory next to the scripts when copying them elsewhere.
+"""
+
+from gamlib import instrument
+
+instrument.enableFromEnvironment()
@@ -0,0 +1,236 @@
+"""
+# Purpose: Produce several Drive ACL reports from one pass over a GAM print filelist CSV
+#          Each permission of a row is decoded once and handed to every report;
+#          the reports reproduce the output of the corresponding single-report scripts:
+#          NonDomainDriveACLs - GetNonDomainDriveACLs.py
+#          SharedWithAnyoneDriveACLs - GetSharedWithAnyoneDriveACLs.py
+#          LinkSharedDriveACLs - GetLinkSharedDriveACLs.py
+#          AllowFileDiscoveryDriveACLs - GetAllowFileDiscoveryDriveACLs.py
+#          SharedWithDomainDriveACLs - GetSharedWithDomainDriveACLs.py
+#          UserShareCounts - GetUserShareCounts.py
+# Usage:
+#  runReports(inputFile, [NonDomainDriveACLs('NonDomainDriveACLs.csv', domainList=['domain.com']),
+#                         SharedWithAnyoneDriveACLs('SharedWithAnyoneDriveACLs.csv')])
+"""
+
+import csv
+import os
+
+from gamlib import instrument
+from gamlib.domains import DomainFilter
+from gamlib.filelistcache import readFileList
+
+FILE_NAME = 'name'
+ALT_FILE_NAME = 'title'
+
+class Permission():
+  """The fields of a permissions.N slot of a row that the reports share
+
+  emailAddress is lower case and set for user and group permissions,
+  domain is lower case: the domain of a domain permission or of the emailAddress of a user or group permission,
+  allowFileDiscovery is set for domain and anyone permissions.
+  """
+
+  __slots__ = ['slot', 'type', 'role', 'id', 'deleted', 'emailAddress', 'domain', 'allowFileDiscovery']
+
+  def __init__(self, slot, row, ptype):
+    self.slot = slot
+    self.type = ptype
+    self.role = row[slot.role]
+    self.id = row[slot.id]
+    if ptype in ['user', 'group']:
+      self.deleted = slot.isDeleted(row)
+      self.emailAddress = row[slot.emailAddress].lower()
+      self.domain = self.emailAddress[self.emailAddress.find('@')+1:]
+      self.allowFileDiscovery = ''
+    else:
+      self.deleted = False
+      self.emailAddress = ''
+      self.domain = slot.get(row, 'domain').lower() if ptype == 'domain' else ''
+      self.allowFileDiscovery = slot.getAllowFileDiscovery(row)
+
+def decodePermissions(layout, row):
+  """Permission for each populated permissions.N slot of row"""
+  return [Permission(slot, row, row[slot.type]) for slot in layout.populatedSlots(row) if row[slot.type]]
+
+class DriveACLReport():
+  """Base class of the reports: opening and closing the report's own CSV file and the file columns of its rows
+
+  Each report defines processRow(row, permissions), which runReports calls for every row with the row's
+  decoded permissions and which writes the rows the report selects to self.outputCSV.
+  """
+
+  headers = []
+
+  def __init__(self, outputFileName):
+    self.outputFileName = outputFileName
+    self.outputFile = self.outputCSV = None
+
+  def open(self, layout, outputDir, quoteChar, lineTerminator):
+    self.getOwner = layout.getter('owners.0.emailAddress')
+    self.getFileId = layout.getter('id')
+    self.getFileName = layout.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+    self.getMimeType = layout.getter('mimeType')
+    self.outputFile = open(os.path.join(outputDir, self.outputFileName), 'w', encoding='utf-8', newline='')
+    self.outputCSV = csv.writer(self.outputFile, lineterminator=lineTerminator, quotechar=quoteChar)
+    self.outputCSV.writerow(self.headers)
+
+  def fileColumns(self, row):
+    return [self.getOwner(row), self.getFileId(row), self.getFileName(row), self.getMimeType(row)]
+
+  def close(self):
+    self.outputFile.close()
+
+class NonDomainDriveACLs(DriveACLReport):
+  headers = ['Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
+             'permissionId', 'role', 'type', 'emailAddress', 'domain', 'allowFileDiscovery']
+
+  def __init__(self, outputFileName, domainList=None, domainExpressions=None, exclusiveDomains=True, includeAnyone=True):
+    super().__init__(outputFileName)
+    self.domainList = domainList or []
+    self.domainExpressions = domainExpressions or []
+    self.exclusiveDomains = exclusiveDomains
+    self.includeAnyone = includeAnyone
+    self.checkDomain = DomainFilter(self.domainList, self.domainExpressions, exclusiveDomains).check
+
+  def processRow(self, row, permissions):
+    for perm in permissions:
+      if perm.deleted:
+        continue
+      if perm.type not in ['domain', 'user', 'group'] and not self.includeAnyone: #anyone
+        continue
+      if ((perm.type == 'anyone') or # Can only be true if includeAnyone = True
+          self.checkDomain(perm.domain)):
+        self.outputCSV.writerow(self.fileColumns(row)+
+                                [f'id:{perm.id}', perm.role, perm.type, perm.emailAddress, perm.domain, perm.allowFileDiscovery])
+
+class SharedWithAnyoneDriveACLs(DriveACLReport):
+  headers = ['Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
+             'permissionId', 'role', 'allowFileDiscovery']
+
+  def __init__(self, outputFileName, desiredAllowFileDiscovery='Any'):
+    super().__init__(outputFileName)
+    self.desiredAllowFileDiscovery = desiredAllowFileDiscovery
+
+  def processRow(self, row, permissions):
+    for perm in permissions:
+      if perm.type == 'anyone' and self.desiredAllowFileDiscovery in ('Any', perm.allowFileDiscovery):
+        self.outputCSV.writerow(self.fileColumns(row)+[f'id:{perm.id}', perm.role, perm.allowFileDiscovery])
+
+class LinkSharedDriveACLs(DriveACLReport):
+  headers = ['Owner', 'driveFileId', 'driveFileTitle', 'mimeType', 'permissionId', 'role', 'allowFileDiscovery',
+             'resourceKey', 'linkShareMetadata.securityUpdateEligible', 'linkShareMetadata.securityUpdateEnabled',
+             'webViewLink']
+
+  def open(self, layout, outputDir, quoteChar, lineTerminator):
+    super().open(layout, outputDir, quoteChar, lineTerminator)
+    self.getLinkColumns = [layout.getter(field) for field in self.headers[7:]]
+
+  def processRow(self, row, permissions):
+    for perm in permissions:
+      if perm.type in {'anyone', 'domain'} and perm.allowFileDiscovery == 'False':
+        self.outputCSV.writerow(self.fileColumns(row)+[f'id:{perm.id}', perm.role, perm.allowFileDiscovery]+
+                                [getter(row) for getter in self.getLinkColumns])
+
+class AllowFileDiscoveryDriveACLs(DriveACLReport):
+  headers = ['Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
+             'permissionId', 'role', 'type', 'allowFileDiscovery', 'domain']
+
+  def processRow(self, row, permissions):
+    for perm in permissions:
+      if perm.type in {'anyone', 'domain'} and perm.allowFileDiscovery == 'True':
+        self.outputCSV.writerow(self.fileColumns(row)+
+                                [f'id:{perm.id}', perm.role, perm.type, perm.allowFileDiscovery, perm.slot.get(row, 'domain')])
+
+class SharedWithDomainDriveACLs(DriveACLReport):
+  headers = ['Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
+             'permissionId', 'role', 'domain', 'allowFileDiscovery']
+
+  def __init__(self, outputFileName, domainList=None, desiredAllowFileDiscovery='Any'):
+    super().__init__(outputFileName)
+    self.domainList = domainList or []
+    self.domainSet = frozenset(self.domainList)
+    self.desiredAllowFileDiscovery = desiredAllowFileDiscovery
+
+  def processRow(self, row, permissions):
+    for perm in permissions:
+      if (perm.type == 'domain' and
+          (not self.domainList or perm.domain in self.domainSet) and
+          (self.desiredAllowFileDiscovery in ('Any', perm.allowFileDiscovery))):
+        self.outputCSV.writerow(self.fileColumns(row)+[f'id:{perm.id}', perm.role, perm.domain, perm.allowFileDiscovery])
+
+class UserShareCounts(DriveACLReport):
+  TOTAL_COUNTER = 'Total'
+  SHARED_COUNTER = 'Shared'
+  SHARED_EXTERNAL_COUNTER = 'Shared External'
+  SHARED_INTERNAL_COUNTER = 'Shared Internal'
+  COUNTERS = [TOTAL_COUNTER, SHARED_COUNTER, SHARED_EXTERNAL_COUNTER, SHARED_INTERNAL_COUNTER]
+  CATEGORIES = ['anyone', 'anyoneWithLink',
+                'externalDomain', 'externalDomainWithLink',
+                'internalDomain', 'internalDomainWithLink',
+                'externalGroup', 'internalGroup',
+                'externalUser', 'internalUser',
+                'deletedGroup', 'deletedUser']
+  COUNT_CATEGORIES = {
+    'anyone': {False: 'anyone', True: 'anyoneWithLink'},
+    'domain': {False: {False: 'externalDomain', True: 'externalDomainWithLink'}, True: {False: 'internalDomain', True: 'internalDomainWithLink'}},
+    'group': {False: 'externalGroup', True: 'internalGroup'},
+    'user': {False: 'externalUser', True: 'internalUser'},
+    'deleted': {'group': 'deletedGroup', 'user': 'deletedUser'},
+    }
+  headers = ['Owner']+COUNTERS+CATEGORIES
+
+  def __init__(self, outputFileName, domainList=None, linkField='allowFileDiscovery', linkValue='False'):
+    super().__init__(outputFileName)
+    self.domainList = domainList or []
+    self.domainSet = frozenset(self.domainList)
+    self.linkField = linkField
+    self.linkValue = linkValue
+    self.userShareCounts = {}
+
+  def processRow(self, row, permissions):
+    counts = self.userShareCounts.setdefault(self.getOwner(row), dict.fromkeys(self.COUNTERS+self.CATEGORIES, 0))
+    counterSet = set()
+    for perm in permissions:
+      if perm.role == 'owner':
+        counterSet.add(self.TOTAL_COUNTER)
+        continue
+      counterSet.add(self.SHARED_COUNTER)
+      v = perm.type
+      if v == 'anyone':
+        counterSet.add(self.SHARED_EXTERNAL_COUNTER)
+        counts[self.COUNT_CATEGORIES[v][perm.slot.get(row, self.linkField) == self.linkValue]] += 1
+        continue
+      domain = perm.slot.get(row, 'domain').lower()
+      if not domain and v in ['user', 'group']:
+        if perm.deleted:
+          counts[self.COUNT_CATEGORIES['deleted'][v]] += 1
+          continue
+        domain = perm.domain
+      internal = domain in self.domainSet
+      counterSet.add([self.SHARED_EXTERNAL_COUNTER, self.SHARED_INTERNAL_COUNTER][internal])
+      if v == 'domain':
+        counts[self.COUNT_CATEGORIES[v][internal][perm.slot.get(row, self.linkField) == self.linkValue]] += 1
+      else: # group, user
+        counts[self.COUNT_CATEGORIES[v][internal]] += 1
+    for counter in counterSet:
+      counts[counter] += 1
+
+  def close(self):
+    for owner, counts in sorted(iter(self.userShareCounts.items())):
+      self.outputCSV.writerow([owner]+[counts[field] for field in self.headers[1:]])
+    super().close()
+
+def runReports(inputFile, reports, outputDir='.', quoteChar='"', lineTerminator='\n'):
+  """Read inputFile once, decoding each row's permissions once, and feed every report"""
+  layout, rows = readFileList(inputFile, quoteChar)
+  for report in reports:
+    report.open(layout, outputDir, quoteChar, lineTerminator)
+  processors = [report.processRow for report in reports]
+  with instrument.phase('scan'):
+    for row in rows:
+      permissions = decodePermissions(layout, row)
+      for processRow in processors:
+        processRow(row, permissions)
+  for report in reports:
+    report.close()
@@ -0,0 +1,65 @@
+"""
+# Purpose: Count the rows and total an integer column by key, e.g., files and bytes by Shared Drive
+# Note: When NumPy is installed, rows are taken in batches: keys are coded as integers in order of first appearance
+#       and the counts and totals are reduced over int64 arrays; otherwise the rows are totaled one at a time.
+#       Both give the same result. Rows with an empty key are skipped, an empty value counts as 0.
+# Usage:
+#  totals = countAndSum(inputCSV.rows('driveId', 'size'))
+#  for driveId, (count, size) in totals.items():
+#    ...
+"""
+
+import itertools
+import operator
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+BATCH_ROWS = 1 << 18
+
+def countAndSumRows(rows):
+  """Pure Python countAndSum"""
+  totals = {}
+  for key, value in rows:
+    if not key:
+      continue
+    total = totals.get(key)
+    if total is None:
+      total = totals[key] = [0, 0]
+    total[0] += 1
+    if value:
+      total[1] += int(value)
+  return {key: tuple(total) for key, total in totals.items()}
+
+def countAndSumBatches(rows, batchRows):
+  """NumPy countAndSum"""
+  keyOf = operator.itemgetter(0)
+  valueOf = operator.itemgetter(1)
+  codes = {}
+  counts = numpy.zeros(0, dtype=numpy.int64)
+  sums = numpy.zeros(0, dtype=numpy.int64)
+  rows = iter(rows)
+  while True:
+    batch = list(itertools.islice(rows, batchRows))
+    if not batch:
+      break
+    keys = list(map(keyOf, batch))
+    for key in dict.fromkeys(keys):
+      if key not in codes:
+        codes[key] = len(codes)
+    if len(codes) > len(counts):
+      counts = numpy.concatenate((counts, numpy.zeros(len(codes)-len(counts), dtype=numpy.int64)))
+      sums = numpy.concatenate((sums, numpy.zeros(len(codes)-len(sums), dtype=numpy.int64)))
+    keyCodes = numpy.fromiter(map(codes.__getitem__, keys), dtype=numpy.intp, count=len(keys))
+    values = numpy.fromiter(map(int, [value or 0 for value in map(valueOf, batch)]), dtype=numpy.int64, count=len(keys))
+    counts += numpy.bincount(keyCodes, minlength=len(codes))
+    numpy.add.at(sums, keyCodes, values)
+  return {key: (int(counts[code]), int(sums[code])) for key, code in codes.items() if key}
+
+def countAndSum(rows, batchRows=BATCH_ROWS, useNumPy=True):
+  """{key: (rows, total of values)} for (key, value) rows, keys in order of first appearance"""
+  if numpy is None or not useNumPy:
+    return countAndSumRows(rows)
+  return countAndSumBatches(rows, batchRows)
@@ -0,0 +1,68 @@
+"""
+# Purpose: Select the values of a set of columns, e.g., the attendees.N.email columns, that pass a test,
+#          running the test once per distinct value rather than once per cell
+# Note: Rows are taken in blocks of BLOCK_ROWS; the distinct values of the columns in a block that have no verdict yet
+#       are tested together, and the verdicts are applied back to the rows of the block with set and dict lookups.
+#       Verdicts are kept across blocks until there are CACHE_SIZE of them; the cache then keeps only those of the current block.
+#       Rows are padded to width and blank rows are skipped, as csv.DictReader does.
+# Usage:
+#  matcher = BlockMatcher(emailColumns, lambda address: address.lower() in OldContacts)
+#  for row, addresses in matcher.match(inputCSV, len(header)):
+#    ...
+"""
+
+import itertools
+
+from gamlib.explode import valuesGetter
+
+BLOCK_ROWS = 10000
+CACHE_SIZE = 262144
+
+class BlockMatcher():
+  """Values of columns for which test(value) is true, tested once per distinct value"""
+
+  def __init__(self, columns, test, blockRows=BLOCK_ROWS, cacheSize=CACHE_SIZE):
+    self.getValues = valuesGetter(list(columns))
+    self.test = test
+    self.blockRows = blockRows
+    self.cacheSize = cacheSize
+    self.verdicts = {}
+
+  def resolve(self, values):
+    """Test the values that have no verdict; return the values that pass"""
+    verdicts = self.verdicts
+    unresolved = [value for value in values if value not in verdicts]
+    if len(verdicts)+len(unresolved) > self.cacheSize:
+      verdicts = self.verdicts = {value: verdicts[value] for value in values if value in verdicts}
+    test = self.test
+    for value in unresolved:
+      verdicts[value] = bool(test(value))
+    return {value for value in values if verdicts[value]}
+
+  def blocks(self, rows, width):
+    """Yield the non-blank rows, padded to width, in lists of at most blockRows; a block of blank rows yields an empty list"""
+    rows = iter(rows)
+    while True:
+      block = []
+      count = 0
+      for count, row in enumerate(itertools.islice(rows, self.blockRows), 1):
+        if not row:
+          continue
+        if len(row) < width:
+          row += ['']*(width-len(row))
+        block.append(row)
+      if not count:
+        return
+      yield block
+
+  def match(self, rows, width=0):
+    """Yield (row, values that pass, in column order) for the rows with at least one value that passes"""
+    getValues = self.getValues
+    for block in self.blocks(rows, width):
+      cells = list(map(getValues, block))
+      matched = self.resolve(set(itertools.chain.from_iterable(cells)))
+      if not matched:
+        continue
+      for row, values in zip(block, cells):
+        if not matched.isdisjoint(values):
+          yield row, [value for value in values if value in matched]
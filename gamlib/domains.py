@@ -0,0 +1,71 @@
+"""
+# Purpose: Check domains against DOMAIN_LIST and DOMAIN_EXPRESSIONS as checkDomain() in the domain filter scripts does
+# Note: DOMAIN_LIST is held as a set and the DOMAIN_EXPRESSIONS are merged into one alternation per set of regex flags,
+#       so a domain is checked with one lookup and one search instead of a list scan and a loop over the expressions.
+#       Verdicts are kept per domain in an LRU cache of CACHE_SIZE domains; an export has few distinct domains
+#       but may have millions of permissions.
+#       An expression with a group is searched on its own, as merging would renumber its groups and break
+#       the back references and conditional references to them.
+# Usage:
+#  checkDomain = DomainFilter(DOMAIN_LIST, DOMAIN_EXPRESSIONS, EXCLUSIVE_DOMAINS).check
+#  if checkDomain(domain):
+#    ...
+"""
+
+import functools
+import re
+
+CACHE_SIZE = 65536
+
+def mergeExpressions(expressions):
+  """Compiled expressions merged into one alternation per set of flags; search() of the result finds what any of them finds"""
+  byFlags = {}
+  merged = []
+  for regex in expressions:
+    if isinstance(regex, str):
+      regex = re.compile(regex)
+    if regex.groups:
+      merged.append(regex)
+    else:
+      byFlags.setdefault(regex.flags, []).append(regex)
+  for flags, regexes in byFlags.items():
+    if len(regexes) == 1:
+      merged.append(regexes[0])
+      continue
+    try:
+      merged.append(re.compile('|'.join(f'(?:{regex.pattern})' for regex in regexes), flags))
+    except re.error:
+      merged.extend(regexes)
+  return merged
+
+class DomainFilter():
+  """Verdicts of checkDomain() for DOMAIN_LIST, DOMAIN_EXPRESSIONS and EXCLUSIVE_DOMAINS"""
+
+  def __init__(self, domainList=None, domainExpressions=None, exclusiveDomains=True, cacheSize=CACHE_SIZE):
+    self.domainSet = frozenset(domainList or [])
+    self.expressions = mergeExpressions(domainExpressions or [])
+    self.exclusiveDomains = exclusiveDomains
+    self.check = functools.lru_cache(maxsize=cacheSize)(self.classify)
+
+  def __contains__(self, d):
+    return d in self.domainSet
+
+  def matchesExpression(self, d):
+    for regex in self.expressions:
+      if regex.search(d):
+        return True
+    return False
+
+  def classify(self, d):
+    """Uncached check()"""
+    if self.exclusiveDomains:
+      if d in self.domainSet:
+        return False
+      if self.matchesExpression(d):
+        return False
+    else:
+      if self.domainSet and d not in self.domainSet:
+        return False
+      if self.expressions:
+        return self.matchesExpression(d)
+    return not self.exclusiveDomains
@@ -0,0 +1,111 @@
+"""
+# Purpose: Explode rows with numbered column groups, e.g., permissions.N.field or attendees.N.field, into one row per group
+# Note: The header is compiled once: each group number (slot) gets a table of the input column of each output column,
+#       so an output row is taken from the input row with one itemgetter, without a regex match, dict or copy per row.
+#       The output columns are the input columns in order with the numbered columns replaced by prefix.field
+#       at the position of the field's first occurrence, as the one item per row scripts have always written them;
+#       an output column that a slot doesn't have is ''.
+#       Slots are in the order of their first column in the header.
+#       With countField, e.g., permissions, populated(row) is the number of slots the row uses, from the count column
+#       that GAM writes, so a row visits only its own slots rather than every slot in the header. The count is used
+#       only when the slots are numbered 0, 1, ... in header order and the first slot after the count and the last slot
+#       are empty; otherwise it is the number of slots in the header.
+# Usage:
+#  layout = explode.Layout(header, PERMISSIONS_N_FIELD, 'permission', DROP_GENERAL_COLUMNS, DROP_PERMISSION_COLUMNS, 'permissions')
+#  for row in inputCSV:
+#    row = layout.prepare(row)
+#    for slot in layout.slots[:layout.populated(row)]:
+#      if row[slot.column('type')]:
+#        outputCSV.writevalues(slot.values(row))
+"""
+
+import operator
+
+def valuesGetter(indexes):
+  """Function that returns the values at indexes of a row as a tuple"""
+  if not indexes:
+    return lambda row: ()
+  if len(indexes) == 1:
+    index = indexes[0]
+    return lambda row: (row[index],)
+  return operator.itemgetter(*indexes)
+
+class Slot():
+  """One numbered column group: its input columns and the input column of each output column"""
+
+  def __init__(self, number, columns, empty):
+    self.number = number
+    self.columns = columns
+    self.empty = empty
+    self.values = None
+
+  def column(self, field):
+    """Index of field in a prepared row; the index of an empty value if the slot doesn't have field"""
+    return self.columns.get(field, self.empty)
+
+  def isPopulated(self, row):
+    for index in self.columns.values():
+      if row[index]:
+        return True
+    return False
+
+class Layout():
+  """Output columns and slots of a header"""
+
+  def __init__(self, header, slotPattern, prefix, dropGeneralColumns=None, dropSlotColumns=None, countField=None):
+    dropGeneralColumns = dropGeneralColumns or []
+    dropSlotColumns = dropSlotColumns or []
+    self.width = len(header)
+    self.empty = self.width
+    self.header = header
+    self.fieldnames = []
+    self.slots = []
+    generalColumns = {}
+    slotFields = set()
+    slotsByNumber = {}
+    for index, fieldname in enumerate(header):
+      mg = slotPattern.match(fieldname)
+      if mg:
+        field = mg.group(2)
+        slot = slotsByNumber.get(mg.group(1))
+        if slot is None:
+          slot = slotsByNumber[mg.group(1)] = Slot(int(mg.group(1)), {}, self.empty)
+          self.slots.append(slot)
+        slot.columns[field] = index
+        if field not in dropSlotColumns and field not in slotFields:
+          slotFields.add(field)
+          self.fieldnames.append(f'{prefix}.{field}')
+      elif fieldname not in dropGeneralColumns:
+        generalColumns[fieldname] = index
+        self.fieldnames.append(fieldname)
+    for slot in self.slots:
+      overlay = {f'{prefix}.{field}': index for field, index in slot.columns.items() if field not in dropSlotColumns}
+      slot.values = valuesGetter([overlay.get(name, generalColumns.get(name, self.empty)) for name in self.fieldnames])
+    self.columns = {fieldname: index for index, fieldname in enumerate(header)}
+    self.countColumn = None
+    if countField and [slot.number for slot in self.slots] == list(range(len(self.slots))):
+      self.countColumn = self.columns.get(countField)
+
+  def column(self, fieldname):
+    """Index of the input column fieldname in a prepared row; the index of an empty value if there is none"""
+    return self.columns.get(fieldname, self.empty)
+
+  def populated(self, row):
+    """Number of slots of a prepared row; the number of slots in the header if the count is missing or doesn't match the row"""
+    slotCount = len(self.slots)
+    if self.countColumn is None:
+      return slotCount
+    count = row[self.countColumn]
+    if not count.isdigit():
+      return slotCount
+    count = int(count)
+    if count >= slotCount or self.slots[count].isPopulated(row) or self.slots[-1].isPopulated(row):
+      return slotCount
+    return count
+
+  def prepare(self, row):
+    """row with as many values as the header followed by the empty value"""
+    if len(row) != self.width:
+      row = row[:self.width]+['']*(self.width-len(row))
+    row.append('')
+    return row
@@ -0,0 +1,73 @@
+"""
+# Purpose: Sort CSV rows with bounded memory: rows are sorted in runs of at most runRows rows,
+#          runs are written to temporary CSV files and merged; input that fits in one run is sorted in memory.
+# Note: The sort is stable, rows with equal keys keep their input order.
+#       Rows read back from a run are dicts from csv.DictReader, so key must work on those as well as the input rows.
+# Usage:
+#  for row in sortRows(inputCSV, rowKey, inputCSV.fieldnames, SORT_RUN_ROWS):
+#    ...
+#  for key, row in firstRows(sortRows(inputCSV, rowKey, inputCSV.fieldnames, SORT_RUN_ROWS), rowKey):
+#    ...
+#  for key, row in lastRows(sortRows(inputCSV, rowKey, inputCSV.fieldnames, SORT_RUN_ROWS), rowKey):
+#    ...
+"""
+
+import collections
+import csv
+import heapq
+import itertools
+import os
+import tempfile
+
+from gamlib import instrument
+
+def descending(value):
+  """Key for a string that sorts in descending order when the key sorts in ascending order"""
+  return tuple(-ord(c) for c in value)+(1,)
+
+def writeRun(rows, fieldnames, tempDir, runNumber):
+  fileName = os.path.join(tempDir, f'run{runNumber}.csv')
+  with open(fileName, 'w', encoding='utf-8', newline='') as runFile:
+    runCSV = csv.DictWriter(runFile, fieldnames, lineterminator='\n')
+    for row in rows:
+      runCSV.writerow(row)
+  return fileName
+
+def readRun(fileName, fieldnames):
+  with open(fileName, 'r', encoding='utf-8', newline='') as runFile:
+    yield from csv.DictReader(runFile, fieldnames)
+
+def sortRows(rows, key, fieldnames, runRows=0):
+  """Yield rows sorted by key; when runRows > 0, hold at most runRows rows in memory while sorting
+
+  Reading and sorting the runs is recorded as phase sort, merging them is not.
+  """
+  rows = iter(rows)
+  if runRows <= 0:
+    with instrument.phase('sort'):
+      run = sorted(rows, key=key)
+    yield from run
+    return
+  with instrument.phase('sort'):
+    run = sorted(itertools.islice(rows, runRows), key=key)
+  if len(run) < runRows:
+    yield from run
+    return
+  with tempfile.TemporaryDirectory() as tempDir:
+    runFileNames = []
+    with instrument.phase('sort'):
+      while run:
+        runFileNames.append(writeRun(run, fieldnames, tempDir, len(runFileNames)))
+        run.clear()
+        run = sorted(itertools.islice(rows, runRows), key=key)
+    yield from heapq.merge(*[readRun(fileName, fieldnames) for fileName in runFileNames], key=key)
+
+def firstRows(rows, key):
+  """For rows sorted by key, yield (key, row) with the first row of each key"""
+  for value, group in itertools.groupby(rows, key):
+    yield value, next(group)
+
+def lastRows(rows, key):
+  """For rows sorted by key, yield (key, row) with the last row of each key, as a dict filled from the rows would keep"""
+  for value, group in itertools.groupby(rows, key):
+    yield value, collections.deque(group, maxlen=1)[0]
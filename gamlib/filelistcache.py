@@ -0,0 +1,179 @@
+"""
+# Purpose: Keep a compact copy of a GAM print filelist CSV next to it so that repeated runs of the
+#          Drive ACL scripts skip the CSV parse; ConvertFileListToCache.py writes the cache.
+# Note: The rows are stored in row groups of ROW_GROUP_ROWS rows. A row group holds only the non-empty cells of its rows:
+#       the column of each cell and a code into a table of the distinct values of the row group, in arrays of one, two
+#       or four bytes per item, so owners, domains, mimeTypes, roles and types are stored once per row group and
+#       the empty permissions.N slots of a row are not stored at all.
+#       Row groups are written and read one at a time, so neither takes more memory than a row group;
+#       a row is rebuilt by copying an empty row of the header width and setting its non-empty cells.
+#       The cache is not written when it would not be smaller than the CSV.
+#       The cache records the size and modification time of the CSV and is ignored when they no longer match,
+#       when it was written with a different QUOTE_CHAR or on a platform with a different byte order.
+# Usage:
+#  layout, rows = readFileList(inputFile, QUOTE_CHAR)
+#  for row in rows:
+#    for slot in layout.populatedSlots(row):
+#      ...
+"""
+
+import array
+import csv
+import itertools
+import os
+import pickle
+import sys
+
+from gamlib import instrument
+from gamlib.permissions import PermissionsLayout
+
+CACHE_SUFFIX = '.gamcache'
+CACHE_FORMAT = 2
+ROW_GROUP_ROWS = 10000
+CODE_TYPECODES = ['B', 'H', 'I', 'L', 'Q']
+
+def cacheFileName(fileName):
+  return fileName+CACHE_SUFFIX
+
+def sourceStamp(fileName):
+  stat = os.stat(fileName)
+  return (stat.st_size, stat.st_mtime_ns)
+
+def codeTypecode(count):
+  """Smallest array typecode that holds the codes of a table of count values"""
+  for typecode in CODE_TYPECODES:
+    if count <= 1 << (8*array.array(typecode).itemsize):
+      return typecode
+  return CODE_TYPECODES[-1]
+
+def packCodes(codes, count):
+  """(typecode, bytes) of codes, each less than count"""
+  typecode = codeTypecode(count)
+  return (typecode, array.array(typecode, codes).tobytes())
+
+def unpackCodes(packed):
+  typecode, data = packed
+  codes = array.array(typecode)
+  codes.frombytes(data)
+  return codes
+
+@instrument.timed('index')
+def writeCache(fileName, quoteChar='"'):
+  """Convert the CSV fileName to its cache file; return the number of rows
+
+  Raises ValueError, and writes no cache, if a row has more fields than the header or the cache would not be smaller than the CSV.
+  """
+  stamp = sourceStamp(fileName)
+  tempFileName = cacheFileName(fileName)+'.tmp'
+  try:
+    with open(fileName, 'r', encoding='utf-8') as inputFile, open(tempFileName, 'wb') as cacheFile:
+      inputCSV = csv.reader(inputFile, quotechar=quoteChar)
+      layout = PermissionsLayout(next(inputCSV, []))
+      header = {'format': CACHE_FORMAT, 'byteorder': sys.byteorder,
+                'itemsizes': {typecode: array.array(typecode).itemsize for typecode in CODE_TYPECODES},
+                'source': stamp, 'quoteChar': quoteChar, 'fieldnames': layout.fieldnames}
+      pickle.dump(header, cacheFile, protocol=pickle.HIGHEST_PROTOCOL)
+      allColumns = range(layout.width)
+      rowCount = 0
+      counts = []
+      columns = []
+      values = []
+      for row in layout.rows(inputCSV):
+        rowCount += 1
+        if len(row) > layout.width:
+          raise ValueError(f'{fileName}: row {rowCount} has more fields than the header, it can not be cached')
+        start = len(values)
+        values.extend(itertools.compress(row, row))
+        columns.extend(itertools.compress(allColumns, row))
+        counts.append(len(values)-start)
+        if len(counts) == ROW_GROUP_ROWS:
+          pickle.dump(encodeRowGroup(counts, columns, values, layout.width), cacheFile, protocol=pickle.HIGHEST_PROTOCOL)
+          counts = []
+          columns = []
+          values = []
+      if counts:
+        pickle.dump(encodeRowGroup(counts, columns, values, layout.width), cacheFile, protocol=pickle.HIGHEST_PROTOCOL)
+      pickle.dump(None, cacheFile, protocol=pickle.HIGHEST_PROTOCOL)
+    cacheSize = os.path.getsize(tempFileName)
+    if cacheSize >= stamp[0]:
+      raise ValueError(f'{fileName}: the cache would be {cacheSize} bytes, no smaller than the CSV, so it is not written')
+    os.replace(tempFileName, cacheFileName(fileName))
+  finally:
+    if os.path.exists(tempFileName):
+      os.remove(tempFileName)
+  return rowCount
+
+def encodeRowGroup(counts, columns, values, width):
+  """Row group of the non-empty cells of some rows: counts is the number of cells of each row,
+  columns and values are the column and value of each cell
+  """
+  table = list(dict.fromkeys(values))
+  index = {value: code for code, value in enumerate(table)}
+  return (table, packCodes(counts, width+1), packCodes(columns, width), packCodes(map(index.__getitem__, values), len(table)))
+
+def decodeRows(cacheFile, width):
+  """Rows of the row groups of the open cacheFile, padded to width; cacheFile is closed at the end"""
+  emptyRow = ['']*width
+  with cacheFile:
+    while True:
+      with instrument.phase('load'):
+        try:
+          rowGroup = pickle.load(cacheFile)
+        except (EOFError, pickle.UnpicklingError):
+          raise ValueError(f'{cacheFile.name}: the cache is damaged, delete it or run ConvertFileListToCache.py again')
+        if rowGroup is None:
+          return
+        table, counts, columns, codes = rowGroup
+        columns = unpackCodes(columns)
+        values = list(map(table.__getitem__, unpackCodes(codes)))
+      end = 0
+      for count in unpackCodes(counts):
+        start = end
+        end += count
+        row = emptyRow.copy()
+        for column, value in zip(columns[start:end], values[start:end]):
+          row[column] = value
+        yield row
+
+def readCacheHeader(cacheFile, fileName, quoteChar):
+  """Return the header of the open cacheFile, None if it does not match the CSV fileName and quoteChar"""
+  try:
+    header = pickle.load(cacheFile)
+    stamp = sourceStamp(fileName)
+  except (OSError, EOFError, pickle.UnpicklingError):
+    return None
+  if (not isinstance(header, dict) or header.get('format') != CACHE_FORMAT or header['byteorder'] != sys.byteorder or
+      header['source'] != stamp or header['quoteChar'] != quoteChar or
+      any(array.array(typecode).itemsize != itemsize for typecode, itemsize in header['itemsizes'].items())):
+    return None
+  return header
+
+def loadCache(fileName, quoteChar='"'):
+  """Return (fieldnames, rows) from the cache of the CSV fileName, None if there is no cache or it is stale
+
+  rows are read from the cache one row group at a time as they are iterated.
+  """
+  try:
+    cacheFile = open(cacheFileName(fileName), 'rb')
+  except OSError:
+    return None
+  header = readCacheHeader(cacheFile, fileName, quoteChar)
+  if header is None:
+    cacheFile.close()
+    return None
+  return (header['fieldnames'], decodeRows(cacheFile, len(header['fieldnames'])))
+
+def readFileList(inputFile, quoteChar='"', **layoutArgs):
+  """Return (PermissionsLayout, rows) for inputFile, from its cache when that is fresh, otherwise from the CSV
+
+  layoutArgs are passed to PermissionsLayout, e.g., keyField='role'; rows are padded to the header width.
+  """
+  fileName = getattr(inputFile, 'name', None)
+  if isinstance(fileName, str) and os.path.isfile(fileName):
+    cached = loadCache(fileName, quoteChar)
+    if cached is not None:
+      fieldnames, rows = cached
+      return (PermissionsLayout(fieldnames, **layoutArgs), rows)
+  inputCSV = csv.reader(inputFile, quotechar=quoteChar)
+  layout = PermissionsLayout(next(inputCSV, []), **layoutArgs)
+  return (layout, layout.rows(inputCSV))
@@ -0,0 +1,342 @@
+"""
+# Purpose: Group membership graph shared by the nested group scripts
+#          The graph is read from the output of gam print group-members or gam print groups members,managers,owners;
+#          nested groups are collapsed into strongly connected components, so groups that contain each other are
+#          handled without recursion, and the transitive member groups, parent groups and users of every group are computed once.
+#          The graph is saved to a cache file next to the CSV, e.g., GroupMembers.csv.groupgraph,
+#          and is read from the cache while the CSV is unchanged.
+# Note: Walks stop at a group that is already on the path being walked, so a cycle of nested groups ends
+#       rather than repeating forever.
+# Usage:
+#  graph = readGroupGraph(inputFile, QUOTE_CHAR)
+#  for path, isLeaf in graph.walk(group):
+#    ...
+#  graph.descendants(group)
+"""
+
+import csv
+import os
+import pickle
+
+from gamlib import instrument
+
+CACHE_SUFFIX = '.groupgraph'
+CACHE_FORMAT = 3
+MEMBER_ROLES = [('Members', 'MEMBER'), ('Managers', 'MANAGER'), ('Owners', 'OWNER')]
+
+def findComponents(adjacency):
+  """Strongly connected components of the graph adjacency[node] = [child, ...] with nodes 0..n-1
+
+  Iterative Tarjan; a component is listed after every component reachable from it.
+  """
+  count = len(adjacency)
+  index = [None]*count
+  low = [0]*count
+  onStack = [False]*count
+  stack = []
+  components = []
+  counter = 0
+  for root in range(count):
+    if index[root] is not None:
+      continue
+    index[root] = low[root] = counter
+    counter += 1
+    stack.append(root)
+    onStack[root] = True
+    work = [(root, 0)]
+    while work:
+      node, i = work[-1]
+      children = adjacency[node]
+      if i < len(children):
+        work[-1] = (node, i+1)
+        child = children[i]
+        if index[child] is None:
+          index[child] = low[child] = counter
+          counter += 1
+          stack.append(child)
+          onStack[child] = True
+          work.append((child, 0))
+        elif onStack[child]:
+          low[node] = min(low[node], index[child])
+        continue
+      work.pop()
+      if work:
+        parent = work[-1][0]
+        low[parent] = min(low[parent], low[node])
+      if low[node] == index[node]:
+        component = []
+        while True:
+          member = stack.pop()
+          onStack[member] = False
+          component.append(member)
+          if member == node:
+            break
+        components.append(component)
+  return components
+
+class GroupGraph():
+  """Groups, their members and the transitive closure of group nesting"""
+
+  def __init__(self):
+    self.names = []
+    self.index = {}
+    self.members = {}
+    self.memberOrder = []
+    self.parents = {}
+    self.childGroups = {}
+    self.hasRoles = False
+    self.component = []
+    self.cyclic = []
+    self.descendantSets = []
+    self.ancestorSets = []
+    self.userSets = []
+    self.closures = {}
+
+  def nodeIndex(self, email):
+    i = self.index.get(email)
+    if i is None:
+      i = self.index[email] = len(self.names)
+      self.names.append(email)
+    return i
+
+  def addMember(self, group, email, mtype, role):
+    self.nodeIndex(group)
+    self.members.setdefault(group, []).append((email, mtype, role))
+    self.memberOrder.append(group)
+    if mtype == 'GROUP':
+      self.nodeIndex(email)
+      self.parents.setdefault(email, []).append(group)
+
+  def addGroup(self, group):
+    """Add group with no members if it is not already in the graph"""
+    if group not in self.members:
+      self.members[group] = []
+      self.childGroups[group] = []
+      if group not in self.index:
+        self.nodeIndex(group)
+        self.component.append(len(self.cyclic))
+        self.cyclic.append(False)
+        self.descendantSets.append(frozenset())
+        self.ancestorSets.append(frozenset())
+        self.userSets.append(())
+
+  def readGroupMembers(self, inputCSV, lowerCase=False):
+    """Rows of gam print group-members: group, email, type and optionally role"""
+    self.hasRoles = 'role' in (inputCSV.fieldnames or [])
+    for row in inputCSV:
+      group = row['group']
+      email = row['email']
+      if lowerCase:
+        group = group.lower()
+        email = email.lower()
+      self.addMember(group, email, row['type'], row.get('role'))
+
+  def readGroups(self, inputCSV, delimiter=' ', lowerCase=False):
+    """Rows of gam print groups roles members,managers,owners: email, Members, Managers, Owners
+
+    The member type is not in these rows; a member is a group if it has a row of its own.
+    """
+    self.hasRoles = True
+    rows = []
+    for row in inputCSV:
+      group = row['email'].lower() if lowerCase else row['email']
+      self.nodeIndex(group)
+      self.members.setdefault(group, [])
+      rows.append((group, row))
+    for group, row in rows:
+      for field, role in MEMBER_ROLES:
+        if row.get(field):
+          for email in row[field].split(delimiter):
+            if lowerCase:
+              email = email.lower()
+            self.addMember(group, email, 'GROUP' if email in self.members else 'USER', role)
+
+  def build(self):
+    """Compute the components and the transitive member groups, parent groups and users of each component"""
+    adjacency = [[] for _ in self.names]
+    self.childGroups = {}
+    for group, members in self.members.items():
+      self.childGroups[group] = sorted(email for email, mtype, _ in members if mtype == 'GROUP')
+      adjacency[self.index[group]] = [self.index[email] for email in self.childGroups[group]]
+    components = findComponents(adjacency)
+    self.component = [0]*len(self.names)
+    for c, nodes in enumerate(components):
+      for node in nodes:
+        self.component[node] = c
+    self.cyclic = [len(nodes) > 1 or nodes[0] in adjacency[nodes[0]] for nodes in components]
+    childComponents = [set() for _ in components]
+    for node, children in enumerate(adjacency):
+      c = self.component[node]
+      for child in children:
+        if self.component[child] != c:
+          childComponents[c].add(self.component[child])
+    descendantSets = []
+    for c, nodes in enumerate(components):
+      descendants = set(nodes) if self.cyclic[c] else set()
+      for d in childComponents[c]:
+        descendants.update(components[d])
+        descendants.update(descendantSets[d])
+      descendantSets.append(frozenset(descendants))
+    ancestorSets = [None]*len(components)
+    for c in range(len(components)-1, -1, -1):
+      ancestorSets[c] = set(components[c]) if self.cyclic[c] else set()
+    for c in range(len(components)-1, -1, -1):
+      ancestors = ancestorSets[c]
+      for d in childComponents[c]:
+        ancestorSets[d].update(components[c])
+        ancestorSets[d].update(ancestors)
+    self.descendantSets = descendantSets
+    self.ancestorSets = [frozenset(ancestors) for ancestors in ancestorSets]
+    self.userSets = []
+    for c, nodes in enumerate(components):
+      directUsers = {email for node in nodes for email, mtype, _ in self.members.get(self.names[node], []) if mtype == 'USER'}
+      if not directUsers and len(childComponents[c]) == 1:
+        self.userSets.append(self.userSets[next(iter(childComponents[c]))])
+        continue
+      for d in childComponents[c]:
+        directUsers.update(self.userSets[d])
+      self.userSets.append(tuple(sorted(directUsers)))
+    self.closures = {}
+
+  def groups(self):
+    """Groups that have a row in the CSV or were added, sorted"""
+    return sorted(self.members)
+
+  def memberships(self):
+    """Yield (group, email, type, role) for each member of each group, in the order of the CSV rows
+
+    memberOrder holds the group of each membership in the order it was read; the memberships of a group
+    are taken from its member list in turn.
+    """
+    positions = {}
+    for group in self.memberOrder:
+      i = positions.get(group, 0)
+      positions[group] = i+1
+      email, mtype, role = self.members[group][i]
+      yield group, email, mtype, role
+
+  def directMembers(self, group):
+    """(email, type, role) of each direct member of group, in the order of the CSV"""
+    return self.members.get(group, [])
+
+  def memberGroups(self, group):
+    """Direct member groups of group, sorted"""
+    return self.childGroups.get(group, [])
+
+  def parentGroups(self, group):
+    """Groups of which group is a direct member, in the order of the CSV"""
+    return self.parents.get(group, [])
+
+  def isCyclic(self, group):
+    """True if group is a member of itself through nested groups"""
+    i = self.index.get(group)
+    return i is not None and self.cyclic[self.component[i]]
+
+  def closure(self, group, kind):
+    i = self.index.get(group)
+    if i is None:
+      return frozenset()
+    key = (kind, self.component[i])
+    result = self.closures.get(key)
+    if result is None:
+      sets = self.descendantSets if kind == 'descendants' else self.ancestorSets
+      result = self.closures[key] = frozenset(self.names[node] for node in sets[key[1]])
+    return result
+
+  def descendants(self, group):
+    """All groups nested in group at any depth"""
+    return self.closure(group, 'descendants')
+
+  def ancestors(self, group):
+    """All groups that contain group at any depth"""
+    return self.closure(group, 'ancestors')
+
+  def users(self, group):
+    """All users that are members of group directly or through nested groups, sorted"""
+    i = self.index.get(group)
+    if i is None:
+      return ()
+    return self.userSets[self.component[i]]
+
+  def walk(self, group, parents=False):
+    """Yield (path, isLeaf) for group and every group below it, or above it if parents is True, depth first
+
+    path is the list of groups from group to the current group; it is reused, copy it to keep it.
+    A group is not followed again when it is already on the path.
+    """
+    adjacent = self.parentGroups if parents else self.memberGroups
+    path = [group]
+    onPath = {group}
+    children = [child for child in adjacent(group) if child not in onPath]
+    yield path, not children
+    stack = [iter(children)]
+    while stack:
+      child = next(stack[-1], None)
+      if child is None:
+        stack.pop()
+        onPath.discard(path.pop())
+        continue
+      path.append(child)
+      onPath.add(child)
+      children = [grandChild for grandChild in adjacent(child) if grandChild not in onPath]
+      yield path, not children
+      stack.append(iter(children))
+
+  def state(self):
+    return {'names': self.names, 'members': self.members, 'memberOrder': self.memberOrder,
+            'parents': self.parents, 'childGroups': self.childGroups,
+            'hasRoles': self.hasRoles,
+            'component': self.component, 'cyclic': self.cyclic,
+            'descendantSets': self.descendantSets, 'ancestorSets': self.ancestorSets, 'userSets': self.userSets}
+
+  def setState(self, state):
+    for key, value in state.items():
+      setattr(self, key, value)
+    self.index = {email: i for i, email in enumerate(self.names)}
+    self.closures = {}
+
+def cacheFileName(fileName):
+  return fileName+CACHE_SUFFIX
+
+def sourceStamp(fileName):
+  stat = os.stat(fileName)
+  return (stat.st_size, stat.st_mtime_ns)
+
+def readGroupGraph(inputFile, quoteChar='"', groupsFormat=False, delimiter=' ', lowerCase=False):
+  """Read the graph from inputFile, from its cache when that is fresh
+
+  groupsFormat False: inputFile is from gam print group-members; True: from gam print groups roles members,managers,owners
+  """
+  fileName = getattr(inputFile, 'name', None)
+  cacheable = isinstance(fileName, str) and os.path.isfile(fileName)
+  settings = {'format': CACHE_FORMAT, 'quoteChar': quoteChar, 'groupsFormat': groupsFormat,
+              'delimiter': delimiter, 'lowerCase': lowerCase}
+  graph = GroupGraph()
+  if cacheable:
+    try:
+      with open(cacheFileName(fileName), 'rb') as cacheFile:
+        header = pickle.load(cacheFile)
+        if header == dict(settings, source=sourceStamp(fileName)):
+          with instrument.phase('load'):
+            graph.setState(pickle.load(cacheFile))
+          return graph
+    except (OSError, EOFError, pickle.UnpicklingError):
+      pass
+    stamp = sourceStamp(fileName)
+  with instrument.phase('index'):
+    inputCSV = csv.DictReader(inputFile, quotechar=quoteChar)
+    if groupsFormat:
+      graph.readGroups(inputCSV, delimiter, lowerCase)
+    else:
+      graph.readGroupMembers(inputCSV, lowerCase)
+    graph.build()
+  if cacheable:
+    try:
+      tempFileName = cacheFileName(fileName)+'.tmp'
+      with open(tempFileName, 'wb') as cacheFile:
+        pickle.dump(dict(settings, source=stamp), cacheFile, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(graph.state(), cacheFile, protocol=pickle.HIGHEST_PROTOCOL)
+      os.replace(tempFileName, cacheFileName(fileName))
+    except OSError:
+      pass
+  return graph
@@ -0,0 +1,262 @@
+"""
+# Purpose: Opt-in run statistics for the scripts: rows read and written, bytes read and written, wall and CPU time
+#          per phase and peak RSS, written to stderr as one line of JSON when the script exits
+# Note: Set the environment variable GAMSCRIPTS_STATS to enable it; the value is a comma separated list of:
+#         1 or summary - the JSON summary
+#         profile - also profile the run with cProfile and dump the profile to <Script>.prof
+#         tracemalloc - also trace memory allocations and add the top allocation sites to the summary
+#       Scripts that import gamlib pick it up when gamlib is imported; any script can be run under it with:
+#         $ GAMSCRIPTS_STATS=1 python3 gamlib/instrument.py Script.py arguments...
+#       Rows are counted as the csv module reads and writes them, including temporary sort runs; lines that a script
+#       splits without the csv module, e.g., in gamlib.projection, are not counted. Bytes are from /proc/self/io when it exists.
+#       Scripts record their main loops as phases scan and write, and the gamlib modules the phases they run:
+#       load when a cache is read, index when one is built, sort when gamlib.extsort sorts runs;
+#       time outside of them is in phase script.
+#       A phase started within another is not counted in the other, so the phase times add up to the wall time.
+#       The rows read and written and the CPU time of the workers of gamlib.parallel are added to the summary;
+#       the rows read include the header record that each worker reads.
+# Usage:
+#  with instrument.phase('scan'):
+#    for row in inputCSV:
+#      ...
+#  @instrument.timed('index')
+#  def writeCache(...):
+"""
+
+import atexit
+import contextlib
+import csv
+import functools
+import os
+import sys
+import time
+
+try:
+  import resource
+except ImportError:
+  resource = None
+
+ENV_VAR = 'GAMSCRIPTS_STATS'
+TOP_ALLOCATIONS = 10
+
+class Stats():
+  """Counters and phase times of this run"""
+
+  def __init__(self, options):
+    self.options = options
+    self.script = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python'
+    self.rowsRead = 0
+    self.rowsWritten = 0
+    self.workerTasks = 0
+    self.workerCPU = 0.0
+    self.phases = {}
+    self.activePhases = []
+    self.startWall = time.perf_counter()
+    self.startCPU = time.process_time()
+    self.startIO = readIO()
+    self.profiler = None
+
+  def addPhase(self, name, wall, cpu, calls=1):
+    times = self.phases.setdefault(name, {'calls': 0, 'wallSeconds': 0.0, 'cpuSeconds': 0.0})
+    times['calls'] += calls
+    times['wallSeconds'] += wall
+    times['cpuSeconds'] += cpu
+
+  def startPhase(self, name):
+    """Start phase name; the phase it is started within is paused until it ends"""
+    now = (time.perf_counter(), time.process_time())
+    if self.activePhases:
+      self.pausePhase(now)
+    self.activePhases.append([name, now, 1])
+
+  def endPhase(self):
+    now = (time.perf_counter(), time.process_time())
+    self.pausePhase(now)
+    self.activePhases.pop()
+    if self.activePhases:
+      self.activePhases[-1][1] = now
+
+  def pausePhase(self, now):
+    active = self.activePhases[-1]
+    name, (startWall, startCPU), calls = active
+    self.addPhase(name, now[0]-startWall, now[1]-startCPU, calls)
+    active[2] = 0
+
+  def summary(self):
+    wall = time.perf_counter()-self.startWall
+    cpu = time.process_time()-self.startCPU
+    phases = {name: dict(times) for name, times in self.phases.items()}
+    phases['script'] = {'calls': 1,
+                        'wallSeconds': wall-sum(times['wallSeconds'] for times in self.phases.values()),
+                        'cpuSeconds': cpu-sum(times['cpuSeconds'] for times in self.phases.values())}
+    for times in phases.values():
+      times['wallSeconds'] = round(times['wallSeconds'], 3)
+      times['cpuSeconds'] = round(times['cpuSeconds'], 3)
+    result = {'script': self.script, 'argv': sys.argv[1:],
+              'wallSeconds': round(wall, 3), 'cpuSeconds': round(cpu, 3), 'peakRSSKiB': peakRSS(),
+              'rowsRead': self.rowsRead, 'rowsWritten': self.rowsWritten,
+              'rowsReadPerSecond': round(self.rowsRead/wall) if wall > 0 else None,
+              'phases': phases}
+    if self.workerTasks:
+      result['workerTasks'] = self.workerTasks
+      result['workerCPUSeconds'] = round(self.workerCPU, 3)
+    io = readIO()
+    if io and self.startIO:
+      result['bytesRead'] = io['rchar']-self.startIO['rchar']
+      result['bytesWritten'] = io['wchar']-self.startIO['wchar']
+    if 'tracemalloc' in self.options:
+      import tracemalloc
+      if tracemalloc.is_tracing():
+        snapshot = tracemalloc.take_snapshot()
+        result['tracedPeakBytes'] = tracemalloc.get_traced_memory()[1]
+        result['topAllocations'] = [{'site': str(stat.traceback), 'bytes': stat.size, 'blocks': stat.count}
+                                    for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]]
+    return result
+
+  def report(self):
+    if self.profiler is not None:
+      self.profiler.disable()
+      try:
+        self.profiler.dump_stats(os.path.splitext(self.script)[0]+'.prof')
+      except OSError:
+        pass
+    import json
+    try:
+      sys.stderr.write(json.dumps(self.summary())+'\n')
+      sys.stderr.flush()
+    except (OSError, ValueError):
+      pass
+
+class CountingReader():
+  """csv.reader that counts the rows it returns"""
+
+  def __init__(self, reader):
+    self.reader = reader
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    row = next(self.reader)
+    stats.rowsRead += 1
+    return row
+
+  def __getattr__(self, name):
+    return getattr(self.reader, name)
+
+class CountingWriter():
+  """csv.writer that counts the rows it writes"""
+
+  def __init__(self, writer):
+    self.writer = writer
+
+  def writerow(self, row):
+    stats.rowsWritten += 1
+    return self.writer.writerow(row)
+
+  def writerows(self, rows):
+    for row in rows:
+      self.writerow(row)
+
+  def __getattr__(self, name):
+    return getattr(self.writer, name)
+
+def readIO():
+  try:
+    with open('/proc/self/io', 'r', encoding='ascii') as ioFile:
+      return {key: int(value) for key, value in (line.split(':') for line in ioFile)}
+  except (OSError, ValueError):
+    return None
+
+def peakRSS():
+  if resource is None:
+    return None
+  maxRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  return maxRSS//1024 if sys.platform == 'darwin' else maxRSS
+
+stats = None
+
+def enable(options):
+  """Start recording this run; the summary is written to stderr at exit"""
+  global stats
+  if stats is not None:
+    return
+  stats = Stats(options)
+  csvReader = csv.reader
+  csvWriter = csv.writer
+  csv.reader = lambda *args, **kwargs: CountingReader(csvReader(*args, **kwargs))
+  csv.writer = lambda *args, **kwargs: CountingWriter(csvWriter(*args, **kwargs))
+  if 'tracemalloc' in options:
+    import tracemalloc
+    tracemalloc.start()
+  if 'profile' in options:
+    import cProfile
+    stats.profiler = cProfile.Profile()
+    stats.profiler.enable()
+  atexit.register(stats.report)
+
+def enableFromEnvironment():
+  value = os.environ.get(ENV_VAR, '')
+  if value and value != '0':
+    enable({option.strip().lower() for option in value.split(',')})
+
+@contextlib.contextmanager
+def phase(name):
+  """Record the wall and CPU time of the block under name when statistics are enabled"""
+  if stats is None:
+    yield
+    return
+  stats.startPhase(name)
+  try:
+    yield
+  finally:
+    stats.endPhase()
+
+def timed(name):
+  """Decorator that records each call of the function as phase name"""
+  def decorate(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+      with phase(name):
+        return function(*args, **kwargs)
+    return wrapper
+  return decorate
+
+def workerCounts(start=None):
+  """(rows read, rows written, CPU seconds) of this process, since start if it is given; None when statistics are disabled
+
+  A worker returns the difference of its counts over a task to the parent, which adds it with addWorkerCounts().
+  """
+  if stats is None:
+    return None
+  counts = (stats.rowsRead, stats.rowsWritten, time.process_time())
+  if start is None:
+    return counts
+  return tuple(end-begin for begin, end in zip(start, counts))
+
+def addWorkerCounts(counts):
+  """Add the counts of a worker task from workerCounts() to this run"""
+  if stats is None or counts is None:
+    return
+  rowsRead, rowsWritten, cpu = counts
+  stats.rowsRead += rowsRead
+  stats.rowsWritten += rowsWritten
+  stats.workerCPU += cpu
+  stats.workerTasks += 1
+
+def main():
+  """Run the script named by the first argument with statistics enabled"""
+  import runpy
+  if len(sys.argv) < 2:
+    sys.stderr.write(f'Usage: {ENV_VAR}=1 python3 gamlib/instrument.py Script.py arguments...\n')
+    sys.exit(2)
+  del sys.argv[0]
+  # The script's directory comes first, as when the script is run directly; the directory that contains gamlib follows it
+  sys.path[0:1] = [os.path.dirname(os.path.abspath(sys.argv[0])), os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+  from gamlib import instrument
+  instrument.enable({'summary'})
+  instrument.stats.script = os.path.basename(sys.argv[0])
+  runpy.run_path(sys.argv[0], run_name='__main__')
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,34 @@
+"""
+# Purpose: JSON decoding and encoding for the scripts that convert JSON columns, one record at a time
+# Note: When orjson is installed, loads() decodes with it and falls back to the json module for what orjson rejects,
+#       e.g., NaN, and for text with 19 or more digits in a row, as orjson reads integers wider than 64 bits as floats;
+#       the result is the same either way.
+#       Output is always encoded by the json module, as orjson can't write the separators the scripts have always written;
+#       encoder() builds the json.JSONEncoder once, where json.dumps() with options builds one per call.
+# Usage:
+#  encode = jsoncodec.encoder(ensure_ascii=False, sort_keys=True)
+#  outputFile.write(encode(jsoncodec.loads(row['JSON'])))
+"""
+
+import json
+import re
+
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+LONG_NUMBER = re.compile(r'[0-9]{19}')
+
+def loads(s):
+  """json.loads(s)"""
+  if orjson is not None and not LONG_NUMBER.search(s):
+    try:
+      return orjson.loads(s)
+    except ValueError:
+      pass
+  return json.loads(s)
+
+def encoder(**kwargs):
+  """Function that returns json.dumps(obj, **kwargs)"""
+  return json.JSONEncoder(**kwargs).encode
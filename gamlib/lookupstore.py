@@ -0,0 +1,161 @@
+"""
+# Purpose: Look up the rows of a CSV file, e.g., from gam print users, by the value of a key field
+#          without parsing the CSV on every run: the key index is saved next to the CSV, e.g., Users.csv.primaryEmail.lookup,
+#          the CSV is memory mapped and a row is decoded only when it is looked up.
+# Note: The index records the size and modification time of the CSV. When the CSV has changed, rows that were appended
+#       to the indexed content are added to the index; otherwise the index is rebuilt.
+#       When a key occurs in several rows, get() returns the last one, as a dict filled from the CSV would, and getAll() all of them.
+#       The index is kept in memory only when it can not be saved next to the CSV.
+# Usage:
+#  users = openLookupStore(USERS_FILENAME, 'primaryEmail', QUOTE_CHAR)
+#  row = users.get(email)
+#  if row is not None:
+#    orgUnitPath = row['orgUnitPath']
+"""
+
+import array
+import hashlib
+import os
+import pickle
+import sys
+
+from gamlib import instrument
+from gamlib.mmapcsv import MappedDictReader, MappedRow
+
+CACHE_SUFFIX = '.lookup'
+CACHE_FORMAT = 1
+TYPECODE = 'Q'
+DIGEST_BLOCK_SIZE = 1 << 20
+KEY_CASES = {None: None, 'lower': str.lower, 'upper': str.upper}
+
+def indexFileName(fileName, keyField, keyCase=None):
+  return f'{fileName}.{keyField}{"."+keyCase if keyCase else ""}{CACHE_SUFFIX}'
+
+def contentDigest(data, size):
+  """Hash of the first size bytes of the memory mapped data; slices leave the file position of data unchanged"""
+  digest = hashlib.blake2b()
+  for offset in range(0, size, DIGEST_BLOCK_SIZE):
+    digest.update(data[offset:min(offset+DIGEST_BLOCK_SIZE, size)])
+  return digest.hexdigest()
+
+class LookupStore():
+  """Rows of a memory mapped CSV file by key; index[key] is a record number or a list of record numbers"""
+
+  def __init__(self, reader, keyField, keyCase=None):
+    self.reader = reader
+    self.fieldnames = reader.fieldnames if reader is not None else []
+    self.keyField = keyField
+    self.keyCase = keyCase
+    self.index = {}
+    self.starts = array.array(TYPECODE)
+    self.ends = array.array(TYPECODE)
+
+  def addRecords(self):
+    """Index the records from the current position of the reader to the end of the CSV"""
+    if self.reader is None:
+      return
+    keyIndex = self.fieldnames.index(self.keyField)
+    transform = KEY_CASES[self.keyCase]
+    index = self.index
+    for start, end, values in self.reader.records():
+      key = values[keyIndex] if keyIndex < len(values) else None
+      if transform and key is not None:
+        key = transform(key)
+      record = len(self.starts)
+      self.starts.append(start)
+      self.ends.append(end)
+      current = index.get(key)
+      if current is None:
+        index[key] = record
+      elif isinstance(current, list):
+        current.append(record)
+      else:
+        index[key] = [current, record]
+
+  def __len__(self):
+    return len(self.index)
+
+  def __contains__(self, key):
+    return key in self.index
+
+  def keys(self):
+    """Keys in the order of their first row in the CSV"""
+    return self.index.keys()
+
+  def row(self, record):
+    return MappedRow(self.reader, self.starts[record], self.ends[record])
+
+  def get(self, key, default=None):
+    """Last row with key, default if there is none"""
+    record = self.index.get(key)
+    if record is None:
+      return default
+    return self.row(record[-1] if isinstance(record, list) else record)
+
+  def getAll(self, key):
+    """All rows with key, in the order of the CSV"""
+    record = self.index.get(key)
+    if record is None:
+      return []
+    if isinstance(record, list):
+      return [self.row(i) for i in record]
+    return [self.row(record)]
+
+  def state(self):
+    return {'index': self.index, 'starts': self.starts.tobytes(), 'ends': self.ends.tobytes()}
+
+  def setState(self, state):
+    self.index = state['index']
+    self.starts = array.array(TYPECODE)
+    self.starts.frombytes(state['starts'])
+    self.ends = array.array(TYPECODE)
+    self.ends.frombytes(state['ends'])
+
+def openLookupStore(fileName, keyField, quoteChar='"', keyCase=None):
+  """LookupStore of the CSV fileName by keyField; keyCase None, 'lower' or 'upper' is applied to the keys in the CSV
+
+  Exits with an error if keyField is not in the header of a non-empty fileName.
+  """
+  inputFile = open(fileName, 'rb')
+  stat = os.fstat(inputFile.fileno())
+  if stat.st_size == 0:
+    inputFile.close()
+    return LookupStore(None, keyField, keyCase)
+  reader = MappedDictReader(inputFile, quoteChar)
+  inputFile.close()
+  if keyField not in reader.fieldnames:
+    sys.stderr.write(f'Error: key field {keyField} is not in {fileName} headers: {",".join(reader.fieldnames)}\n')
+    sys.exit(1)
+  store = LookupStore(reader, keyField, keyCase)
+  settings = {'format': CACHE_FORMAT, 'itemsize': array.array(TYPECODE).itemsize, 'quoteChar': quoteChar,
+              'keyField': keyField, 'keyCase': keyCase, 'fieldnames': reader.fieldnames}
+  source = {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+  storeFileName = indexFileName(fileName, keyField, keyCase)
+  try:
+    with open(storeFileName, 'rb') as storeFile:
+      header = pickle.load(storeFile)
+      if isinstance(header, dict) and header.get('settings') == settings:
+        indexedSize = header['source']['size']
+        if header['source'] == source:
+          with instrument.phase('load'):
+            store.setState(pickle.load(storeFile))
+          return store
+        if (indexedSize <= stat.st_size and reader.map[indexedSize-1:indexedSize] == b'\n' and
+            contentDigest(reader.map, indexedSize) == header['digest']):
+          with instrument.phase('load'):
+            store.setState(pickle.load(storeFile))
+          reader.position = indexedSize
+  except (OSError, EOFError, pickle.UnpicklingError):
+    pass
+  with instrument.phase('index'):
+    store.addRecords()
+  try:
+    tempFileName = storeFileName+'.tmp'
+    with open(tempFileName, 'wb') as storeFile:
+      pickle.dump({'settings': settings, 'source': source, 'digest': contentDigest(reader.map, stat.st_size)},
+                  storeFile, protocol=pickle.HIGHEST_PROTOCOL)
+      pickle.dump(store.state(), storeFile, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tempFileName, storeFileName)
+  except OSError:
+    pass
+  return store
@@ -0,0 +1,158 @@
+"""
+# Purpose: A csv.DictReader replacement for large CSV files that memory maps the file and returns row views
+#          that hold only the byte offsets of their record; a record is decoded when one of its fields is read,
+#          so scripts that keep every row keep a few dozen bytes per row rather than a dict of strings.
+# Note: Records are found by line ends that are outside quoted fields, as written by GAM and the csv module;
+#       the most recently read record is kept decoded, so reading several fields of a row decodes it once.
+#       Row views support the dict operations the scripts use: row[field], row.get(), in, keys(), items(), values(),
+#       assignment and csv.DictWriter.writerow(row). Assigned values are kept with the view.
+#       records() yields the values of each record with its offsets, decoding records in blocks, for scripts that only scan.
+#       Input that can not be memory mapped, e.g. stdin, is read by csv.DictReader.
+# Usage:
+#  inputCSV = mmapcsv.DictReader(inputFile, quotechar=QUOTE_CHAR)
+#  for row in inputCSV:
+#    ...
+"""
+
+import csv
+import io
+import mmap
+import os
+
+from gamlib.parallel import RecordBoundaryScanner
+
+BLANK_RECORDS = {b'\n', b'\r\n'}
+RECORDS_PER_BLOCK = 1000
+
+def DictReader(inputFile, quotechar='"'):
+  """MappedDictReader for a regular file, csv.DictReader for anything else"""
+  try:
+    if os.fstat(inputFile.fileno()).st_size > 0 and inputFile.seekable():
+      return MappedDictReader(inputFile, quotechar)
+  except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+    pass
+  return csv.DictReader(inputFile, quotechar=quotechar)
+
+class MappedRow():
+  """View of one record of a MappedDictReader"""
+
+  __slots__ = ['reader', 'start', 'end', 'changes']
+
+  def __init__(self, reader, start, end):
+    self.reader = reader
+    self.start = start
+    self.end = end
+    self.changes = None
+
+  def asDict(self):
+    """The row as csv.DictReader would return it, with assigned values"""
+    row = self.reader.decodeRow(self)
+    if self.changes:
+      row = row.copy()
+      row.update(self.changes)
+    return row
+
+  def __getitem__(self, key):
+    if self.changes and key in self.changes:
+      return self.changes[key]
+    return self.reader.decodeRow(self)[key]
+
+  def __setitem__(self, key, value):
+    if self.changes is None:
+      self.changes = {}
+    self.changes[key] = value
+
+  def get(self, key, default=None):
+    if self.changes and key in self.changes:
+      return self.changes[key]
+    return self.reader.decodeRow(self).get(key, default)
+
+  def __contains__(self, key):
+    return (self.changes is not None and key in self.changes) or key in self.reader.decodeRow(self)
+
+  def __iter__(self):
+    return iter(self.asDict())
+
+  def __len__(self):
+    return len(self.asDict())
+
+  def keys(self):
+    return self.asDict().keys()
+
+  def values(self):
+    return self.asDict().values()
+
+  def items(self):
+    return self.asDict().items()
+
+  def copy(self):
+    return self.asDict().copy()
+
+  def __repr__(self):
+    return repr(self.asDict())
+
+class MappedDictReader():
+  """Iterate over the records of a memory mapped CSV file, yielding a MappedRow per record"""
+
+  def __init__(self, inputFile, quotechar='"', restkey=None, restval=None):
+    self.map = mmap.mmap(inputFile.fileno(), 0, access=mmap.ACCESS_READ)
+    self.scanner = RecordBoundaryScanner(self.map, quotechar)
+    self.quotechar = quotechar
+    self.restkey = restkey
+    self.restval = restval
+    self.size = len(self.map)
+    self.lastRow = self.lastDict = None
+    self.position = self.nextBoundary(0)
+    self.fieldnames = self.decodeRecord(0, self.position)
+
+  def nextBoundary(self, start):
+    end = self.scanner.boundaryAfter(start)
+    return end if end is not None else self.size
+
+  def decodeRecord(self, start, end):
+    text = self.map[start:end].decode('utf-8')
+    if '\r' in text:
+      text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return next(csv.reader(io.StringIO(text), quotechar=self.quotechar), [])
+
+  def decodeRow(self, row):
+    if row is not self.lastRow:
+      values = self.decodeRecord(row.start, row.end)
+      rowDict = dict(zip(self.fieldnames, values))
+      lf = len(self.fieldnames)
+      lr = len(values)
+      if lf < lr:
+        rowDict[self.restkey] = values[lf:]
+      elif lf > lr:
+        for key in self.fieldnames[lr:]:
+          rowDict[key] = self.restval
+      self.lastRow = row
+      self.lastDict = rowDict
+    return self.lastDict
+
+  def records(self, blockRecords=RECORDS_PER_BLOCK):
+    """Yield (start, end, values) for each remaining record, decoding blockRecords records at a time, without row views"""
+    while self.position < self.size:
+      blockStart = self.position
+      bounds = []
+      while self.position < self.size and len(bounds) < blockRecords:
+        start = self.position
+        self.position = self.nextBoundary(start)
+        bounds.append((start, self.position))
+      text = self.map[blockStart:self.position].decode('utf-8')
+      if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+      for (start, end), values in zip(bounds, csv.reader(io.StringIO(text), quotechar=self.quotechar)):
+        if values:
+          yield start, end, values
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    while self.position < self.size:
+      start = self.position
+      self.position = self.nextBoundary(start)
+      if self.position-start > 2 or self.map[start:self.position] not in BLANK_RECORDS:
+        return MappedRow(self, start, self.position)
+    raise StopIteration
@@ -0,0 +1,144 @@
+"""
+# Purpose: Run a script's CSV processing over byte ranges of its input file in worker processes
+#          and write the outputs of the ranges in input order, giving the same output as a serial run.
+# Note: The input is split only at line ends that are outside quoted fields, so a field with embedded newlines
+#       stays in one range; each range is processed on its own, so the processing of a row must not depend on
+#       the rows before it. Each worker sees the header record followed by its range.
+#       The script code that opens files and calls runParallel must be under if __name__ == '__main__':
+#       so that worker processes can import the script on systems that do not fork.
+# Usage:
+#  def processCSV(inputFile, outputFile, writeHeader=True):
+#    ...
+#  if __name__ == '__main__':
+#    jobs = getJobs(sys.argv)
+#    ...
+#    if jobs > 1 and inputFile != sys.stdin:
+#      runParallel(processCSV, sys.argv[1], outputFile, jobs, QUOTE_CHAR)
+#    else:
+#      processCSV(inputFile, outputFile)
+"""
+
+import io
+import multiprocessing
+import os
+import sys
+
+from gamlib import instrument
+
+BLOCK_SIZE = 1 << 20
+CHUNKS_PER_JOB = 4
+
+def getJobs(argv):
+  """Remove --jobs N from argv and return N; 1 if --jobs is not present, the number of CPUs if N is 0
+
+  Exits with an error if N is missing or is not a number.
+  """
+  if '--jobs' not in argv:
+    return 1
+  i = argv.index('--jobs')
+  jobs = argv[i+1] if i+1 < len(argv) else ''
+  del argv[i:i+2]
+  try:
+    jobs = int(jobs)
+  except ValueError:
+    sys.stderr.write('Error: --jobs requires a number\n')
+    sys.exit(2)
+  return jobs if jobs > 0 else os.cpu_count() or 1
+
+class RecordBoundaryScanner():
+  """Scan a CSV file forward, tracking whether the current position is inside a quoted field"""
+
+  def __init__(self, inputFile, quoteChar='"', delimiter=',', blockSize=BLOCK_SIZE):
+    self.inputFile = inputFile
+    self.quote = quoteChar.encode('utf-8')
+    self.fieldStarts = (delimiter.encode('utf-8'), b'\n', b'\r', b'')
+    self.blockSize = blockSize
+    self.block = b''
+    self.base = 0
+    self.pos = 0
+    self.inQuotes = False
+    self.closedAt = -2
+    self.lastByte = b''
+
+  def skipTo(self, end):
+    """Move to end in the block, updating inQuotes for the quotes before it
+
+    As in the csv module, a quote opens a quoted field only at the start of a field, and a quote just after
+    the quote that closed a field is a doubled quote, which reopens it.
+    """
+    block = self.block
+    q = block.find(self.quote, self.pos, end)
+    while q >= 0:
+      if self.inQuotes:
+        self.inQuotes = False
+        self.closedAt = self.base+q
+      else:
+        self.inQuotes = self.base+q == self.closedAt+1 or (block[q-1:q] if q else self.lastByte) in self.fieldStarts
+      q = block.find(self.quote, q+1, end)
+    self.pos = end
+
+  def boundaryAfter(self, target):
+    """Offset just past the first line end at or after target that is outside a quoted field, None at end of file"""
+    while True:
+      if self.pos >= len(self.block):
+        self.base += len(self.block)
+        self.lastByte = self.block[-1:] or self.lastByte
+        self.block = self.inputFile.read(self.blockSize)
+        self.pos = 0
+        if not self.block:
+          return None
+      end = target-self.base
+      if self.pos < end:
+        self.skipTo(min(end, len(self.block)))
+        continue
+      i = self.block.find(b'\n', self.pos)
+      if i < 0:
+        self.skipTo(len(self.block))
+        continue
+      self.skipTo(i)
+      self.pos = i+1
+      if not self.inQuotes:
+        return self.base+self.pos
+
+def splitCSV(fileName, count, quoteChar='"'):
+  """Return the end offset of the header record and up to count (start, end) byte ranges of whole records covering the rest"""
+  size = os.path.getsize(fileName)
+  with open(fileName, 'rb') as f:
+    scanner = RecordBoundaryScanner(f, quoteChar)
+    headerEnd = scanner.boundaryAfter(0) or size
+    ranges = []
+    start = headerEnd
+    for k in range(1, count+1):
+      if start >= size:
+        break
+      end = size if k == count else scanner.boundaryAfter(max(start, headerEnd+(size-headerEnd)*k//count)) or size
+      ranges.append((start, end))
+      start = end
+  return headerEnd, ranges
+
+def processRange(task):
+  """Worker: run processCSV over the header record and one byte range, return its output and its instrument counts"""
+  processCSV, fileName, headerEnd, start, end, writeHeader = task
+  counts = instrument.workerCounts()
+  with open(fileName, 'rb') as f:
+    data = f.read(headerEnd)
+    f.seek(start)
+    data += f.read(end-start)
+  inputFile = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8')
+  outputFile = io.StringIO()
+  processCSV(inputFile, outputFile, writeHeader)
+  return outputFile.getvalue(), instrument.workerCounts(counts)
+
+def runParallel(processCSV, inputFileName, outputFile, jobs, quoteChar='"'):
+  """Run processCSV(inputFile, outputFile, writeHeader) over ranges of inputFileName in jobs processes
+
+  Only the first range writes the header; outputs are written to outputFile in input order as they complete.
+  """
+  headerEnd, ranges = splitCSV(inputFileName, jobs*CHUNKS_PER_JOB, quoteChar)
+  tasks = [(processCSV, inputFileName, headerEnd, start, end, i == 0) for i, (start, end) in enumerate(ranges)]
+  if not tasks:
+    tasks = [(processCSV, inputFileName, headerEnd, headerEnd, headerEnd, True)]
+  with multiprocessing.Pool(min(jobs, len(tasks))) as pool:
+    for output, counts in pool.imap(processRange, tasks):
+      outputFile.write(output)
+      instrument.addWorkerCounts(counts)
@@ -0,0 +1,108 @@
+"""
+# Purpose: Parse the header of a GAM print filelist CSV once into a column index per permissions.N slot
+#          so that scripts can read plain csv.reader rows by position instead of matching
+#          every column name of every row with a regular expression.
+# Note: populatedSlots(row) returns only the slots up to the count column that GAM writes, e.g., permissions,
+#       so a file with a few hundred ACLs doesn't make every row visit a few hundred empty slots.
+#       The count is used only when the slots are numbered 0, 1, ... in header order and the first slot after the count
+#       and the last slot are empty; otherwise all of the slots are returned.
+# Usage:
+#  inputCSV = csv.reader(inputFile, quotechar=QUOTE_CHAR)
+#  layout = PermissionsLayout(next(inputCSV, []))
+#  getFileId = layout.getter('id')
+#  for row in layout.rows(inputCSV):
+#    for slot in layout.populatedSlots(row):
+#      ptype = row[slot.type]
+#      if ptype:
+#        role = row[slot.role]
+#        emailAddress = slot.get(row, 'emailAddress')
+"""
+
+import operator
+import re
+
+# Fields that are exposed as column index attributes of PermissionSlot; None when the field is not in the header
+SLOT_FIELDS = ['type', 'id', 'role', 'emailAddress', 'domain', 'allowFileDiscovery', 'withLink', 'deleted',
+               'displayName', 'expirationTime', 'permissionDetails']
+
+class PermissionSlot():
+  """Column indexes of the fields of a single permissions.N slot"""
+
+  __slots__ = ['n', 'fields']+SLOT_FIELDS
+
+  def __init__(self, n, fields):
+    self.n = n
+    self.fields = fields
+    for field in SLOT_FIELDS:
+      setattr(self, field, fields.get(field))
+
+  def get(self, row, field, default=''):
+    """Return the value of permissions.N.field in row, default if the field is not in the header"""
+    index = self.fields.get(field)
+    return row[index] if index is not None else default
+
+  def isDeleted(self, row):
+    return self.deleted is not None and row[self.deleted] == 'True'
+
+  def getAllowFileDiscovery(self, row):
+    """allowFileDiscovery, derived from withLink for older exports that do not include it"""
+    if self.allowFileDiscovery is not None:
+      return row[self.allowFileDiscovery]
+    return str(self.withLink is not None and row[self.withLink] == 'False')
+
+class PermissionsLayout():
+  """Column index of a CSV header; slots are the prefix.N slots that have a keyField column, in header order"""
+
+  def __init__(self, fieldnames, prefix='permissions', keyField='type'):
+    self.fieldnames = list(fieldnames)
+    self.width = len(self.fieldnames)
+    self.columns = {}
+    for i, field in enumerate(self.fieldnames):
+      self.columns.setdefault(field, i)
+    slotPattern = re.compile(re.escape(prefix)+r'\.(\d+)\.(.+)')
+    slotFields = {}
+    for i, field in enumerate(self.fieldnames):
+      mg = slotPattern.fullmatch(field)
+      if mg:
+        slotFields.setdefault(mg.group(1), {}).setdefault(mg.group(2), i)
+    self.slots = sorted((PermissionSlot(int(n), fields) for n, fields in slotFields.items() if keyField in fields),
+                        key=lambda slot: slot.fields[keyField])
+    self.countColumn = None
+    if [slot.n for slot in self.slots] == list(range(len(self.slots))):
+      self.countColumn = self.columns.get(prefix)
+    self.slotPrefixes = [self.slots[:count] for count in range(len(self.slots)+1)]
+
+  def populatedSlots(self, row):
+    """Slots up to the count column of row; all of the slots if the count is missing or doesn't match the row"""
+    slots = self.slots
+    if self.countColumn is None:
+      return slots
+    count = row[self.countColumn]
+    if not count.isdigit():
+      return slots
+    count = int(count)
+    if count >= len(slots) or row[slots[count].type] or row[slots[-1].type]:
+      return slots
+    return self.slotPrefixes[count]
+
+  def index(self, field, default=None):
+    """Column index of field, default if it is not in the header"""
+    return self.columns.get(field, default)
+
+  def getter(self, *fields, default=''):
+    """Function returning the value of the first of fields that is in the header, default if none are"""
+    for field in fields:
+      index = self.columns.get(field)
+      if index is not None:
+        return operator.itemgetter(index)
+    return lambda row: default
+
+  def rows(self, reader):
+    """Rows of reader padded to the header width; blank lines are skipped as csv.DictReader does"""
+    width = self.width
+    for row in reader:
+      if len(row) < width:
+        if not row:
+          continue
+        row += ['']*(width-len(row))
+      yield row
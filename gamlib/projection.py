@@ -0,0 +1,126 @@
+"""
+# Purpose: Read only the columns a script uses from a CSV file, and count the rows of a CSV file without parsing them
+# Note: A script names the columns it needs and gets a tuple of their values per row; a line without a quote character
+#       is split only as far as the last needed column, so the columns after it, e.g., the permissions.N.* columns
+#       of a filelist, are never split out or stored. Lines with quote characters are parsed by the csv module.
+#       Rows are counted by counting the line ends that are outside quoted fields; blank lines are skipped as csv.DictReader does.
+#       As in the csv module, a quote character opens a quoted field only at the start of a field, and \r\n and \r end a line.
+# Usage:
+#  inputCSV = ProjectedReader(inputFile, QUOTE_CHAR)
+#  for driveId, size in inputCSV.rows('driveId', 'size'):
+#    ...
+#  rows = countRows(binaryInputFile, QUOTE_CHAR)
+"""
+
+import csv
+import itertools
+import operator
+
+BLOCK_SIZE = 1 << 20
+
+class ProjectedReader():
+  """Rows of a CSV text file as tuples of the values of named columns"""
+
+  def __init__(self, inputFile, quoteChar='"', delimiter=','):
+    self.inputFile = inputFile
+    self.quoteChar = quoteChar
+    self.delimiter = delimiter
+    line = inputFile.readline()
+    self.fieldnames = self.parseRecord(line) if line else None
+
+  def parseRecord(self, line):
+    """Values of the record that starts with line; the csv module reads the continuation lines of a quoted field"""
+    return next(csv.reader(itertools.chain([line], self.inputFile), quotechar=self.quoteChar, delimiter=self.delimiter), [])
+
+  def rows(self, *fields):
+    """Yield a tuple of the values of fields for each row; the value of a field beyond the end of a short row is None
+
+    Raises KeyError if a field is not in the header.
+    """
+    if self.fieldnames is None:
+      return
+    indexes = []
+    for field in fields:
+      if field not in self.fieldnames:
+        raise KeyError(field)
+      indexes.append(self.fieldnames.index(field))
+    if len(indexes) == 1:
+      index = indexes[0]
+      getter = lambda values: (values[index],)
+    else:
+      getter = operator.itemgetter(*indexes)
+    maxSplit = max(indexes)+1 if indexes else 0
+    quoteChar = self.quoteChar
+    delimiter = self.delimiter
+    for line in self.inputFile:
+      if quoteChar in line:
+        values = self.parseRecord(line)
+        if not values:
+          continue
+      else:
+        line = line.rstrip('\r\n')
+        if not line:
+          continue
+        values = line.split(delimiter, maxSplit)
+      try:
+        yield getter(values)
+      except IndexError:
+        yield tuple(values[i] if i < len(values) else None for i in indexes)
+
+def countRows(inputFile, quoteChar='"', delimiter=',', blockSize=BLOCK_SIZE):
+  """Number of rows after the header of the CSV file opened in binary mode, as csv.DictReader would return them"""
+  quote = quoteChar.encode('utf-8')
+  fieldStarts = (delimiter.encode('utf-8'), b'\n', b'')
+  inQuotes = False
+  lineEnds = 0
+  blankLines = 0
+  lineOpen = False
+  firstLineBlank = None
+  lastByte = b''
+  while True:
+    block = inputFile.read(blockSize)
+    if not block:
+      break
+    while block.endswith((quote, b'\r')):
+      nextByte = inputFile.read(1)
+      if not nextByte:
+        break
+      block += nextByte
+    block = block.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    position = 0
+    while position < len(block):
+      q = block.find(quote, position)
+      if inQuotes:
+        if q < 0:
+          break
+        # A doubled quote is a quote in the field; any other quote ends the quoted field
+        if block[q+1:q+2] == quote:
+          position = q+2
+        else:
+          inQuotes = False
+          position = q+1
+        continue
+      part = block[position:q] if q >= 0 else block[position:]
+      if part:
+        lines = part.split(b'\n')
+        if len(lines) == 1:
+          lineOpen = True
+        else:
+          if firstLineBlank is None:
+            firstLineBlank = not lines[0] and not lineOpen
+          lineEnds += len(lines)-1
+          if not lines[0] and not lineOpen:
+            blankLines += 1
+          blankLines += lines[1:-1].count(b'')
+          lineOpen = lines[-1] != b''
+      if q < 0:
+        break
+      # A quote opens a quoted field only at the start of a field; elsewhere it is part of the value
+      inQuotes = (block[q-1:q] if q else lastByte) in fieldStarts
+      lineOpen = True
+      position = q+1
+    lastByte = block[-1:]
+  records = lineEnds-blankLines+(1 if lineOpen else 0)
+  if firstLineBlank:
+    return records
+  return max(records-1, 0)
@@ -0,0 +1,168 @@
+"""
+# Purpose: Output sinks for the scripts that write one row per item, so their output can be loaded without reparsing CSV
+#          csv - the CSV the scripts have always written
+#          ndjson - one JSON object per line, with the field names as keys in order
+#          parquet - a Parquet file with a string column per field and ROW_GROUP_ROWS rows per row group
+#          arrow - an Arrow IPC file with a string column per field and ROW_GROUP_ROWS rows per record batch
+# Note: Values are written as they would be in the CSV file: as strings, with None as ''.
+#       parquet and arrow need pyarrow, which is imported only when one of them is selected; they are written
+#       to the output file name or to binary stdout.
+#       A script selects the format with OUTPUT_FORMAT; --format FORMAT on the command line overrides it.
+# Usage:
+#  outputFormat = sinks.getFormat(sys.argv, OUTPUT_FORMAT)
+#  outputFile = sinks.openOutput(sys.argv[2], outputFormat)
+#  outputCSV = sinks.DictWriter(outputFile, fieldnames, outputFormat, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+#  outputCSV.writeheader()
+#  outputCSV.writerow(row)
+#  outputCSV.close()
+#  sinks.closeOutput(outputFile)
+"""
+
+import csv
+import sys
+
+from gamlib import jsoncodec
+
+FORMATS = ['csv', 'ndjson', 'parquet', 'arrow']
+BINARY_FORMATS = {'parquet', 'arrow'}
+ROW_GROUP_ROWS = 100000
+
+def loadArrow():
+  """pyarrow with its ipc and parquet modules, None if it is not installed"""
+  try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+  except ImportError:
+    return None
+  return pyarrow
+
+def getFormat(argv, default='csv'):
+  """Remove --format FORMAT from argv and return FORMAT; default if --format is not present
+
+  Exits with an error if FORMAT is missing or is not one of FORMATS.
+  """
+  outputFormat = default
+  if '--format' in argv:
+    i = argv.index('--format')
+    outputFormat = argv[i+1].lower() if i+1 < len(argv) else ''
+    del argv[i:i+2]
+  if outputFormat not in FORMATS:
+    sys.stderr.write(f'Error: output format "{outputFormat}" not in {",".join(FORMATS)}\n')
+    sys.exit(2)
+  if outputFormat in BINARY_FORMATS and loadArrow() is None:
+    sys.stderr.write(f'Error: output format "{outputFormat}" requires pyarrow: pip install pyarrow\n')
+    sys.exit(2)
+  return outputFormat
+
+def openOutput(fileName, outputFormat='csv'):
+  """Open fileName for writing outputFormat; stdout when fileName is '-' or None"""
+  if outputFormat in BINARY_FORMATS:
+    return open(fileName, 'wb') if fileName and fileName != '-' else sys.stdout.buffer
+  return open(fileName, 'w', encoding='utf-8', newline='') if fileName and fileName != '-' else sys.stdout
+
+def closeOutput(outputFile):
+  if outputFile in [sys.stdout, sys.stdout.buffer]:
+    outputFile.flush()
+  else:
+    outputFile.close()
+
+def text(value):
+  if isinstance(value, str):
+    return value
+  return '' if value is None else str(value)
+
+class CSVSink():
+  """csv.DictWriter that also takes rows as lists of values"""
+
+  def __init__(self, outputFile, fieldnames, quotechar='"', lineterminator='\n'):
+    self.fieldnames = fieldnames
+    self.dictWriter = csv.DictWriter(outputFile, fieldnames, lineterminator=lineterminator, quotechar=quotechar)
+    self.writer = csv.writer(outputFile, lineterminator=lineterminator, quotechar=quotechar)
+
+  def writeheader(self):
+    self.dictWriter.writeheader()
+
+  def writerow(self, row):
+    self.dictWriter.writerow(row)
+
+  def writevalues(self, values):
+    self.writer.writerow(values)
+
+  def close(self):
+    pass
+
+class NDJSONSink():
+  """One JSON object per row"""
+
+  def __init__(self, outputFile, fieldnames):
+    self.outputFile = outputFile
+    self.fieldnames = fieldnames
+    self.encode = jsoncodec.encoder(ensure_ascii=False, separators=(',', ':'))
+
+  def writeheader(self):
+    pass
+
+  def writerow(self, row):
+    self.writevalues([row.get(field, '') for field in self.fieldnames])
+
+  def writevalues(self, values):
+    self.outputFile.write(self.encode(dict(zip(self.fieldnames, map(text, values))))+'\n')
+
+  def close(self):
+    pass
+
+class ArrowSink():
+  """Rows collected into record batches of ROW_GROUP_ROWS rows and written as an Arrow IPC file"""
+
+  def __init__(self, outputFile, fieldnames, rowGroupRows=ROW_GROUP_ROWS):
+    self.pyarrow = loadArrow()
+    self.fieldnames = fieldnames
+    self.schema = self.pyarrow.schema([(field, self.pyarrow.string()) for field in fieldnames])
+    self.rowGroupRows = rowGroupRows
+    self.rows = []
+    self.writer = self.openWriter(outputFile)
+
+  def openWriter(self, outputFile):
+    return self.pyarrow.ipc.new_file(outputFile, self.schema)
+
+  def writeheader(self):
+    pass
+
+  def writerow(self, row):
+    self.writevalues([row.get(field, '') for field in self.fieldnames])
+
+  def writevalues(self, values):
+    self.rows.append(values)
+    if len(self.rows) >= self.rowGroupRows:
+      self.flush()
+
+  def flush(self):
+    if not self.rows:
+      return
+    width = len(self.fieldnames)
+    columns = zip(*[values if len(values) == width else list(values)+['']*(width-len(values)) for values in self.rows])
+    batch = self.pyarrow.RecordBatch.from_arrays([self.pyarrow.array(list(map(text, column)), self.pyarrow.string())
+                                                  for column in columns], schema=self.schema)
+    self.writer.write_batch(batch)
+    self.rows = []
+
+  def close(self):
+    self.flush()
+    self.writer.close()
+
+class ParquetSink(ArrowSink):
+  """Rows collected into row groups of ROW_GROUP_ROWS rows and written as a Parquet file"""
+
+  def openWriter(self, outputFile):
+    return self.pyarrow.parquet.ParquetWriter(outputFile, self.schema)
+
+def DictWriter(outputFile, fieldnames, outputFormat='csv', quotechar='"', lineterminator='\n'):
+  """Sink for outputFormat with the writeheader() and writerow() of csv.DictWriter, writevalues() and close()"""
+  if outputFormat == 'ndjson':
+    return NDJSONSink(outputFile, fieldnames)
+  if outputFormat == 'parquet':
+    return ParquetSink(outputFile, fieldnames)
+  if outputFormat == 'arrow':
+    return ArrowSink(outputFile, fieldnames)
+  return CSVSink(outputFile, fieldnames, quotechar=quotechar, lineterminator=lineterminator)
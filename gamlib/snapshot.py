@@ -0,0 +1,136 @@
+"""
+# Purpose: A compact snapshot of a users CSV file for FindUserChanges.py: for each user, a 64 bit hash of the unique ID,
+#          a 64 bit hash of the ID and the compared fields and the byte offsets of the user's record in the CSV;
+#          the snapshot is sorted by ID hash so that two snapshots are compared by merging them.
+# Note: Only the records whose hashes differ are read from the CSV and compared field by field,
+#       so a hash collision can not produce a wrong add, delete or update, except when both hashes of a changed user collide.
+#       The snapshot records the size and modification time of the CSV; it is used for a CSV with the same size and
+#       modification time, e.g., after CurrUsers.csv is renamed to PrevUsers.csv, and ignored otherwise.
+# Usage:
+#  currCSV = mmapcsv.MappedDictReader(currFile, QUOTE_CHAR)
+#  currSnapshot = UserSnapshot.fromCSV(currCSV, UID_FIELD, [EMAIL_FIELD]+MATCH_FIELDS)
+#  currSnapshot.save(SNAPSHOT_FILENAME, CURRUSERS_FILENAME, settings)
+"""
+
+import array
+import hashlib
+import os
+import pickle
+import sys
+
+from gamlib import instrument
+from gamlib.mmapcsv import MappedRow
+
+CACHE_FORMAT = 1
+TYPECODE = 'Q'
+
+def hash64(text):
+  return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def sourceStamp(fileName):
+  stat = os.stat(fileName)
+  return (stat.st_size, stat.st_mtime_ns)
+
+def lastRowPerUid(order, sortedKeys, uidOf):
+  """Drop from order, sorted by ID hash, all but the last row of each ID; uidOf(k) is the ID of row k"""
+  result = []
+  i = 0
+  while i < len(order):
+    j = i+1
+    while j < len(order) and sortedKeys[j] == sortedKeys[i]:
+      j += 1
+    if j-i == 1:
+      result.append(order[i])
+    else:
+      result.extend(sorted({uidOf(k): k for k in order[i:j]}.values()))
+    i = j
+  return result
+
+class UserSnapshot():
+  """Sorted parallel arrays of ID hash, content hash, record start and record end"""
+
+  def __init__(self, keys=None, digests=None, starts=None, ends=None):
+    self.keys = keys if keys is not None else array.array(TYPECODE)
+    self.digests = digests if digests is not None else array.array(TYPECODE)
+    self.starts = starts if starts is not None else array.array(TYPECODE)
+    self.ends = ends if ends is not None else array.array(TYPECODE)
+
+  def __len__(self):
+    return len(self.keys)
+
+  @classmethod
+  def fromCSV(cls, inputCSV, uidField, fields):
+    """Snapshot of the rows of the MappedDictReader inputCSV; when an ID appears more than once, its last row is kept"""
+    keys = array.array(TYPECODE)
+    digests = array.array(TYPECODE)
+    starts = array.array(TYPECODE)
+    ends = array.array(TYPECODE)
+    uidIndex = inputCSV.fieldnames.index(uidField)
+    fieldIndexes = [inputCSV.fieldnames.index(field) for field in fields]
+    width = len(inputCSV.fieldnames)
+    for start, end, values in inputCSV.records():
+      if len(values) < width:
+        values += [None]*(width-len(values))
+      uid = values[uidIndex]
+      keys.append(hash64(uid))
+      digests.append(hash64(repr([uid]+[values[i] for i in fieldIndexes])))
+      starts.append(start)
+      ends.append(end)
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    sortedKeys = [keys[k] for k in order]
+    if any(key == nextKey for key, nextKey in zip(sortedKeys, sortedKeys[1:])):
+      order = lastRowPerUid(order, sortedKeys, lambda k: MappedRow(inputCSV, starts[k], ends[k])[uidField])
+    return cls(array.array(TYPECODE, [keys[k] for k in order]), array.array(TYPECODE, [digests[k] for k in order]),
+               array.array(TYPECODE, [starts[k] for k in order]), array.array(TYPECODE, [ends[k] for k in order]))
+
+  def row(self, inputCSV, i):
+    """Row i of the snapshot read from the MappedDictReader inputCSV of its CSV"""
+    return MappedRow(inputCSV, self.starts[i], self.ends[i])
+
+  def runs(self):
+    """Yield (key, start, end) for each run of entries with the same ID hash"""
+    i = 0
+    count = len(self.keys)
+    while i < count:
+      j = i+1
+      while j < count and self.keys[j] == self.keys[i]:
+        j += 1
+      yield self.keys[i], i, j
+      i = j
+
+  def save(self, fileName, sourceFileName, settings):
+    header = {'format': CACHE_FORMAT, 'byteorder': sys.byteorder, 'itemsize': array.array(TYPECODE).itemsize,
+              'source': sourceStamp(sourceFileName), 'settings': settings}
+    tempFileName = fileName+'.tmp'
+    with open(tempFileName, 'wb') as snapshotFile:
+      pickle.dump(header, snapshotFile, protocol=pickle.HIGHEST_PROTOCOL)
+      pickle.dump([values.tobytes() for values in (self.keys, self.digests, self.starts, self.ends)],
+                  snapshotFile, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tempFileName, fileName)
+
+  @classmethod
+  def load(cls, fileName, sourceFileName, settings):
+    """The snapshot saved in fileName, None if there is none or it was not saved for sourceFileName and settings"""
+    try:
+      with open(fileName, 'rb') as snapshotFile:
+        header = pickle.load(snapshotFile)
+        if header != {'format': CACHE_FORMAT, 'byteorder': sys.byteorder, 'itemsize': array.array(TYPECODE).itemsize,
+                      'source': sourceStamp(sourceFileName), 'settings': settings}:
+          return None
+        with instrument.phase('load'):
+          columns = []
+          for data in pickle.load(snapshotFile):
+            values = array.array(TYPECODE)
+            values.frombytes(data)
+            columns.append(values)
+    except (OSError, EOFError, pickle.UnpicklingError):
+      return None
+    return cls(*columns)
+
+def loadOrBuild(fileName, inputCSV, sourceFileName, uidField, fields, settings):
+  """The snapshot of sourceFileName from fileName if it is current, otherwise built from inputCSV"""
+  snapshot = UserSnapshot.load(fileName, sourceFileName, settings)
+  if snapshot is None:
+    with instrument.phase('index'):
+      snapshot = UserSnapshot.fromCSV(inputCSV, uidField, fields)
+  return snapshot
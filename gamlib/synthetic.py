@@ -0,0 +1,157 @@
+"""
+# Purpose: Write synthetic CSV files shaped like GAM exports, for benchmarking the scripts
+#          filelist - gam print filelist with permissions, one file per row with permissionsWidth permissions.N slots
+#          groupmembers - gam print group-members, groups nested depth levels deep with optional cycles
+#          orgunits - gam print ous and gam print users with orgUnitPath
+#          events - gam print events with attendeesWidth attendees.N slots
+# Note: The files are the same for the same arguments and seed. Names, emails and domains are drawn from small pools
+#       so that duplicates, internal and external shares and repeated domains occur as they do in real exports.
+# Usage:
+#  files = GENERATORS['filelist'](directory, rows)
+#  files['input'] is the name of the CSV file
+"""
+
+import csv
+import os
+import random
+
+DOMAINS = ['domain.com', 'domain.com', 'domain.com', 'gmail.com', 'partner.org', 'example.net']
+MIME_TYPES = ['application/pdf', 'application/vnd.google-apps.document', 'application/vnd.google-apps.folder',
+              'application/vnd.google-apps.spreadsheet', 'image/png', 'text/plain']
+ROLES = ['owner', 'writer', 'reader', 'reader', 'commenter', 'fileOrganizer', 'organizer']
+PERMISSION_TYPES = ['user', 'user', 'user', 'group', 'domain', 'anyone']
+PERMISSION_FIELDS = ['allowFileDiscovery', 'deleted', 'domain', 'emailAddress', 'id', 'role', 'type', 'withLink',
+                     'displayName', 'permissionDetails.0.inherited']
+FILE_NAMES = ['Budget', 'Notes', 'Report', 'Schedule', 'Minutes, Draft', 'Plan "Final"']
+RESPONSE_STATUSES = ['accepted', 'declined', 'needsAction', 'tentative']
+LINE_TERMINATOR = '\n'
+
+def openCSV(fileName):
+  outputFile = open(fileName, 'w', encoding='utf-8', newline='')
+  return outputFile, csv.writer(outputFile, lineterminator=LINE_TERMINATOR)
+
+def userPool(rng, count):
+  return [f'user{i}@{rng.choice(DOMAINS)}' for i in range(count)]
+
+def timestamp(rng, year):
+  return f'{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00.000Z'
+
+def writeFileList(directory, rows, permissionsWidth=10, users=1000, drives=100, seed=1):
+  """FileList.csv: rows files with 0 to permissionsWidth permissions each"""
+  rng = random.Random(seed)
+  emails = userPool(rng, users)
+  owners = emails[:max(users//10, 1)]
+  fileName = os.path.join(directory, f'FileList-{rows}-{permissionsWidth}.csv')
+  outputFile, outputCSV = openCSV(fileName)
+  header = ['Owner', 'id', 'name', 'mimeType', 'createdTime', 'modifiedTime', 'size', 'driveId',
+            'owners', 'owners.0.emailAddress', 'paths', 'path.0', 'permissions']
+  for n in range(permissionsWidth):
+    header.extend(f'permissions.{n}.{field}' for field in PERMISSION_FIELDS)
+  outputCSV.writerow(header)
+  emptySlot = ['']*len(PERMISSION_FIELDS)
+  for i in range(rows):
+    owner = rng.choice(owners)
+    count = rng.randint(0, permissionsWidth)
+    row = [owner, f'file{i:09d}', rng.choice(FILE_NAMES), rng.choice(MIME_TYPES),
+           timestamp(rng, rng.randint(2019, 2024)), timestamp(rng, 2025), str(rng.randint(0, 1 << 30)),
+           f'drive{rng.randrange(drives)}' if rng.random() < 0.3 else '',
+           '1', owner, '1', f'My Drive/Folder{rng.randrange(20)}', str(count)]
+    for n in range(permissionsWidth):
+      if n >= count:
+        row.extend(emptySlot)
+        continue
+      ptype = 'user' if n == 0 else rng.choice(PERMISSION_TYPES)
+      role = 'owner' if n == 0 else rng.choice(ROLES[1:])
+      emailAddress = owner if n == 0 else rng.choice(emails) if ptype in ['user', 'group'] else ''
+      domain = emailAddress[emailAddress.find('@')+1:] if emailAddress else rng.choice(DOMAINS) if ptype == 'domain' else ''
+      allowFileDiscovery = rng.choice(['True', 'False']) if ptype in ['domain', 'anyone'] else ''
+      row.extend([allowFileDiscovery, 'False', domain, emailAddress, f'perm{rng.randrange(1 << 20)}', role, ptype,
+                  str(allowFileDiscovery == 'False') if allowFileDiscovery else '', emailAddress.split('@')[0],
+                  rng.choice(['True', 'False'])])
+    outputCSV.writerow(row)
+  outputFile.close()
+  return {'input': fileName}
+
+def writeGroupMembers(directory, rows, depth=5, cycles=0, groupSize=50, seed=1):
+  """GroupMembers.csv: about rows memberships; groups are nested depth levels deep and cycles groups contain a root group"""
+  rng = random.Random(seed)
+  groupCount = max(rows//groupSize, depth, 1)
+  groups = [f'group{i}@domain.com' for i in range(groupCount)]
+  levels = [[] for _ in range(depth)]
+  for i in range(groupCount):
+    levels[i % depth].append(i)
+  parent = {}
+  memberships = []
+  for level in range(1, depth):
+    for child in levels[level]:
+      parent[child] = rng.choice(levels[level-1])
+      memberships.append((groups[parent[child]], groups[child], 'GROUP'))
+  for _ in range(cycles if depth > 1 else 0):
+    deep = rng.choice(levels[-1])
+    root = deep
+    while root in parent:
+      root = parent[root]
+    memberships.append((groups[deep], groups[root], 'GROUP'))
+  emails = userPool(rng, max(rows//10, 1))
+  while len(memberships) < rows:
+    memberships.append((rng.choice(groups), rng.choice(emails), 'USER'))
+  fileName = os.path.join(directory, f'GroupMembers-{rows}-{depth}-{cycles}.csv')
+  outputFile, outputCSV = openCSV(fileName)
+  outputCSV.writerow(['group', 'email', 'type', 'role'])
+  for group, email, mtype in memberships:
+    outputCSV.writerow([group, email, mtype, rng.choice(['MEMBER', 'MEMBER', 'MEMBER', 'MANAGER', 'OWNER'])])
+  outputFile.close()
+  return {'input': fileName}
+
+def writeOrgUnits(directory, rows, orgUnits=500, depth=4, seed=1):
+  """OrgUnits.csv with orgUnits OUs depth levels deep and Users.csv with rows users spread over them"""
+  rng = random.Random(seed)
+  paths = []
+  levels = [['']]
+  for i in range(orgUnits):
+    level = min(i % depth, len(levels)-1)
+    path = f'{rng.choice(levels[level])}/OU{i}'
+    paths.append(path)
+    if level+1 == len(levels):
+      levels.append([])
+    levels[level+1].append(path)
+  orgUnitsFileName = os.path.join(directory, f'OrgUnits-{orgUnits}-{depth}.csv')
+  outputFile, outputCSV = openCSV(orgUnitsFileName)
+  outputCSV.writerow(['orgUnitPath', 'orgUnitId', 'name', 'parentOrgUnitPath'])
+  for i, path in enumerate(paths):
+    outputCSV.writerow([path, f'id:ou{i}', path.rsplit('/', 1)[1], path.rsplit('/', 1)[0] or '/'])
+  outputFile.close()
+  usersFileName = os.path.join(directory, f'Users-{rows}-{orgUnits}-{depth}.csv')
+  outputFile, outputCSV = openCSV(usersFileName)
+  outputCSV.writerow(['primaryEmail', 'orgUnitPath', 'name.fullName'])
+  for i in range(rows):
+    outputCSV.writerow([f'user{i}@domain.com', rng.choice(paths) if rng.random() < 0.95 else '/', f'User {i}'])
+  outputFile.close()
+  return {'input': usersFileName, 'orgunits': orgUnitsFileName}
+
+def writeEvents(directory, rows, attendeesWidth=10, users=1000, seed=1):
+  """Events.csv: rows events with 1 to attendeesWidth attendees each"""
+  rng = random.Random(seed)
+  emails = userPool(rng, users)
+  fileName = os.path.join(directory, f'Events-{rows}-{attendeesWidth}.csv')
+  outputFile, outputCSV = openCSV(fileName)
+  header = ['primaryEmail', 'calendarId', 'id', 'summary', 'attendees']
+  for n in range(attendeesWidth):
+    header.extend([f'attendees.{n}.email', f'attendees.{n}.responseStatus'])
+  outputCSV.writerow(header)
+  for i in range(rows):
+    organizer = rng.choice(emails)
+    count = rng.randint(1, attendeesWidth)
+    row = [organizer, organizer, f'event{i:09d}', rng.choice(FILE_NAMES), str(count)]
+    for n in range(attendeesWidth):
+      row.extend([rng.choice(emails), rng.choice(RESPONSE_STATUSES)] if n < count else ['', ''])
+    outputCSV.writerow(row)
+  outputFile.close()
+  return {'input': fileName}
+
+GENERATORS = {
+  'filelist': writeFileList,
+  'groupmembers': writeGroupMembers,
+  'orgunits': writeOrgUnits,
+  'events': writeEvents,
+  }